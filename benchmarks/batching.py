@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Compare extract_frames.py throughput and cost for 1 to 8 frames per request.
+
+Frames are synthetic terminal screenshots, sent through extract_all()
+(with the default preprocessing) to the local mock of the chat
+completions endpoint the tests use (tests/mock_openai.py), so no API key
+or network is needed. The mock answers every
+frame with the same text and bills the request like the real API: image
+tokens by the 512px tile formula, text at ~4 characters per token. Its
+latency is a fixed round-trip plus time per prompt token and per
+generated token, so the output of a batch streams out one frame after
+the other, as it would from the model.
+
+Usage:
+    python benchmarks/batching.py
+    python benchmarks/batching.py --frames 96 --concurrency 8 --latency 0.8
+"""
+
+import argparse
+import base64
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import extract_frames  # noqa: E402
+from openai import AzureOpenAI  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+
+from tests.mock_openai import MockServer  # noqa: E402
+
+# What the model says about one frame (~100 tokens)
+ANSWER = """**Command:** `./claude spawn worker --ticket TKT-0042`
+
+**Claude:** Spawning a worker session in tmux for the ticket. The worker
+reads its role context, claims the ticket and reports back to Prophet
+through the signals directory when it needs an answer."""
+
+
+def text_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class BillingServer(MockServer):
+    """Mock endpoint answering every frame with ANSWER, with a latency and billing model."""
+
+    def __init__(self, latency: float, prompt_rate: float, output_rate: float):
+        super().__init__(delay=latency)
+        self.prompt_rate = prompt_rate  # Prompt tokens per second
+        self.output_rate = output_rate  # Generated tokens per second
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def answer(self, image: bytes) -> str:
+        return ANSWER
+
+    def complete(self, body: dict, content: str) -> dict:
+        prompt_tokens = 0
+        for message in body["messages"]:
+            parts = message["content"] if isinstance(message["content"], list) else [
+                {"type": "text", "text": message["content"]}]
+            for part in parts:
+                if part["type"] == "text":
+                    prompt_tokens += text_tokens(part["text"])
+                else:
+                    data = base64.b64decode(part["image_url"]["url"].split(",", 1)[1])
+                    with Image.open(io.BytesIO(data)) as image:
+                        prompt_tokens += extract_frames.image_tokens(*image.size, part["image_url"]["detail"])
+        completion_tokens = text_tokens(content)
+        time.sleep(self.delay + prompt_tokens / self.prompt_rate + completion_tokens / self.output_rate)
+        with self.lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+
+def make_frames(directory: Path, count: int) -> list[Path]:
+    """Write `count` distinct 1280x720 terminal-like frames."""
+    frames = []
+    for i in range(1, count + 1):
+        image = Image.new("RGB", (1280, 720), "black")
+        draw = ImageDraw.Draw(image)
+        for line in range(i % 40 + 1):
+            draw.text((16, 16 + line * 16), f"$ ./tickets list --status open  # frame {i}, line {line}", fill="white")
+        path = directory / f"frame_{i:05d}.jpg"
+        image.save(path, quality=85)
+        frames.append(path)
+    return frames
+
+
+def run(frames: list[Path], batch_size: int, args) -> dict:
+    """Extract all frames at one batch size and return the measurements."""
+    server = BillingServer(args.latency, args.prompt_rate, args.output_rate).start()
+    try:
+        client = AzureOpenAI(api_key="benchmark", api_version="2024-12-01-preview", azure_endpoint=server.url,
+                             max_retries=0)
+        start = time.perf_counter()
+        results = extract_frames.extract_all(client, frames, "benchmark", args.concurrency, progress=False,
+                                             preprocessor=extract_frames.ImagePreprocessor(),
+                                             batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop()
+    assert all(result == ANSWER for result in results), "answers were not split back to their frames"
+    cost = (server.prompt_tokens * args.input_price + server.completion_tokens * args.output_price) / 1e6
+    return {
+        "requests": len(server.requests),
+        "seconds": elapsed,
+        "prompt_tokens": server.prompt_tokens,
+        "completion_tokens": server.completion_tokens,
+        "cost": cost,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare frames per request in extract_frames.py")
+    parser.add_argument("--frames", type=int, default=48, help="Frames to extract (default: 48)")
+    parser.add_argument("--max-batch", type=int, default=8, help="Largest batch size tried (default: 8)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in parallel (default: 4)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fixed seconds per request (default: 0.5)")
+    parser.add_argument("--prompt-rate", type=float, default=20000, help="Prompt tokens per second (default: 20000)")
+    parser.add_argument("--output-rate", type=float, default=150, help="Generated tokens per second (default: 150)")
+    parser.add_argument("--input-price", type=float, default=0.40, help="$ per million prompt tokens (default: 0.40)")
+    parser.add_argument("--output-price", type=float, default=1.60, help="$ per million generated tokens (default: 1.60)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        frames = make_frames(Path(directory), args.frames)
+        print(f"{'K':>2} {'requests':>8} {'seconds':>8} {'frames/s':>9} {'prompt tok':>11} {'output tok':>11} "
+              f"{'$ / 1000 frames':>16}")
+        for batch_size in range(1, args.max_batch + 1):
+            m = run(frames, batch_size, args)
+            print(f"{batch_size:>2} {m['requests']:>8} {m['seconds']:>8.2f} {len(frames) / m['seconds']:>9.1f} "
+                  f"{m['prompt_tokens']:>11} {m['completion_tokens']:>11} {m['cost'] * 1000 / len(frames):>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Measure startup latency of the claude, context and tickets CLIs.
+
+Each subcommand is timed through its wrapper (./claude, ./context,
+./tickets: the venv interpreter, or prophetd when it is running) and
+through `uv run python main.py`, the previous way the wrappers started.
+
+Cold is the first run with an empty bytecode cache (every module is
+compiled, as after an install or upgrade). Warm is the median of
+--repeat runs afterwards. The OS page cache is not dropped.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 20 --mode wrapper
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Read-only subcommands, per CLI
+COMMANDS = [
+    ("claude", ["--help"]),
+    ("claude", ["list"]),
+    ("context", ["list-roles"]),
+    ("context", ["show", "worker"]),
+    ("tickets", ["--help"]),
+    ("tickets", ["list"]),
+    ("tickets", ["stats"]),
+]
+
+
+def command_line(cli: str, args: list[str], mode: str) -> tuple[list[str], Path]:
+    """Return the argv and working directory to start a subcommand in a mode."""
+    if mode == "uv":
+        return ["uv", "run", "python", "main.py", *args], PROJECT_ROOT / f"{cli}-cli"
+    return [str(PROJECT_ROOT / cli), *args], PROJECT_ROOT
+
+
+def time_run(argv: list[str], cwd: Path, env: dict | None = None) -> float:
+    """Run a command to completion and return its wall time in milliseconds."""
+    start = time.perf_counter()
+    subprocess.run(argv, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(cli: str, args: list[str], mode: str, repeat: int) -> tuple[float, float, float]:
+    """Return (cold, warm median, warm min) milliseconds for a subcommand."""
+    argv, cwd = command_line(cli, args, mode)
+    with tempfile.TemporaryDirectory() as cache:
+        cold = time_run(argv, cwd, {**os.environ, "PYTHONPYCACHEPREFIX": cache})
+    time_run(argv, cwd)  # Make sure the regular bytecode cache is populated
+    warm = [time_run(argv, cwd) for _ in range(repeat)]
+    return cold, statistics.median(warm), min(warm)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI startup latency")
+    parser.add_argument("--repeat", "-n", type=int, default=10, help="Warm runs per subcommand (default: 10)")
+    parser.add_argument("--mode", choices=["wrapper", "uv", "all"], default="all",
+                        help="Start through the wrappers, through `uv run`, or both (default: all)")
+    args = parser.parse_args()
+
+    modes = ["wrapper", "uv"] if args.mode == "all" else [args.mode]
+    print(f"{'command':<28} {'mode':<8} {'cold ms':>8} {'warm ms':>8} {'min ms':>8}")
+    for cli, cli_args in COMMANDS:
+        for mode in modes:
+            cold, warm, fastest = measure(cli, cli_args, mode, args.repeat)
+            name = f"{cli} {' '.join(cli_args)}"
+            print(f"{name:<28} {mode:<8} {cold:>8.0f} {warm:>8.0f} {fastest:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
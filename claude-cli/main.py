@@ -5,31 +5,111 @@ Claude CLI - Spawn and manage Claude workers in tmux sessions.
 Usage:
     uv run python main.py spawn "Your prompt here"
     uv run python main.py spawn --name my-worker "Your prompt"
+    uv run python main.py spawn-batch workers.yaml
     uv run python main.py capture my-worker --lines 50
     uv run python main.py list
     uv run python main.py kill my-worker
     uv run python main.py kill-all
+    uv run python main.py signal post "Question for Prophet" --wait
+    uv run python main.py signal respond my-worker "Answer"
 """
 
+import atexit
+import os
+import re
+import shlex
 import subprocess
+import sys
 import time
-import uuid
 from pathlib import Path
 
 import click
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LOGS_DIR = PROJECT_ROOT / "logs"
+
+# Make the shared mcbs package importable
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from mcbs.tmux import ControlClient, ControlModeError  # noqa: E402
+
+# Pane markers used to detect Claude Code's state from capture-pane output
+READY_MARKERS = ("? for shortcuts", "bypass permissions on", "│ >")
+BUSY_MARKERS = ("esc to interrupt",)
+
+# One list-sessions call returns everything `list` needs (tab-separated)
+SESSION_INFO_FORMAT = "\t".join([
+    "#{session_name}",
+    "#{session_created}",
+    "#{session_activity}",
+    "#{pane_pid}",
+    "#{pane_current_command}",
+    "#{session_attached}",
+])
+
+# tmux user option recording the hash of the role bundle a worker was given
+BUNDLE_OPTION = "@mcbs_bundle"
+
+# CSI, OSC and other escape sequences stripped from pipe-pane logs
+ANSI_ESCAPE = re.compile(rb"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+
+DEFAULT_READY_TIMEOUT = 30.0
+# Below the 2 minute default timeout of Claude Code's Bash tool
+DEFAULT_SIGNAL_TIMEOUT = 100.0
+POLL_INITIAL_DELAY = 0.1
+POLL_MAX_DELAY = 1.0
+
+# Prompt delivery: typed with send-keys, or pasted from a tmux buffer
+# (bracketed paste). "auto" pastes multi-line or long prompts.
+DELIVERY_MODES = ("auto", "paste", "keys")
+PASTE_THRESHOLD = 200
+PASTE_TIMEOUT = 5.0
+# Claude Code collapses large pastes into a placeholder like this
+PASTE_MARKER = "[Pasted text"
+PASTE_PROBE_CHARS = 20
+
+
+# Control-mode connection, set up by the --tmux-control group option
+_control_client = None
+
+
+def enable_control_mode():
+    """Route tmux commands through a persistent control-mode connection."""
+    global _control_client
+    if _control_client is not None:
+        return
+    try:
+        _control_client = ControlClient()
+    except ControlModeError as e:
+        click.echo(f"Warning: {e}, using one tmux process per command", err=True)
+        return
+    atexit.register(_control_client.close)
+
 
 def run_tmux(*args: str) -> subprocess.CompletedProcess:
     """Execute a tmux command and return the result."""
-    return subprocess.run(
-        ["tmux", *args],
-        capture_output=True,
-        text=True,
-    )
+    return run_tmux_many([args])[0]
+
+
+def run_tmux_many(commands: list[tuple[str, ...]]) -> list[subprocess.CompletedProcess]:
+    """Execute several tmux commands, pipelined when in control mode."""
+    global _control_client
+    if _control_client is not None:
+        try:
+            return _control_client.run_many(commands)
+        except ControlModeError as e:
+            click.echo(f"Warning: {e}, using one tmux process per command", err=True)
+            _control_client = None
+    return [
+        subprocess.run(["tmux", *args], capture_output=True, text=True)
+        for args in commands
+    ]
 
 
 def generate_session_name() -> str:
     """Generate a unique session name."""
+    import uuid
+
     return f"claude-{uuid.uuid4().hex[:8]}"
 
 
@@ -47,29 +127,481 @@ def get_claude_sessions() -> list[str]:
     return [s for s in result.stdout.strip().split("\n") if s.startswith("claude-")]
 
 
-def get_role_context(role: str) -> str | None:
-    """Get context from context-cli for a given role."""
-    context_cli_path = Path(__file__).parent.parent / "context-cli"
+def get_session_info() -> list[dict]:
+    """Get details for all Claude worker sessions in a single tmux call."""
+    fields = ["name", "created", "activity", "pane_pid", "command", "attached"]
+    result = run_tmux("list-sessions", "-F", SESSION_INFO_FORMAT)
+    if result.returncode != 0:
+        return []
+
+    sessions = []
+    for line in result.stdout.splitlines():
+        values = line.split("\t")
+        if len(values) != len(fields) or not values[0].startswith("claude-"):
+            continue
+        info = dict(zip(fields, values))
+        for key in ("created", "activity", "pane_pid", "attached"):
+            info[key] = int(info[key]) if info[key].isdigit() else None
+        info["attached"] = bool(info["attached"])
+        sessions.append(info)
+    return sessions
+
+
+def format_session_info(info: dict, now: float) -> str:
+    """Format one session's details for display."""
+    created = time.strftime("%a %b %d %H:%M:%S %Y", time.localtime(info["created"])) if info["created"] else "?"
+    idle = f"{int(now - info['activity'])}s" if info["activity"] else "?"
+    line = f"{info['name']}: created {created}, idle {idle}, {info['command']} (pid {info['pane_pid']})"
+    if info["attached"]:
+        line += ", attached"
+    return line
+
+
+def session_log_path(session: str) -> Path:
+    """Return the path of a session's output log."""
+    return LOGS_DIR / f"{session}.log"
+
+
+def start_output_log(session: str) -> Path:
+    """Pipe a session's output into its append-only log, unless it already is."""
+    LOGS_DIR.mkdir(exist_ok=True)
+    path = session_log_path(session)
+    # pipe-pane toggles (-o only opens a pipe if none is open, or closes it), so check first
+    result = run_tmux("display-message", "-p", "-t", session, "#{pane_pipe}")
+    if result.returncode == 0 and result.stdout.strip() == "0":
+        run_tmux("pipe-pane", "-o", "-t", session, f"cat >> {shlex.quote(str(path))}")
+    return path
+
+
+def remove_output_log(session: str):
+    """Delete a killed session's log, so offsets never point into a stale file."""
+    session_log_path(session).unlink(missing_ok=True)
+
+
+def read_log(path: Path, offset: int, raw: bool = False) -> tuple[str, int]:
+    """Read the complete lines written to a log after a byte offset.
+
+    A trailing partial line is left for the next read, so offsets never
+    split a line (or a multi-byte character).
+
+    Returns:
+        The text read and the offset to continue from.
+    """
+    if not path.exists():
+        return "", offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    chunk = data[:end]
+    if not raw:
+        chunk = ANSI_ESCAPE.sub(b"", chunk).replace(b"\r", b"")
+    return chunk.decode("utf-8", errors="replace"), offset + end
+
+
+def capture_pane(session: str) -> str | None:
+    """Return the visible pane content of a session, or None if it is gone."""
+    # -J joins wrapped lines, so text is found wherever the pane wrapped it
+    result = run_tmux("capture-pane", "-t", session, "-p", "-J")
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def is_busy(content: str) -> bool:
+    """Check if Claude is processing a prompt."""
+    return any(marker in content for marker in BUSY_MARKERS)
+
+
+def is_ready(content: str) -> bool:
+    """Check if Claude shows an idle input prompt."""
+    return not is_busy(content) and any(marker in content for marker in READY_MARKERS)
+
+
+def wait_for_pane(session: str, predicate, timeout: float) -> bool:
+    """Poll a pane until predicate(content) is true.
+
+    Polls start fast and back off exponentially up to POLL_MAX_DELAY,
+    so a quick worker is detected quickly and a slow one isn't hammered.
+
+    Returns:
+        True if the predicate matched, False on timeout or if the session died.
+    """
+    deadline = time.monotonic() + timeout
+    delay = POLL_INITIAL_DELAY
+    while True:
+        content = capture_pane(session)
+        if content is None:
+            return False
+        if predicate(content):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, POLL_MAX_DELAY)
+
+
+def settled(predicate=None):
+    """Build a predicate that matches once the pane stops changing.
+
+    The pane must be identical on two consecutive polls (and satisfy
+    predicate, if given), which filters out startup animations and
+    half-rendered input.
+    """
+    previous = None
+
+    def check(content: str) -> bool:
+        nonlocal previous
+        stable = content == previous
+        previous = content
+        return stable and (predicate is None or predicate(content))
+
+    return check
+
+
+def wait_until_ready(session: str, timeout: float = DEFAULT_READY_TIMEOUT) -> bool:
+    """Wait until Claude in a session is ready to accept input."""
+    return wait_for_pane(session, settled(is_ready), timeout)
+
+
+def delivery_mode(text: str, mode: str) -> str:
+    """Resolve "auto" to "paste" or "keys" for a text."""
+    if mode == "auto":
+        return "paste" if "\n" in text or len(text) > PASTE_THRESHOLD else "keys"
+    return mode
+
+
+def shows_paste(text: str, before: str | None):
+    """Build a predicate matching a pane that shows text was pasted.
+
+    The pane must have changed since before and show either Claude Code's
+    placeholder for large pastes or the end of the text itself.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    probe = lines[-1][-PASTE_PROBE_CHARS:] if lines else ""
+
+    def check(content: str) -> bool:
+        return content != before and (PASTE_MARKER in content or bool(probe) and probe in content)
+
+    return check
+
+
+def paste_prompt(session: str, text: str) -> bool:
+    """Paste text into a session's input from a tmux buffer and submit it.
+
+    The text goes through a temporary file and load-buffer, then
+    paste-buffer -p (bracketed paste, so newlines and special characters
+    arrive verbatim in a single write). Enter is sent once the pane shows
+    the paste, and again if Claude hasn't started working by then.
+
+    Returns:
+        True if the pane confirmed the paste, False if it never showed up.
+    """
+    import tempfile
+
+    buffer = f"mcbs-{session}"
+    before = capture_pane(session)
+    fd, path = tempfile.mkstemp(prefix="mcbs-prompt-", suffix=".txt")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        load, paste = run_tmux_many([
+            ("load-buffer", "-b", buffer, path),
+            ("paste-buffer", "-d", "-p", "-b", buffer, "-t", session),
+        ])
+    finally:
+        os.unlink(path)
+    if load.returncode != 0 or paste.returncode != 0:
+        return False
+
+    delivered = wait_for_pane(session, shows_paste(text, before), PASTE_TIMEOUT)
+    run_tmux("send-keys", "-t", session, "Enter")
+    if delivered and not wait_for_pane(session, is_busy, PASTE_TIMEOUT):
+        content = capture_pane(session)
+        if content is not None and shows_paste(text, None)(content):
+            run_tmux("send-keys", "-t", session, "Enter")
+    return delivered
+
+
+def type_prompt(session: str, text: str):
+    """Type text into a session's input with send-keys and submit it."""
+    run_tmux("send-keys", "-t", session, text, "Enter")
+    # Long prompts are treated as a paste and swallow the Enter; once the
+    # input has settled, confirm it unless Claude already started working
+    wait_for_pane(session, settled(), timeout=5)
+    content = capture_pane(session)
+    if content is not None and not is_busy(content):
+        run_tmux("send-keys", "-t", session, "Enter")
+
+
+def get_role_bundle(role: str, budget: int | None = None) -> dict | None:
+    """Get the compiled context bundle for a given role.
+
+    Renders in process via the shared mcbs library, falling back to
+    running context-cli if it can't be imported (e.g. PyYAML missing).
+    With a token budget, low priority directives are dropped to fit.
+
+    Returns:
+        The bundle ("text", "hash", ...), or None if the role can't be loaded.
+    """
+    try:
+        from mcbs.context import ContextError, role_bundle
+    except ImportError:
+        return get_role_bundle_subprocess(role, budget)
+
+    try:
+        return role_bundle(role, budget=budget)
+    except ImportError:
+        # PyYAML is only imported when a role has to be (re)parsed
+        return get_role_bundle_subprocess(role, budget)
+    except ContextError:
+        return None
+
+
+def get_role_bundle_subprocess(role: str, budget: int | None = None) -> dict | None:
+    """Get a role's bundle from context-cli."""
+    context_cli_path = PROJECT_ROOT / "context-cli"
     if not context_cli_path.exists():
         return None
 
+    budget_args = ["--budget", str(budget)] if budget is not None else []
     result = subprocess.run(
-        ["uv", "run", "python", "main.py", "show", role],
+        ["uv", "run", "python", "main.py", "bundle", role, "--json", *budget_args],
         capture_output=True,
         text=True,
         cwd=context_cli_path,
     )
 
     if result.returncode == 0:
-        return result.stdout.strip()
+        import json
+
+        return json.loads(result.stdout)
     return None
 
 
+def get_session_bundle(session: str) -> str | None:
+    """Return the hash of the role bundle a session was given, if any."""
+    result = run_tmux("show-options", "-q", "-v", "-t", session, BUNDLE_OPTION)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def set_session_bundle(session: str, bundle_hash: str):
+    """Record that a session has been given a role bundle."""
+    run_tmux("set-option", "-t", session, BUNDLE_OPTION, bundle_hash)
+
+
+def session_name_for(name: str | None) -> str:
+    """Return the tmux session name for a worker (claude- prefixed)."""
+    if name:
+        return name if name.startswith("claude-") else f"claude-{name}"
+    return generate_session_name()
+
+
+def build_prompt(prompt: str, context: str | None, ticket: str | None) -> str:
+    """Combine role context, task and ticket instructions into one prompt."""
+    full_prompt = prompt
+    if context:
+        full_prompt = f"{context}\n\n---\n\nTASK:\n{prompt}"
+    if ticket:
+        full_prompt += f"\n\n---\n\nTICKET ID: {ticket}\nWhen done, run: ./tickets update {ticket} --status done"
+    return full_prompt
+
+
+def assign_ticket(ticket: str, session: str) -> bool:
+    """Assign a ticket to a worker session (in process via mcbs.tickets)."""
+    from mcbs.tickets import TicketError, assign_ticket as assign
+
+    try:
+        assign(ticket, session)
+    except TicketError:
+        return False
+    return True
+
+
+def assign_tickets(assignments: list[tuple[str, str]]) -> list[str | None]:
+    """Assign several (ticket, session) pairs in one store batch.
+
+    Returns:
+        None for each assignment that succeeded, else its error message.
+    """
+    import json
+
+    from mcbs.tickets import run_batch
+
+    lines = [json.dumps({"op": "assign", "id": ticket, "worker": session}) for ticket, session in assignments]
+    try:
+        results = run_batch(lines)
+    except Exception as e:
+        return [str(e)] * len(assignments)
+    return [None if result["ok"] else result["error"] for result in results]
+
+
+def current_session() -> str | None:
+    """Return the tmux session this process runs in, if any."""
+    pane = os.environ.get("TMUX_PANE")
+    if not pane:
+        return None
+    # Targeting the pane keeps this right in control mode, whose client
+    # is attached to its own session
+    result = run_tmux("display-message", "-p", "-t", pane, "#S")
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def update_waiting_ticket(ticket: str, status: str, comment: str):
+    """Move a ticket to a status and comment on it, warning on failure."""
+    from mcbs.tickets import TicketError, add_comment, update_ticket
+
+    try:
+        update_ticket(ticket, status=status)
+        add_comment(ticket, comment)
+    except TicketError as e:
+        click.echo(f"Warning: could not update ticket {ticket}: {e}", err=True)
+
+
+def resolve_session(session: str | None) -> str:
+    """Default to the current tmux session, or fail."""
+    session = session or current_session()
+    if not session:
+        raise click.ClickException("Not inside tmux: pass --session")
+    return session
+
+
+def wait_for_response(session: str, timeout: float):
+    """Block for a session's response and print it (exit 1 on timeout)."""
+    from mcbs import signals
+
+    reply = signals.wait(session, timeout)
+    if reply is None:
+        click.echo(f"No response after {timeout:g}s, run `signal wait` again to keep waiting", err=True)
+        raise SystemExit(1)
+    click.echo(f"Response from {reply.get('from', 'prophet')}:")
+    click.echo(reply["response"])
+
+
+def create_session(session: str) -> subprocess.CompletedProcess:
+    """Create a detached tmux session running Claude, logging its output."""
+    # Skip permissions for autonomy, and start in project root so
+    # ./tickets and other CLIs are accessible
+    args = ["new-session", "-d", "-s", session, "-c", str(PROJECT_ROOT)]
+    if _control_client is not None:
+        # Unlike a command-line tmux client, a control client's environment
+        # isn't copied into new sessions, so pass it explicitly
+        for key, value in os.environ.items():
+            if not key.startswith("TMUX"):
+                args += ["-e", f"{key}={value}"]
+    result = run_tmux(*args, "claude --dangerously-skip-permissions")
+    if result.returncode == 0:
+        start_output_log(session)
+    return result
+
+
+def start_worker(
+    session: str,
+    prompt: str,
+    full_prompt: str,
+    skills: tuple[str, ...] = (),
+    ralph: bool = False,
+    ready_timeout: float = DEFAULT_READY_TIMEOUT,
+    echo=click.echo,
+    delivery: str = "auto",
+) -> bool:
+    """Wait for Claude in a new session to be ready, then send its task.
+
+    Returns:
+        False if the session exited during startup, True otherwise.
+    """
+    # Wait for Claude to initialize (poll the pane instead of a fixed delay)
+    started = time.monotonic()
+    if wait_until_ready(session, ready_timeout):
+        echo(f"Claude ready after {time.monotonic() - started:.1f}s")
+    elif not session_exists(session):
+        echo(f"Error: Session '{session}' exited during startup", err=True)
+        return False
+    else:
+        echo(f"Warning: Claude not ready after {ready_timeout:.0f}s, sending prompt anyway", err=True)
+
+    # Send the prompt (or ralph-loop command if --ralph)
+    if ralph:
+        # Use Ralph Loop for autonomous execution
+        ralph_cmd = f"/ralph-loop:ralph-loop {prompt}"
+        echo("Ralph Loop mode enabled")
+        run_tmux("send-keys", "-t", session, ralph_cmd, "Enter")
+    elif delivery_mode(full_prompt, delivery) == "paste":
+        if not paste_prompt(session, full_prompt):
+            echo("Warning: could not confirm the prompt was pasted", err=True)
+    else:
+        type_prompt(session, full_prompt)
+
+    # Send skills if specified (once Claude has started processing the prompt)
+    if skills:
+        echo(f"Skills to activate: {', '.join(skills)}")
+        wait_for_pane(session, is_busy, ready_timeout)
+        for s in skills:
+            # Normalize skill name (add / prefix if missing)
+            skill_cmd = s if s.startswith("/") else f"/{s}"
+            run_tmux("send-keys", "-t", session, skill_cmd, "Enter")
+            echo(f"  Sent skill: {skill_cmd}")
+            # Let the input echo before queueing the next skill
+            wait_for_pane(session, settled(), timeout=2)
+
+    return True
+
+
+def load_manifest(path: Path) -> list[dict]:
+    """Load a spawn-batch manifest (YAML list or JSONL, one worker per entry)."""
+    text = path.read_text(encoding="utf-8")
+    if path.suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise click.ClickException("PyYAML is required for YAML manifests (or use JSONL)")
+        data = yaml.safe_load(text) or []
+        if isinstance(data, dict):
+            data = data.get("workers", [])
+    else:
+        import json
+
+        data = []
+        for lineno, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                data.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise click.ClickException(f"{path}:{lineno}: invalid JSON: {e.msg}")
+
+    entries = []
+    for i, entry in enumerate(data, 1):
+        if not isinstance(entry, dict) or not entry.get("prompt"):
+            raise click.ClickException(f"Manifest entry {i} must be a mapping with a 'prompt'")
+        skills = entry.get("skills", entry.get("skill", []))
+        if isinstance(skills, str):
+            skills = [skills]
+        entries.append({
+            "prompt": entry["prompt"],
+            "name": entry.get("name"),
+            "role": entry.get("role"),
+            "ticket": entry.get("ticket"),
+            "context_budget": entry.get("context_budget"),
+            "skills": tuple(skills),
+            "ralph": bool(entry.get("ralph", False)),
+        })
+    return entries
+
+
 @click.group()
 @click.version_option(version="0.1.0")
-def cli():
+@click.option("--tmux-control", is_flag=True, envvar="CLAUDE_TMUX_CONTROL",
+              help="Send all tmux commands over one control-mode (tmux -C) connection")
+def cli(tmux_control: bool):
     """Claude CLI - Spawn and manage Claude workers in tmux sessions."""
-    pass
+    if tmux_control:
+        enable_control_mode()
 
 
 @cli.command()
@@ -77,9 +609,16 @@ def cli():
 @click.option("--name", "-n", default=None, help="Session name (auto-generated if not provided)")
 @click.option("--role", "-r", default=None, help="Role to apply from context-cli")
 @click.option("--ticket", "-t", default=None, help="Ticket ID to associate with this worker")
+@click.option("--context-budget", type=int, default=None,
+              help="Token budget for the role context (drops low priority directives)")
 @click.option("--skill", "-s", multiple=True, help="Skill(s) to run after prompt (repeatable)")
 @click.option("--ralph", is_flag=True, help="Run with Ralph Loop for autonomous execution")
-def spawn(prompt: str, name: str | None, role: str | None, ticket: str | None, skill: tuple[str, ...], ralph: bool):
+@click.option("--ready-timeout", default=DEFAULT_READY_TIMEOUT, show_default=True,
+              help="Max seconds to wait for Claude to be ready")
+@click.option("--delivery", type=click.Choice(DELIVERY_MODES), default="auto", show_default=True,
+              help="Paste the prompt from a tmux buffer, type it with send-keys, or paste only long prompts")
+def spawn(prompt: str, name: str | None, role: str | None, ticket: str | None, context_budget: int | None,
+          skill: tuple[str, ...], ralph: bool, ready_timeout: float, delivery: str):
     """Spawn a Claude worker in a new tmux session.
 
     PROMPT is the task to give to the worker.
@@ -89,15 +628,14 @@ def spawn(prompt: str, name: str | None, role: str | None, ticket: str | None, s
         spawn --name fib-worker "Implement fibonacci"
         spawn --role worker "Fix the bug in auth.py"
         spawn --role worker --ticket abc123 "Implement feature"
+        spawn --role worker --context-budget 1500 "Small task"
         spawn --ralph "Long autonomous task"
         spawn --ralph --role worker --ticket abc123 "Complex feature"
         spawn --skill bmad:dev-story "Workflow-driven task"
+        spawn --ready-timeout 60 "Task on a loaded machine"
     """
     # Generate session name with claude- prefix
-    if name:
-        session = name if name.startswith("claude-") else f"claude-{name}"
-    else:
-        session = generate_session_name()
+    session = session_name_for(name)
 
     # Check if session already exists
     if session_exists(session):
@@ -106,124 +644,248 @@ def spawn(prompt: str, name: str | None, role: str | None, ticket: str | None, s
         raise SystemExit(1)
 
     # Build the full prompt with role context if provided
-    full_prompt = prompt
+    bundle = None
     if role:
-        context = get_role_context(role)
-        if context:
-            full_prompt = f"{context}\n\n---\n\nTASK:\n{prompt}"
-            click.echo(f"Applied role: {role}")
+        bundle = get_role_bundle(role, context_budget)
+        if bundle:
+            click.echo(f"Applied role: {role} (bundle {bundle['hash']}, ~{bundle['tokens']} tokens)")
+            if bundle.get("dropped"):
+                click.echo(f"Dropped for the context budget: {', '.join(bundle['dropped'])}")
         else:
             click.echo(f"Warning: Could not load role '{role}'", err=True)
 
     # Add ticket info to the prompt if provided
+    full_prompt = build_prompt(prompt, bundle and bundle["text"].strip(), ticket)
     if ticket:
-        full_prompt += f"\n\n---\n\nTICKET ID: {ticket}\nWhen done, run: ./tickets update {ticket} --status done"
         click.echo(f"Linked ticket: {ticket}")
         # Update ticket status to in-progress
-        tickets_cli_path = Path(__file__).parent.parent / "tickets-cli"
-        if tickets_cli_path.exists():
-            subprocess.run(
-                ["uv", "run", "python", "main.py", "assign", ticket, session],
-                cwd=tickets_cli_path,
-                capture_output=True,
-            )
+        if not assign_ticket(ticket, session):
+            click.echo(f"Warning: Could not assign ticket '{ticket}'", err=True)
 
-    # Create tmux session with claude (skip permissions for autonomy)
-    # Start in project root so ./tickets and other CLIs are accessible
-    project_root = str(Path(__file__).parent.parent)
-    result = run_tmux("new-session", "-d", "-s", session, "-c", project_root, "claude --dangerously-skip-permissions")
+    result = create_session(session)
     if result.returncode != 0:
         click.echo(f"Error creating session: {result.stderr}", err=True)
         raise SystemExit(1)
+    if bundle:
+        set_session_bundle(session, bundle["hash"])
 
-    # Wait for Claude to initialize (needs time to load)
     click.echo(f"Starting Claude in session '{session}'...")
-    time.sleep(5)
-
-    # Send the prompt (or ralph-loop command if --ralph)
-    if ralph:
-        # Use Ralph Loop for autonomous execution
-        ralph_cmd = f"/ralph-loop:ralph-loop {prompt}"
-        click.echo("Ralph Loop mode enabled")
-        run_tmux("send-keys", "-t", session, ralph_cmd, "Enter")
-    else:
-        run_tmux("send-keys", "-t", session, full_prompt, "Enter")
-        # Send extra Enter to confirm paste (workaround for Claude Code paste behavior)
-        time.sleep(1)
-        run_tmux("send-keys", "-t", session, "Enter")
-
-    # Send skills if specified (after a delay for Claude to start processing)
-    if skill:
-        click.echo(f"Skills to activate: {', '.join(skill)}")
-        time.sleep(3)  # Wait for Claude to start processing
-        for s in skill:
-            # Normalize skill name (add / prefix if missing)
-            skill_cmd = s if s.startswith("/") else f"/{s}"
-            run_tmux("send-keys", "-t", session, skill_cmd, "Enter")
-            click.echo(f"  Sent skill: {skill_cmd}")
-            time.sleep(1)
+    if not start_worker(session, prompt, full_prompt, skill, ralph, ready_timeout, delivery=delivery):
+        raise SystemExit(1)
 
     click.echo(f"Spawned worker: {session}")
     click.echo(f"Attach with: tmux attach -t {session}")
     click.echo(f"Capture with: uv run python main.py capture {session}")
 
 
+@cli.command("spawn-batch")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--parallel", "-p", default=0, help="Max workers started concurrently (default: all)")
+@click.option("--ready-timeout", default=DEFAULT_READY_TIMEOUT, show_default=True,
+              help="Max seconds to wait for each Claude to be ready")
+@click.option("--delivery", type=click.Choice(DELIVERY_MODES), default="auto", show_default=True,
+              help="Paste the prompt from a tmux buffer, type it with send-keys, or paste only long prompts")
+def spawn_batch(manifest: Path, parallel: int, ready_timeout: float, delivery: str):
+    """Spawn a fleet of workers from a manifest.
+
+    MANIFEST is a YAML list (or a mapping with a 'workers' list) or a JSONL
+    file. Each entry takes the same fields as spawn: prompt (required),
+    name, role, ticket, context_budget, skills and ralph.
+
+    All tmux sessions are created up front, then readiness waits and prompt
+    delivery run concurrently, so N workers start in about the time of one.
+
+    Examples:
+        spawn-batch workers.yaml
+        spawn-batch workers.jsonl --parallel 8
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    entries = load_manifest(manifest)
+    if not entries:
+        click.echo("No workers in manifest")
+        return
+
+    # Resolve and check all session names before starting anything
+    existing = set(get_claude_sessions())
+    seen = set()
+    for entry in entries:
+        entry["session"] = session_name_for(entry["name"])
+        if entry["session"] in existing or entry["session"] in seen:
+            raise click.ClickException(f"Session '{entry['session']}' already exists or is duplicated")
+        seen.add(entry["session"])
+
+    # Build prompts, loading each role's bundle only once
+    bundles = {}
+    for entry in entries:
+        key = (entry["role"], entry["context_budget"])
+        if entry["role"] and key not in bundles:
+            bundles[key] = get_role_bundle(*key)
+            if not bundles[key]:
+                click.echo(f"Warning: Could not load role '{entry['role']}'", err=True)
+        entry["bundle"] = bundles.get(key)
+        context = entry["bundle"] and entry["bundle"]["text"].strip()
+        entry["full_prompt"] = build_prompt(entry["prompt"], context, entry["ticket"])
+
+    # Create every session up front so the Claudes boot in parallel
+    started = []
+    for entry in entries:
+        result = create_session(entry["session"])
+        if result.returncode != 0:
+            click.echo(f"Error creating session '{entry['session']}': {result.stderr.strip()}", err=True)
+            continue
+        if entry["bundle"]:
+            set_session_bundle(entry["session"], entry["bundle"]["hash"])
+        started.append(entry)
+
+    # Assign tickets here, serially, rather than from the launch threads
+    linked = [entry for entry in started if entry["ticket"]]
+    for entry, error in zip(linked, assign_tickets([(entry["ticket"], entry["session"]) for entry in linked])):
+        if error:
+            click.echo(f"[{entry['session']}] Warning: Could not assign ticket '{entry['ticket']}': {error}", err=True)
+        else:
+            click.echo(f"[{entry['session']}] Linked ticket: {entry['ticket']}")
+    click.echo(f"Starting {len(started)} worker(s)...")
+
+    def launch(entry: dict) -> bool:
+        session = entry["session"]
+
+        def echo(message: str, err: bool = False):
+            click.echo(f"[{session}] {message}", err=err)
+
+        try:
+            return start_worker(
+                session, entry["prompt"], entry["full_prompt"], entry["skills"], entry["ralph"], ready_timeout, echo,
+                delivery,
+            )
+        except Exception as e:
+            # One worker failing mustn't abort the others
+            echo(f"Error: {e}", err=True)
+            return False
+
+    batch_start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=parallel or len(started) or 1) as pool:
+        results = list(pool.map(launch, started))
+
+    ok = sum(results)
+    click.echo(f"Spawned {ok}/{len(entries)} worker(s) in {time.monotonic() - batch_start:.1f}s")
+    for entry, success in zip(started, results):
+        if success:
+            click.echo(f"  - {entry['session']}")
+    if ok < len(entries):
+        raise SystemExit(1)
+
+
 @cli.command()
 @click.argument("session")
 @click.option("--lines", "-l", default=30, help="Number of lines to capture (default: 30)")
-def capture(session: str, lines: int):
+@click.option("--follow", "-f", is_flag=True, help="Stream new output until the session ends or Ctrl-C")
+@click.option("--since", type=int, default=None, help="Print only log output after this byte offset")
+@click.option("--raw", is_flag=True, help="Keep terminal escape sequences in log output")
+def capture(session: str, lines: int, follow: bool, since: int | None, raw: bool):
     """Capture output from a worker session.
 
     SESSION is the name of the tmux session to capture from.
 
+    With --since or --follow, output is read from the session's append-only
+    log (written via pipe-pane) instead of re-capturing the whole screen.
+    --since prints the new offset on stderr as "Offset: N", to pass back
+    on the next call.
+
     Examples:
         capture my-worker
         capture my-worker --lines 100
+        capture my-worker --follow
+        capture my-worker --since 0
     """
     if not session_exists(session):
         click.echo(f"Error: Session '{session}' not found", err=True)
         click.echo("Use 'list' to see active sessions", err=True)
         raise SystemExit(1)
 
-    # Capture the pane content
-    result = run_tmux("capture-pane", "-t", session, "-p")
-    if result.returncode != 0:
-        click.echo(f"Error capturing session: {result.stderr}", err=True)
-        raise SystemExit(1)
+    # Only --since and --follow read the log, so only they start it
+    log_path = start_output_log(session) if since is not None or follow else None
+
+    if since is not None:
+        text, offset = read_log(log_path, since, raw)
+        click.echo(text, nl=False)
+        if not follow:
+            click.echo(f"Offset: {offset}", err=True)
+            return
+    else:
+        # Capture the pane content, including scrollback
+        result = run_tmux("capture-pane", "-t", session, "-p", "-S", f"-{lines}")
+        if result.returncode != 0:
+            click.echo(f"Error capturing session: {result.stderr}", err=True)
+            raise SystemExit(1)
+
+        # Get the last N lines
+        output_lines = result.stdout.strip().split("\n")
+        for line in output_lines[-lines:]:
+            click.echo(line)
+        if not follow:
+            return
+        offset = log_path.stat().st_size if log_path.exists() else 0
 
-    # Get the last N lines
-    output_lines = result.stdout.strip().split("\n")
-    for line in output_lines[-lines:]:
-        click.echo(line)
+    # Stream new log output, backing off while the worker is quiet
+    delay = POLL_INITIAL_DELAY
+    last_check = time.monotonic()
+    try:
+        while True:
+            text, offset = read_log(log_path, offset, raw)
+            if text:
+                click.echo(text, nl=False)
+                delay = POLL_INITIAL_DELAY
+                continue
+            if time.monotonic() - last_check > 2:
+                if not session_exists(session):
+                    click.echo(f"Session '{session}' ended", err=True)
+                    return
+                last_check = time.monotonic()
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX_DELAY)
+    except KeyboardInterrupt:
+        pass
 
 
 @cli.command("list")
-def list_sessions():
+@click.option("--json", "as_json", is_flag=True, help="Output session details as JSON")
+@click.option("--watch", "-w", is_flag=True, help="Refresh continuously until interrupted")
+@click.option("--interval", "-i", default=2.0, show_default=True, help="Refresh interval for --watch (seconds)")
+def list_sessions(as_json: bool, watch: bool, interval: float):
     """List all active Claude worker sessions.
 
-    Shows session name and basic info for all sessions
-    starting with 'claude-'.
+    Shows name, creation time, idle time, running command and pane PID
+    for all sessions starting with 'claude-', using a single tmux query.
+
+    Examples:
+        list
+        list --json
+        list --watch --interval 5
     """
-    sessions = get_claude_sessions()
+    import json
 
-    if not sessions:
-        click.echo("No active workers")
-        return
+    try:
+        while True:
+            sessions = get_session_info()
 
-    click.echo("Active workers:")
-    for session in sessions:
-        # Get session info
-        result = run_tmux(
-            "list-sessions",
-            "-F",
-            "#{session_name}: created #{session_created_string}",
-            "-f",
-            f"#{{==:#{{session_name}},{session}}}",
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            click.echo(f"  - {result.stdout.strip()}")
-        else:
-            click.echo(f"  - {session}")
+            if watch:
+                click.clear()
+            if as_json:
+                click.echo(json.dumps(sessions, indent=2))
+            elif not sessions:
+                click.echo("No active workers")
+            else:
+                now = time.time()
+                click.echo("Active workers:")
+                for info in sessions:
+                    click.echo(f"  - {format_session_info(info, now)}")
+
+            if not watch:
+                return
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
 
 
 @cli.command()
@@ -244,6 +906,7 @@ def kill(session: str):
     if result.returncode != 0:
         click.echo(f"Error killing session: {result.stderr}", err=True)
         raise SystemExit(1)
+    remove_output_log(session)
 
     click.echo(f"Killed: {session}")
 
@@ -275,10 +938,11 @@ def kill_all(force: bool):
             return
 
     killed = 0
-    for session in sessions:
-        result = run_tmux("kill-session", "-t", session)
+    results = run_tmux_many([("kill-session", "-t", session) for session in sessions])
+    for session, result in zip(sessions, results):
         if result.returncode == 0:
             killed += 1
+            remove_output_log(session)
         else:
             click.echo(f"Warning: Could not kill {session}", err=True)
 
@@ -288,22 +952,136 @@ def kill_all(force: bool):
 @cli.command()
 @click.argument("session")
 @click.argument("text")
-def send(session: str, text: str):
+@click.option("--role", "-r", default=None, help="Prefix the role's context unless the worker already has it")
+@click.option("--delivery", type=click.Choice(DELIVERY_MODES), default="auto", show_default=True,
+              help="Paste the prompt from a tmux buffer, type it with send-keys, or paste only long prompts")
+def send(session: str, text: str, role: str | None, delivery: str):
     """Send text to a worker session (advanced).
 
-    Useful for sending commands like /exit to workers.
+    Useful for sending commands like /exit to workers. With --role, the
+    role's context bundle is sent along only if the worker hasn't been
+    given that exact bundle (same hash) already.
 
     Examples:
         send my-worker "/exit"
         send my-worker "continue with the next step"
+        send --role worker my-worker "Now fix the tests"
+        send --delivery paste my-worker "$(cat instructions.md)"
     """
     if not session_exists(session):
         click.echo(f"Error: Session '{session}' not found", err=True)
         raise SystemExit(1)
 
-    run_tmux("send-keys", "-t", session, text, "Enter")
+    if role:
+        bundle = get_role_bundle(role)
+        if not bundle:
+            raise click.ClickException(f"Could not load role '{role}'")
+        if get_session_bundle(session) == bundle["hash"]:
+            click.echo(f"Role context already loaded (bundle {bundle['hash']})")
+        else:
+            text = build_prompt(text, bundle["text"].strip(), None)
+            set_session_bundle(session, bundle["hash"])
+            click.echo(f"Applied role: {role} (bundle {bundle['hash']})")
+
+    if delivery_mode(text, delivery) == "paste":
+        if not paste_prompt(session, text):
+            click.echo("Warning: could not confirm the text was pasted", err=True)
+    else:
+        run_tmux("send-keys", "-t", session, text, "Enter")
     click.echo(f"Sent to {session}: {text[:50]}{'...' if len(text) > 50 else ''}")
 
 
+@cli.group()
+def signal():
+    """Questions from workers to Prophet, and Prophet's responses.
+
+    A worker posts a question and waits; the wait wakes as soon as
+    Prophet responds (inotify on Linux, polling elsewhere).
+    """
+
+
+@signal.command("post")
+@click.argument("message")
+@click.option("--session", "-s", default=None, help="Worker session (default: the current tmux session)")
+@click.option("--ticket", "-t", default=None, help="Ticket to move to 'waiting'")
+@click.option("--wait", "-w", "then_wait", is_flag=True, help="Block until Prophet responds")
+@click.option("--timeout", default=DEFAULT_SIGNAL_TIMEOUT, show_default=True, help="Seconds to wait with --wait")
+def signal_post(message: str, session: str | None, ticket: str | None, then_wait: bool, timeout: float):
+    """Tell Prophet this worker is waiting for an answer.
+
+    Examples:
+        signal post "OAuth or JWT?" --ticket abc123 --wait
+    """
+    from mcbs import signals
+
+    session = resolve_session(session)
+    signals.post(session, message, ticket)
+    if ticket:
+        update_waiting_ticket(ticket, "waiting", f"Waiting for Prophet: {message}")
+    click.echo(f"Waiting for Prophet: {message}")
+    if then_wait:
+        wait_for_response(session, timeout)
+
+
+@signal.command("wait")
+@click.option("--session", "-s", default=None, help="Worker session (default: the current tmux session)")
+@click.option("--timeout", default=DEFAULT_SIGNAL_TIMEOUT, show_default=True, help="Seconds to wait")
+def signal_wait(session: str | None, timeout: float):
+    """Block until Prophet responds, then print the response.
+
+    Exits with status 1 if no response arrived within the timeout.
+    """
+    wait_for_response(resolve_session(session), timeout)
+
+
+@signal.command("respond")
+@click.argument("session")
+@click.argument("response")
+@click.option("--send", is_flag=True, help="Also type the response into the session as a prompt")
+def signal_respond(session: str, response: str, send: bool):
+    """Answer a waiting worker.
+
+    Writes the response (waking the worker's `signal wait`) and moves its
+    ticket back to in-progress. A worker blocked in `signal wait` gets the
+    response as its output; use --send for one that isn't waiting on it.
+
+    Examples:
+        signal respond claude-auth "Use OAuth2 with refresh tokens"
+        signal respond claude-auth "Carry on" --send
+    """
+    from mcbs import signals
+
+    try:
+        reply = signals.respond(session, response)
+    except signals.SignalError:
+        raise click.ClickException(f"No worker waiting: {session}")
+    if reply["ticket_id"]:
+        update_waiting_ticket(reply["ticket_id"], "in-progress", f"Prophet responded: {response}")
+    if send and session_exists(session):
+        run_tmux("send-keys", "-t", session, f"Prophet: {response}", "Enter")
+    click.echo(f"Responded to {session}")
+
+
+@signal.command("list")
+@click.option("--json", "as_json", is_flag=True, help="Output waiting signals as JSON")
+def signal_list(as_json: bool):
+    """List workers waiting for Prophet, oldest first."""
+    import json
+
+    from mcbs import signals
+
+    waiting = signals.list_waiting()
+    if as_json:
+        click.echo(json.dumps(waiting, indent=2))
+        return
+    if not waiting:
+        click.echo("No workers waiting")
+        return
+    click.echo("Workers waiting:")
+    for item in waiting:
+        ticket = f" (ticket {item['ticket_id']})" if item.get("ticket_id") else ""
+        click.echo(f"  ⏳ {item['session']}: \"{item['message']}\"{ticket} since {item['timestamp']}")
+
+
 if __name__ == "__main__":
     cli()
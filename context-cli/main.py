@@ -4,61 +4,48 @@ Context CLI - Manage roles and directives for Claude workers.
 
 Usage:
     uv run python main.py show prophet-claude
+    uv run python main.py bundle worker
+    uv run python main.py show worker --budget 1500
+    uv run python main.py stats
     uv run python main.py list-roles
     uv run python main.py list-directives
     uv run python main.py settings prophet-claude
 """
 
-import json
+import sys
 from pathlib import Path
 
 import click
-import yaml
 
-# Paths relative to this file
-ROLES_DIR = Path(__file__).parent / "roles"
-DIRECTIVES_DIR = Path(__file__).parent / "directives"
+# Make the shared mcbs package importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from mcbs.context import (  # noqa: E402
+    DIRECTIVES_DIR,
+    ROLES_DIR,
+    ContextError,
+    context_stats,
+    get_all_directives,
+    get_all_roles,
+    load_role,
+    resolve_role,
+    role_bundle,
+    role_settings,
+    validate_role,
+)
 
-def load_yaml(path: Path) -> dict:
-    """Load a YAML file."""
-    with open(path, encoding="utf-8") as f:
-        return yaml.safe_load(f)
 
+class ContextGroup(click.Group):
+    """Click group that reports role/directive errors as CLI errors."""
 
-def load_role(name: str) -> dict:
-    """Load a role by name."""
-    path = ROLES_DIR / f"{name}.yaml"
-    if not path.exists():
-        raise click.ClickException(f"Role not found: {name}")
-    return load_yaml(path)
+    def invoke(self, ctx):
+        try:
+            return super().invoke(ctx)
+        except ContextError as e:
+            raise click.ClickException(str(e))
 
 
-def load_directive(name: str) -> dict:
-    """Load a directive by name."""
-    path = DIRECTIVES_DIR / f"{name}.yaml"
-    if not path.exists():
-        raise click.ClickException(f"Directive not found: {name}")
-    return load_yaml(path)
-
-
-def get_all_roles() -> list[dict]:
-    """Get all available roles."""
-    roles = []
-    for path in ROLES_DIR.glob("*.yaml"):
-        roles.append(load_yaml(path))
-    return roles
-
-
-def get_all_directives() -> list[dict]:
-    """Get all available directives."""
-    directives = []
-    for path in DIRECTIVES_DIR.glob("*.yaml"):
-        directives.append(load_yaml(path))
-    return directives
-
-
-@click.group()
+@click.group(cls=ContextGroup)
 @click.version_option(version="0.1.0")
 def cli():
     """Context CLI - Manage roles and directives for Claude workers."""
@@ -67,7 +54,9 @@ def cli():
 
 @cli.command()
 @click.argument("role_name")
-def show(role_name: str):
+@click.option("--budget", "-b", type=int, default=None,
+              help="Token budget: drop the lowest priority directives until the context fits")
+def show(role_name: str, budget: int | None):
     """Show the combined context for a role.
 
     Displays the role prompt and all included directives.
@@ -75,34 +64,79 @@ def show(role_name: str):
     Example:
         show prophet-claude
         show worker
+        show worker --budget 1500
+    """
+    data = role_bundle(role_name, warn=lambda msg: click.echo(f"Warning: {msg}", err=True), budget=budget)
+    click.echo(data["text"])
+    if data["dropped"]:
+        click.echo(f"Warning: over the {budget} token budget, dropped: {', '.join(data['dropped'])}", err=True)
+    if budget is not None and data["tokens"] > budget:
+        click.echo(f"Warning: still over the {budget} token budget (~{data['tokens']} tokens)", err=True)
+
+
+@cli.command()
+@click.argument("role_name")
+@click.option("--json", "as_json", is_flag=True, help="Output the whole bundle (including its text) as JSON")
+@click.option("--budget", "-b", type=int, default=None, help="Token budget to trim the bundle to (see show)")
+def bundle(role_name: str, as_json: bool, budget: int | None):
+    """Show a role's compiled context bundle and its hash.
+
+    The bundle is what `show` prints: the role, its parent roles
+    (extends) and their directives, each included once. Its hash only
+    changes when the rendered text does.
+
+    Examples:
+        bundle worker
+        bundle worker --json
     """
-    role = load_role(role_name)
-
-    # Header
-    click.echo(f"# Role: {role['name']}")
-    click.echo(f"# {role.get('description', 'No description')}")
-    click.echo()
-
-    # Role prompt
-    click.echo("## Role Context")
-    click.echo()
-    click.echo(role.get("prompt", ""))
-    click.echo()
-
-    # Include directives
-    directive_names = role.get("directives", [])
-    if directive_names:
-        click.echo("---")
-        click.echo()
-        for directive_name in directive_names:
-            try:
-                directive = load_directive(directive_name)
-                click.echo(f"## Directive: {directive['name']}")
-                click.echo()
-                click.echo(directive.get("content", ""))
-                click.echo()
-            except click.ClickException as e:
-                click.echo(f"Warning: {e.message}", err=True)
+    data = role_bundle(role_name, warn=lambda msg: click.echo(f"Warning: {msg}", err=True), budget=budget)
+
+    if as_json:
+        import json
+
+        click.echo(json.dumps(data, indent=2))
+        return
+
+    click.echo(f"Bundle: {data['hash']}")
+    click.echo(f"  - Role: {data['role']}")
+    if data["extends"]:
+        click.echo(f"  - Extends: {', '.join(data['extends'])}")
+    click.echo(f"  - Directives: {', '.join(data['directives']) or 'none'}")
+    if data["dropped"]:
+        click.echo(f"  - Dropped for the budget: {', '.join(data['dropped'])}")
+    click.echo(f"  - Size: {len(data['text'])} chars, ~{data['tokens']} tokens")
+
+
+@cli.command()
+@click.argument("role_names", nargs=-1)
+@click.option("--json", "as_json", is_flag=True, help="Output as JSON")
+def stats(role_names: tuple[str, ...], as_json: bool):
+    """Show estimated token counts of roles and directives.
+
+    For each role: its composed bundle and its own part (prompt and
+    header). For each directive: its rendered size and priority (lower
+    priorities are dropped first by show --budget). Estimates are rough
+    (no tokenizer) and cached with the bundles.
+
+    Examples:
+        stats
+        stats worker --json
+    """
+    data = context_stats(list(role_names) or None)
+
+    if as_json:
+        import json
+
+        click.echo(json.dumps(data, indent=2))
+        return
+
+    click.echo("Roles (estimated tokens):")
+    for role in data["roles"]:
+        click.echo(f"  - {role['name']}: ~{role['tokens']} "
+                   f"(role ~{role['role_tokens']}, {len(role['directives'])} directive(s), bundle {role['hash']})")
+    click.echo("Directives (estimated tokens):")
+    for directive in data["directives"]:
+        click.echo(f"  - {directive['name']}: ~{directive['tokens']} (priority {directive['priority']})")
 
 
 @cli.command("list-roles")
@@ -160,15 +194,9 @@ def settings(role_name: str, output: str | None):
         settings prophet-claude
         settings prophet-claude -o settings.json
     """
-    role = load_role(role_name)
+    settings_data = role_settings(role_name)
 
-    permissions = role.get("permissions", {})
-    settings_data = {
-        "permissions": {
-            "allow": permissions.get("allow", []),
-            "deny": permissions.get("deny", []),
-        }
-    }
+    import json
 
     json_output = json.dumps(settings_data, indent=2)
 
@@ -191,20 +219,7 @@ def validate(role_name: str):
     Example:
         validate prophet-claude
     """
-    role = load_role(role_name)
-    errors = []
-
-    # Check required fields
-    if "name" not in role:
-        errors.append("Missing 'name' field")
-    if "prompt" not in role:
-        errors.append("Missing 'prompt' field")
-
-    # Check directives exist
-    for directive_name in role.get("directives", []):
-        path = DIRECTIVES_DIR / f"{directive_name}.yaml"
-        if not path.exists():
-            errors.append(f"Directive not found: {directive_name}")
+    errors = validate_role(load_role(role_name))
 
     if errors:
         click.echo(f"Validation failed for {role_name}:", err=True)
@@ -212,6 +227,7 @@ def validate(role_name: str):
             click.echo(f"  - {error}", err=True)
         raise SystemExit(1)
     else:
+        role = resolve_role(role_name)
         click.echo(f"Role '{role_name}' is valid")
         click.echo(f"  - Prompt: {len(role.get('prompt', ''))} chars")
         click.echo(f"  - Directives: {len(role.get('directives', []))}")
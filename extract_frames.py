@@ -2,21 +2,138 @@
 """
 Extract tutorial content from video frames using Azure OpenAI GPT-4.1-mini vision.
 
+Frames are sent to the model concurrently (--concurrency) through a
+shared token-bucket rate limiter (--rpm). A 429 pauses every request for
+its Retry-After delay; 429s, 5xx errors and connection failures are
+retried with jittered exponential backoff. Results are written in frame
+order whatever order they complete in.
+
+Before any request, sampled frames that look the same as the last kept
+frame are dropped locally (--no-dedup to disable): a difference hash
+rules out obvious changes, then a tiled SSIM comparison of grayscale
+thumbnails decides. With --adaptive, a large change between two samples
+also examines the frames in between, so fast-changing stretches are
+sampled more densely.
+
+Every result is appended to a JSONL cache next to the output
+(<output>.cache.jsonl, or --cache) as soon as it arrives, keyed by the
+image's SHA-256, the deployment and the prompt version. With --resume,
+frames already in the cache aren't sent again, whichever run (and
+sample rate) extracted them.
+
+Each frame is prepared for upload in the worker that sends it: cropped
+(--crop), downscaled to --max-dimension (by default, to the size the API
+itself would scale it to for --detail) and re-encoded (--image-format,
+--quality) with the matching MIME type. The bytes and estimated image
+tokens saved are reported at the end.
+
+With --batch-size K, runs of K consecutive frames share one request (and
+one copy of the system prompt): the model answers each frame under a
+"=== FRAME n ===" line, and the answers are split back to their frames.
+A batch whose answer can't be split is sent again one frame at a time.
+
+With --video, frames are decoded straight from the video through an
+ffmpeg pipe instead of read from --frames-dir. ffmpeg's select filter
+keeps one frame every --interval seconds (plus scene changes above
+--scene), the near-duplicate check runs on the decoded pixels, and only
+the frames kept are encoded, in memory. Frames are sent as they are
+decoded, with at most a few per worker held at once, and timestamped by
+their PTS.
+
 Usage:
     python extract_frames.py --frames-dir /path/to/frames --output tutorial.md
     python extract_frames.py --frames-dir /path/to/frames --sample-rate 12  # 1 frame per minute (if 5sec intervals)
+    python extract_frames.py --frames-dir /path/to/frames --concurrency 16 --rpm 300
+    python extract_frames.py --frames-dir /path/to/frames --adaptive --ssim 0.97
+    python extract_frames.py --frames-dir /path/to/frames --resume  # after an interruption
+    python extract_frames.py --frames-dir /path/to/frames --crop 0,60,1920,960 --image-format webp
+    python extract_frames.py --frames-dir /path/to/frames --batch-size 4
+    python extract_frames.py --video tutorial.mp4 --interval 30 --scene 0.3
 """
 
 import os
 import base64
 import argparse
+import hashlib
+import itertools
+import json
+import io
+import queue
+import random
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import closing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from openai import APIConnectionError, APIStatusError, AzureOpenAI, RateLimitError
+from PIL import Image, ImageChops, ImageStat
 from tqdm import tqdm
 
 load_dotenv(override=True)
 
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+# Batches queued per worker, so the next one is ready when a worker frees up
+BATCHES_PER_WORKER = 2
+
+# Frame similarity: grayscale thumbnails compared tile by tile
+THUMBNAIL_SIZE = (160, 96)
+SSIM_TILES = (4, 4)
+HASH_SIZE = 8
+# SSIM constants for 8-bit images: (0.05 * 255)^2 and (0.03 * 255)^2. C1 is
+# larger than the usual (0.01 * 255)^2 so that one gray level of encoding
+# noise on a flat black terminal doesn't count as a change
+SSIM_C1 = 162.5625
+SSIM_C2 = 58.5225
+# --adaptive scans the frames between two samples at this fraction of the sample rate
+ADAPTIVE_DIVISOR = 4
+
+# Seconds between the frames in --frames-dir (ffmpeg -vf fps=1/5)
+FRAME_INTERVAL = 5
+SHOWINFO_PATTERN = re.compile(r"\bpts_time:\s*(-?[\d.]+)")
+PTS_TIMEOUT = 30.0
+
+SYSTEM_PROMPT = """You are an assistant that extracts text content from screenshots of a Claude Code video tutorial.
+
+For each frame, extract:
+1. Commands typed in the terminal
+2. Code displayed (with the language if identifiable)
+3. Claude's messages/responses
+4. Important instructions or comments
+
+Format your response in a structured and concise manner. If the frame is similar to the previous one or contains nothing new, simply respond "SKIP".
+"""
+USER_PROMPT = "Extract the important content from this tutorial screenshot:"
+MAX_TOKENS = 1000
+TEMPERATURE = 0.1
+
+BATCH_PROMPT = """Extract the important content from each of these {count} tutorial screenshots, in order.
+Start the answer for each screenshot with a line "=== FRAME n ===" (n from 1 to {count}), and answer every screenshot,
+with "SKIP" under its line if it adds nothing new."""
+BATCH_DELIMITER = re.compile(r"^\s*=+\s*FRAME\s+(\d+)\s*=+\s*$", re.MULTILINE | re.IGNORECASE)
+
+MIME_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+IMAGE_FORMATS = {"jpeg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+
+# Cached results are only reused for the same prompt and parameters
+PROMPT_VERSION = hashlib.sha256(
+    json.dumps([SYSTEM_PROMPT, USER_PROMPT, MAX_TOKENS, TEMPERATURE]).encode()
+).hexdigest()[:12]
+
+
+class BatchParseError(Exception):
+    """Raised when a batched answer can't be split into one answer per frame."""
+
+
+class VideoError(Exception):
+    """Raised when a video can't be probed or decoded."""
+
 
 def get_client() -> AzureOpenAI:
     """Initialize Azure OpenAI client."""
@@ -24,84 +141,802 @@ def get_client() -> AzureOpenAI:
         api_key=os.getenv("AZURE_OPENAI_API_KEY"),
         api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
         azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        # Retries are scheduled by with_retry, across all threads
+        max_retries=0,
     )
 
 
-def encode_image(image_path: Path) -> str:
-    """Encode image to base64."""
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+class TokenBucket:
+    """Rate limiter shared by the extraction threads.
+
+    Holds up to `capacity` tokens, refilled at `rate` per second; each
+    request takes one. pause() (on a 429) stops all requests until the
+    server's Retry-After has passed, then refills from empty so the
+    threads don't all retry at once.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate  # Tokens per second, 0 for no limit
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if not self.rate:
+                        return
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every request for `seconds` (e.g. a 429's Retry-After)."""
+        with self.lock:
+            until = time.monotonic() + seconds
+            if until > self.paused_until:
+                self.paused_until = until
+                self.tokens = 0.0
+                self.updated = until
+
+
+def retry_after(error: APIStatusError) -> float | None:
+    """Return the delay a rate-limited response asks for, in seconds."""
+    headers = error.response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for a retry attempt (0-based)."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed request is worth retrying (rate limits, 5xx, network)."""
+    if isinstance(error, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """Estimate the prompt tokens of an image (OpenAI's 512px tile formula)."""
+    if detail == "low":
+        return 85
+    width, height = detail_size(width, height, detail)
+    return 85 + 170 * -(-width // 512) * -(-height // 512)
+
+
+def detail_size(width: int, height: int, detail: str = "high") -> tuple[int, int]:
+    """The size the API scales an image to before tiling it.
+
+    High detail fits the image in 2048x2048, then scales its short side
+    down to 768; low detail fits it in 512x512. Sending anything larger
+    only costs upload bytes.
+    """
+    if detail == "low":
+        scale = min(1.0, 512 / max(width, height))
+    else:
+        scale = min(1.0, 2048 / max(width, height))
+        scale *= min(1.0, 768 / (min(width, height) * scale))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class ImagePreprocessor:
+    """Prepares frames for upload and tallies the bytes and tokens saved.
+
+    prepare() is called from the extraction threads, one frame at a time,
+    so only the frames in flight are held in memory.
+    """
+
+    def __init__(self, max_dimension: int = 0, crop: tuple[int, int, int, int] | None = None,
+                 image_format: str = "jpeg", quality: int = 85, detail: str = "high"):
+        self.max_dimension = max_dimension  # 0 for the size the API would use (see detail_size)
+        self.crop = crop  # (x, y, width, height) in source pixels
+        self.image_format = image_format  # "jpeg", "webp" or "original"
+        self.quality = quality
+        self.detail = detail
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def key(self) -> str:
+        """The settings that change what is sent (for cache keys)."""
+        return json.dumps([self.max_dimension, self.crop, self.image_format, self.quality, self.detail])
+
+    def prepare(self, image_path: Path) -> tuple[bytes, str]:
+        """Crop, downscale and re-encode a frame.
+
+        Returns:
+            The bytes to send and their MIME type.
+        """
+        original = image_path.read_bytes()
+        with Image.open(io.BytesIO(original)) as image:
+            source_size = image.size
+            source_format = image.format
+            if self.crop:
+                x, y, width, height = self.crop
+                image = image.crop((x, y, x + width, y + height))
+            if self.max_dimension:
+                scale = min(1.0, self.max_dimension / max(image.size))
+                target = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            else:
+                target = detail_size(*image.size, self.detail)
+            if target != image.size:
+                image = image.resize(target, Image.Resampling.LANCZOS)
+            size = image.size
+
+            if self.image_format == "original" and not self.crop and size == source_size:
+                data, mime = original, MIME_TYPES.get(image_path.suffix.lower(), "image/jpeg")
+            else:
+                if self.image_format == "original":
+                    pil_format, mime = source_format, Image.MIME.get(source_format, "image/jpeg")
+                else:
+                    pil_format, mime = IMAGE_FORMATS[self.image_format]
+                if pil_format in ("JPEG", "WEBP") and image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                buffer = io.BytesIO()
+                image.save(buffer, pil_format, quality=self.quality)
+                data = buffer.getvalue()
 
+        with self.lock:
+            self.frames += 1
+            self.bytes_before += len(original)
+            self.bytes_after += len(data)
+            self.tokens_before += image_tokens(*source_size, self.detail)
+            self.tokens_after += image_tokens(*size, self.detail)
+        return data, mime
 
-def extract_frame_content(client: AzureOpenAI, image_path: Path, deployment: str) -> str:
-    """Extract text content from a single frame using vision model."""
-    base64_image = encode_image(image_path)
+    def report(self) -> str:
+        """Summarize the bytes and estimated tokens saved so far."""
+        if not self.frames:
+            return "No images uploaded"
+        saved = 1 - self.bytes_after / self.bytes_before if self.bytes_before else 0
+        return (f"Uploaded {self.frames} images: {self.bytes_before / 1e6:.1f} MB -> {self.bytes_after / 1e6:.1f} MB "
+                f"({saved:.0%} fewer bytes), ~{self.tokens_before} -> ~{self.tokens_after} image tokens "
+                f"({self.tokens_before - self.tokens_after} saved)")
+
+
+def image_part(data: bytes, mime: str, detail: str = "high") -> dict:
+    """Build a chat message image part with a data URL."""
+    return {
+        "type": "image_url",
+        "image_url": {
+            "url": f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}",
+            "detail": detail
+        }
+    }
+
+
+def extract_frame_content(client: AzureOpenAI, image_path: Path, deployment: str,
+                          image: tuple[bytes, str] | None = None, detail: str = "high") -> str:
+    """Extract text content from a single frame using vision model.
+
+    Args:
+        image: The prepared (bytes, MIME type) to send instead of the file as is.
+    """
+    if image is None:
+        image = (image_path.read_bytes(), MIME_TYPES.get(image_path.suffix.lower(), "image/jpeg"))
 
     response = client.chat.completions.create(
         model=deployment,
         messages=[
             {
                 "role": "system",
-                "content": """You are an assistant that extracts text content from screenshots of a Claude Code video tutorial.
-
-For each frame, extract:
-1. Commands typed in the terminal
-2. Code displayed (with the language if identifiable)
-3. Claude's messages/responses
-4. Important instructions or comments
-
-Format your response in a structured and concise manner. If the frame is similar to the previous one or contains nothing new, simply respond "SKIP".
-"""
+                "content": SYSTEM_PROMPT
             },
             {
                 "role": "user",
                 "content": [
                     {
                         "type": "text",
-                        "text": "Extract the important content from this tutorial screenshot:"
+                        "text": USER_PROMPT
                     },
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}",
-                            "detail": "high"
-                        }
-                    }
+                    image_part(*image, detail)
                 ]
             }
         ],
-        max_tokens=1000,
-        temperature=0.1,
+        max_tokens=MAX_TOKENS,
+        temperature=TEMPERATURE,
     )
 
     return response.choices[0].message.content
 
 
-def get_frame_timestamp(frame_name: str, interval_seconds: int = 5) -> str:
+def split_batch(content: str, count: int) -> list[str]:
+    """Split a batched answer into each frame's answer.
+
+    Raises:
+        BatchParseError: If the frames aren't all answered, once each, in order.
+    """
+    matches = list(BATCH_DELIMITER.finditer(content))
+    if [int(match.group(1)) for match in matches] != list(range(1, count + 1)):
+        raise BatchParseError(f"Expected answers for frames 1-{count}, got {[m.group(1) for m in matches]}")
+    ends = [match.start() for match in matches[1:]] + [len(content)]
+    return [content[match.end():end].strip() for match, end in zip(matches, ends)]
+
+
+def extract_batch_content(client: AzureOpenAI, image_paths: list[Path], deployment: str,
+                          images: list[tuple[bytes, str]] | None = None, detail: str = "high") -> list[str]:
+    """Extract the content of several frames with one request.
+
+    Raises:
+        BatchParseError: If the answer can't be split per frame.
+    """
+    if images is None:
+        images = [(path.read_bytes(), MIME_TYPES.get(path.suffix.lower(), "image/jpeg")) for path in image_paths]
+    content = [{"type": "text", "text": BATCH_PROMPT.format(count=len(images))}]
+    for n, image in enumerate(images, 1):
+        content.append({"type": "text", "text": f"Frame {n}:"})
+        content.append(image_part(*image, detail))
+
+    response = client.chat.completions.create(
+        model=deployment,
+        messages=[
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": content
+            }
+        ],
+        max_tokens=MAX_TOKENS * len(images),
+        temperature=TEMPERATURE,
+    )
+
+    return split_batch(response.choices[0].message.content or "", len(images))
+
+
+def with_retry(call, limiter: TokenBucket, max_retries: int = 5):
+    """Run a request through the rate limiter, retrying transient errors."""
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            return call()
+        except Exception as e:
+            if not is_retryable(e) or attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            if isinstance(e, RateLimitError):
+                server_delay = retry_after(e)
+                if server_delay is not None:
+                    # Everyone waits for the server; this request adds jitter
+                    limiter.pause(server_delay)
+                    delay = random.uniform(0, min(BACKOFF_BASE, server_delay + 0.1))
+            time.sleep(delay)
+            attempt += 1
+
+
+def extract_with_retry(client: AzureOpenAI, image_path: Path, deployment: str, limiter: TokenBucket,
+                       max_retries: int = 5, preprocessor: ImagePreprocessor | None = None) -> str:
+    """Extract a frame's content through the rate limiter, retrying transient errors."""
+    # Prepared once, however many attempts it takes
+    image = preprocessor.prepare(image_path) if preprocessor else None
+    detail = preprocessor.detail if preprocessor else "high"
+    return with_retry(lambda: extract_frame_content(client, image_path, deployment, image, detail),
+                      limiter, max_retries)
+
+
+def extract_batch_with_retry(client: AzureOpenAI, image_paths: list[Path], deployment: str, limiter: TokenBucket,
+                             max_retries: int = 5,
+                             preprocessor: ImagePreprocessor | None = None) -> tuple[list[str], bool]:
+    """Extract a run of frames in one request, or one by one if the answer can't be split.
+
+    Returns:
+        The frames' contents, and whether they came from the batch prompt
+        (False if the frames were sent one by one).
+    """
+    if len(image_paths) == 1:
+        return [extract_with_retry(client, image_paths[0], deployment, limiter, max_retries, preprocessor)], False
+    images = [preprocessor.prepare(path) for path in image_paths] if preprocessor else None
+    detail = preprocessor.detail if preprocessor else "high"
+    try:
+        return with_retry(lambda: extract_batch_content(client, image_paths, deployment, images, detail),
+                          limiter, max_retries), True
+    except BatchParseError as e:
+        tqdm.write(f"Batch {image_paths[0].name}..{image_paths[-1].name} answered out of format ({e}), "
+                   "retrying frame by frame")
+    return [
+        with_retry(lambda: extract_frame_content(client, path, deployment, images[i] if images else None, detail),
+                   limiter, max_retries)
+        for i, path in enumerate(image_paths)
+    ], False
+
+
+def extract_all(client: AzureOpenAI, frames, deployment: str, concurrency: int = 8,
+                limiter: TokenBucket | None = None, max_retries: int = 5, progress: bool = True,
+                on_result=None, preprocessor: ImagePreprocessor | None = None,
+                batch_size: int = 1) -> list[str | None]:
+    """Extract every frame concurrently.
+
+    Frames are taken from the iterable as workers free up, so a generator
+    (e.g. a VideoReader) is consumed while extraction runs, and at most
+    BATCHES_PER_WORKER batches per worker are held at once.
+
+    Args:
+        frames: The frames (Paths, or anything with name, suffix and
+            read_bytes()), in order.
+        on_result: Optional callable receiving (frame, content, batched)
+            for each frame extracted, as it completes (from the calling
+            thread). batched tells whether the content is an answer to
+            the batch prompt.
+        batch_size: Consecutive frames sent per request.
+
+    Returns:
+        Each frame's content in the order of frames (None where it failed).
+    """
+    limiter = limiter or TokenBucket(0)
+    batch_size = max(1, batch_size)
+    total = len(frames) if hasattr(frames, "__len__") else None
+    frames = iter(frames)
+    batches = iter(lambda: list(itertools.islice(frames, batch_size)), [])
+    results = []
+    window = max(1, concurrency) * BATCHES_PER_WORKER
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool, \
+            tqdm(total=total, desc="Extracting content", disable=not progress) as bar:
+        futures = {}  # future -> (position of its first frame, its frames)
+
+        def fill():
+            """Submit batches until the window is full or the frames run out."""
+            while len(futures) < window:
+                batch = next(batches, None)
+                if batch is None:
+                    return
+                futures[pool.submit(extract_batch_with_retry, client, batch, deployment, limiter, max_retries,
+                                    preprocessor)] = (len(results), batch)
+                results.extend([None] * len(batch))
+
+        try:
+            fill()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, batch = futures.pop(future)
+                    try:
+                        contents, batched = future.result()
+                        results[start:start + len(batch)] = contents
+                    except Exception as e:
+                        tqdm.write(f"Error processing {batch[0].name}: {e}" if len(batch) == 1 else
+                                   f"Error processing {batch[0].name}..{batch[-1].name}: {e}")
+                    else:
+                        if on_result:
+                            for frame, content in zip(batch, contents):
+                                on_result(frame, content, batched)
+                    bar.update(len(batch))
+                fill()
+        except BaseException:
+            # e.g. Ctrl-C: don't start the queued frames, only finish those in flight
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return results
+
+
+def frame_signature(image_path: Path) -> tuple[int, Image.Image]:
+    """Return a frame's difference hash and grayscale thumbnail."""
+    source = image_path if isinstance(image_path, Path) else io.BytesIO(image_path.read_bytes())
+    with Image.open(source) as image:
+        # Let the JPEG decoder downscale while decoding
+        image.draft("L", THUMBNAIL_SIZE)
+        return image_signature(image.convert("L"))
+
+
+def image_signature(gray: Image.Image) -> tuple[int, Image.Image]:
+    """Return the difference hash and thumbnail of a grayscale image."""
+    thumbnail = gray.resize(THUMBNAIL_SIZE, Image.Resampling.BILINEAR)
+    small = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (HASH_SIZE + 1) + col + 1])
+    return bits, thumbnail
+
+
+def hash_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def ssim(a: Image.Image, b: Image.Image) -> float:
+    """Structural similarity of two same-size grayscale images, tile by tile.
+
+    Returns the lowest tile score, so a change confined to one region
+    (a new terminal line) isn't averaged away by the static rest.
+    """
+    width, height = a.size
+    cols, rows = SSIM_TILES
+    lowest = 1.0
+    for row in range(rows):
+        for col in range(cols):
+            box = (col * width // cols, row * height // rows, (col + 1) * width // cols, (row + 1) * height // rows)
+            tile_a, tile_b = a.crop(box), b.crop(box)
+            stat_a, stat_b = ImageStat.Stat(tile_a), ImageStat.Stat(tile_b)
+            mean_a, mean_b = stat_a.mean[0], stat_b.mean[0]
+            var_a, var_b = stat_a.var[0], stat_b.var[0]
+            # cov(a, b) from the variance of their average: var((a+b)/2) = (var_a + var_b + 2 cov) / 4
+            var_mid = ImageStat.Stat(ImageChops.add(tile_a, tile_b, scale=2)).var[0]
+            cov = 2 * var_mid - (var_a + var_b) / 2
+            score = ((2 * mean_a * mean_b + SSIM_C1) * (2 * cov + SSIM_C2)) / (
+                (mean_a ** 2 + mean_b ** 2 + SSIM_C1) * (var_a + var_b + SSIM_C2))
+            lowest = min(lowest, score)
+    return lowest
+
+
+def is_duplicate(kept: tuple[int, Image.Image], signature: tuple[int, Image.Image], max_distance: int = 4,
+                 min_ssim: float = 0.95) -> bool:
+    """Whether a frame's signature matches a kept frame's (close hashes and tiles)."""
+    return hash_distance(kept[0], signature[0]) <= max_distance and ssim(kept[1], signature[1]) >= min_ssim
+
+
+def dedup_frames(frames: list[Path], sampled: list[int], max_distance: int = 4, min_ssim: float = 0.95,
+                 adaptive_step: int = 0, adaptive_distance: int = 12, progress: bool = True) -> list[Path]:
+    """Drop sampled frames that look like the last kept frame.
+
+    A frame is a duplicate when its hash is within max_distance bits of
+    the last kept frame's and its lowest tile SSIM is at least min_ssim.
+
+    Args:
+        frames: All candidate frames, in order.
+        sampled: Positions in frames picked by the sample rate.
+        adaptive_step: If set, a sampled frame more than adaptive_distance
+            bits away from the last kept one also gets the frames in
+            between examined, every adaptive_step frames.
+
+    Returns:
+        The frames to send to the model, in order.
+    """
+    kept = []
+    last = None  # (position, hash, thumbnail) of the last kept frame
+
+    def differs(signature) -> bool:
+        return not is_duplicate(last[1:], signature, max_distance, min_ssim)
+
+    for position in tqdm(sampled, desc="Deduplicating frames", disable=not progress):
+        signature = frame_signature(frames[position])
+        if last is not None and not differs(signature):
+            continue
+        if (adaptive_step and last is not None and position - last[0] > adaptive_step
+                and hash_distance(last[1], signature[0]) > adaptive_distance):
+            for between in range(last[0] + adaptive_step, position, adaptive_step):
+                between_signature = frame_signature(frames[between])
+                if differs(between_signature):
+                    kept.append(frames[between])
+                    last = (between, *between_signature)
+            if not differs(signature):
+                # Already shown by a frame in between
+                continue
+        kept.append(frames[position])
+        last = (position, *signature)
+    return kept
+
+
+class VideoFrame:
+    """A frame decoded from a video, held in memory as PNG bytes.
+
+    Stands in for a frame file wherever the script reads one (name,
+    suffix, read_bytes()), so extraction and the cache treat both alike.
+    """
+
+    suffix = ".png"
+
+    def __init__(self, video: Path, seconds: float, data: bytes):
+        self.video = video
+        self.seconds = seconds  # Presentation time, from the start of the video
+        self.data = data
+
+    @property
+    def name(self) -> str:
+        return f"{self.video.name}@{format_timestamp(self.seconds)}"
+
+    def read_bytes(self) -> bytes:
+        return self.data
+
+    def __repr__(self) -> str:
+        return f"VideoFrame({self.name!r})"
+
+
+def probe_video(video: Path) -> tuple[int, int, float]:
+    """Return a video's width, height and start time (seconds)."""
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries",
+             "stream=width,height:format=start_time", "-of", "json", str(video)],
+            capture_output=True, text=True,
+        )
+    except FileNotFoundError:
+        raise VideoError("ffprobe not found (install ffmpeg)")
+    if result.returncode != 0:
+        raise VideoError(f"Can't read {video}: {result.stderr.strip()}")
+    info = json.loads(result.stdout)
+    if not info.get("streams"):
+        raise VideoError(f"No video stream in {video}")
+    stream = info["streams"][0]
+    return stream["width"], stream["height"], float(info.get("format", {}).get("start_time") or 0)
+
+
+def select_filter(interval: float, scene: float = 0.0) -> str:
+    """ffmpeg filters keeping a frame every interval seconds, and on scene changes."""
+    expression = f"isnan(prev_selected_t)+gte(t-prev_selected_t,{interval:g})"
+    if scene:
+        expression += f"+gt(scene,{scene:g})"
+    # showinfo logs each selected frame's PTS, in output order
+    return f"select='{expression}',showinfo"
+
+
+@lru_cache(maxsize=None)
+def vfr_options() -> tuple[str, ...]:
+    """ffmpeg options passing the selected frames through at their own PTS.
+
+    ffmpeg 5.1 replaced -vsync (deprecated since, with a warning) by
+    -fps_mode, which older versions don't know.
+    """
+    try:
+        result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True)
+    except FileNotFoundError:
+        raise VideoError("ffmpeg not found (install it, or extract frames to --frames-dir)")
+    match = re.match(r"ffmpeg version n?(\d+)\.(\d+)", result.stdout)
+    if match and (int(match.group(1)), int(match.group(2))) < (5, 1):
+        return ("-vsync", "vfr")
+    return ("-fps_mode", "vfr")
+
+
+def decode_video(video: Path, interval: float, scene: float = 0.0, info: tuple[int, int, float] | None = None):
+    """Stream the selected frames of a video from ffmpeg.
+
+    Frames are decoded to raw RGB on a pipe; nothing is written to disk.
+    ffmpeg only starts when the first frame is requested, and is stopped
+    if the generator is closed before the end.
+
+    Args:
+        info: The video's probe_video() result, if already known.
+
+    Yields:
+        (seconds, RGB image) per selected frame, seconds being its PTS
+        from the start of the video.
+
+    Raises:
+        VideoError: If ffmpeg is missing, the video can't be read or
+            decoding fails.
+    """
+    width, height, start_time = info or probe_video(video)
+    try:
+        process = subprocess.Popen(
+            ["ffmpeg", "-hide_banner", "-nostats", "-nostdin", "-loglevel", "info", "-i", str(video), "-an",
+             "-vf", select_filter(interval, scene), *vfr_options(), "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise VideoError("ffmpeg not found (install it, or extract frames to --frames-dir)")
+
+    yield from read_frames(process, video, width, height, start_time)
+
+
+def read_frames(process: subprocess.Popen, video: Path, width: int, height: int, start_time: float):
+    """Yield the frames ffmpeg writes, paired with the PTS it logs (see decode_video)."""
+    timestamps = queue.Queue()
+    log = deque(maxlen=10)  # The last other lines, for errors
+
+    def read_log():
+        for line in process.stderr:
+            line = line.decode(errors="replace").rstrip()
+            match = SHOWINFO_PATTERN.search(line)
+            if match:
+                timestamps.put(float(match.group(1)))
+            elif line:
+                log.append(line)
+        timestamps.put(None)
+
+    reader = threading.Thread(target=read_log, daemon=True)
+    reader.start()
+    frame_size = width * height * 3
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(frame_size)
+            if len(data) < frame_size:
+                finished = True
+                break
+            try:
+                pts = timestamps.get(timeout=PTS_TIMEOUT)
+            except queue.Empty:
+                pts = None
+            if pts is None:
+                raise VideoError(f"ffmpeg reported no timestamp for a frame of {video}")
+            yield max(0.0, pts - start_time), Image.frombytes("RGB", (width, height), data)
+    finally:
+        process.stdout.close()
+        if not finished:
+            process.terminate()  # Stopped early (e.g. Ctrl-C)
+        process.wait()
+        reader.join()
+    if process.returncode != 0:
+        raise VideoError(f"ffmpeg failed on {video}: " + " / ".join(log))
+
+
+class VideoReader:
+    """The frames of a video to send, decoded on demand.
+
+    Iterating decodes the selected frames (see decode_video), drops those
+    that look like the last kept one, and yields the others as in-memory
+    PNG VideoFrames, so only the frames the consumer holds are in memory.
+    Counts are kept as it goes. The video is only probed when
+    constructed: ffmpeg runs while iterating, and is stopped if the
+    iteration ends early.
+
+    Raises:
+        VideoError: If the video can't be opened (when constructed) or
+            decoding fails (while iterating).
+    """
+
+    def __init__(self, video: Path, interval: float, scene: float = 0.0, dedup: bool = True, max_distance: int = 4,
+                 min_ssim: float = 0.95):
+        self.video = video
+        self.interval = interval
+        self.scene = scene
+        self.dedup = dedup
+        self.max_distance = max_distance
+        self.min_ssim = min_ssim
+        self.decoded = 0
+        self.kept = 0
+        self.info = probe_video(video)
+
+    def __iter__(self):
+        last = None  # Signature of the last kept frame
+        with closing(decode_video(self.video, self.interval, self.scene, self.info)) as frames:
+            for seconds, image in frames:
+                self.decoded += 1
+                if self.dedup:
+                    gray = image.convert("L")
+                    gray.thumbnail((THUMBNAIL_SIZE[0] * 2, THUMBNAIL_SIZE[1] * 2))
+                    signature = image_signature(gray)
+                    if last is not None and is_duplicate(last, signature, self.max_distance, self.min_ssim):
+                        continue
+                    last = signature
+                buffer = io.BytesIO()
+                image.save(buffer, "PNG", compress_level=1)
+                self.kept += 1
+                yield VideoFrame(self.video, seconds, buffer.getvalue())
+
+
+class ResultCache:
+    """Extraction results in a JSONL sidecar, keyed by image content.
+
+    An entry matches an image with the same SHA-256, sent to the same
+    deployment with the same PROMPT_VERSION, whatever its file name.
+    Answers to the batch prompt are kept apart from single-frame answers,
+    which a batched run also reuses. Each result is appended and flushed as it arrives, so an interrupted
+    run only loses the requests in flight. Later lines win.
+    """
+
+    def __init__(self, path: Path, deployment: str, variant: str = ""):
+        self.path = path
+        self.deployment = deployment
+        self.variant = variant  # Anything else that changes results, e.g. the preprocessing
+        self.entries = {}
+        self.hashes = {}
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[(entry["image"], entry["deployment"], entry["prompt"])] = entry["content"]
+                    except (ValueError, KeyError, TypeError):
+                        continue  # e.g. a line cut short by a crash
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def image_hash(self, image_path: Path) -> str:
+        """SHA-256 of an image file (computed once per path)."""
+        if not isinstance(image_path, Path):
+            # Not memoized, so in-memory frames can be freed once sent
+            return hashlib.sha256(image_path.read_bytes()).hexdigest()
+        if image_path not in self.hashes:
+            self.hashes[image_path] = hashlib.sha256(image_path.read_bytes()).hexdigest()
+        return self.hashes[image_path]
+
+    def version(self, batched: bool = False) -> str:
+        """The prompt version, combined with the variant (and batch prompt) if there is one."""
+        # Batched answers come from another prompt
+        variant = self.variant + (BATCH_PROMPT if batched else "")
+        if not variant:
+            return PROMPT_VERSION
+        return f"{PROMPT_VERSION}-{hashlib.sha256(variant.encode()).hexdigest()[:8]}"
+
+    def get(self, image_path: Path, batched: bool = False) -> str | None:
+        """Return the cached content for an image, if any.
+
+        A batched run takes a single-frame answer when there is no
+        batched one.
+        """
+        image = self.image_hash(image_path)
+        content = self.entries.get((image, self.deployment, self.version(batched=True))) if batched else None
+        if content is None:
+            content = self.entries.get((image, self.deployment, self.version()))
+        return content
+
+    def put(self, image_path: Path, content: str, batched: bool = False):
+        """Record an image's content and flush it to disk."""
+        key = (self.image_hash(image_path), self.deployment, self.version(batched))
+        self.entries[key] = content
+        entry = {"image": key[0], "deployment": key[1], "prompt": key[2], "frame": image_path.name, "content": content}
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_crop(value: str) -> tuple[int, int, int, int]:
+    """Parse --crop X,Y,WIDTH,HEIGHT."""
+    try:
+        x, y, width, height = (int(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected X,Y,WIDTH,HEIGHT")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError("width and height must be positive")
+    return x, y, width, height
+
+
+def get_frame_timestamp(frame_name: str, interval_seconds: int = FRAME_INTERVAL) -> str:
     """Convert frame number to timestamp."""
     # Extract frame number from name like "frame_00001.jpg"
     frame_num = int(frame_name.split("_")[1].split(".")[0])
-    total_seconds = (frame_num - 1) * interval_seconds
+    return format_timestamp((frame_num - 1) * interval_seconds)
+
+
+def frame_timestamp(frame) -> str:
+    """A frame's timestamp: its PTS if decoded from video, else from its number."""
+    if isinstance(frame, VideoFrame):
+        return format_timestamp(frame.seconds)
+    return get_frame_timestamp(frame.name)
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as HH:MM:SS."""
+    total_seconds = int(seconds)
     hours = total_seconds // 3600
     minutes = (total_seconds % 3600) // 60
     seconds = total_seconds % 60
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Extract tutorial content from video frames")
-    parser.add_argument("--frames-dir", required=True, help="Directory containing frame images")
-    parser.add_argument("--output", default="tutorial_extracted.md", help="Output markdown file")
-    parser.add_argument("--sample-rate", type=int, default=12, help="Process every Nth frame (default: 12 = 1/min at 5sec intervals)")
-    parser.add_argument("--start-frame", type=int, default=1, help="Start from this frame number")
-    parser.add_argument("--end-frame", type=int, default=None, help="End at this frame number")
-    parser.add_argument("--deployment", default=None, help="Azure OpenAI deployment name (overrides .env)")
-    args = parser.parse_args()
+def select_frame_files(args) -> list[Path] | None:
+    """Pick the frames of --frames-dir to send, by range, sample rate and dedup.
 
+    Returns:
+        The frames in order, or None (after printing why) if there are none.
+    """
     frames_dir = Path(args.frames_dir)
     if not frames_dir.exists():
         print(f"Error: Directory {frames_dir} does not exist")
-        return
+        return None
 
     # Get all frame files
     frame_files = sorted(frames_dir.glob("frame_*.jpg"))
@@ -110,12 +945,13 @@ def main():
 
     if not frame_files:
         print(f"Error: No frame files found in {frames_dir}")
-        return
+        return None
 
     print(f"Found {len(frame_files)} frames")
 
-    # Filter frames based on sample rate and range
-    selected_frames = []
+    # Filter frames based on range and sample rate
+    in_range = []
+    sampled = []
     for i, frame in enumerate(frame_files):
         frame_num = int(frame.name.split("_")[1].split(".")[0])
         if frame_num < args.start_frame:
@@ -123,35 +959,130 @@ def main():
         if args.end_frame and frame_num > args.end_frame:
             break
         if (i % args.sample_rate) == 0:
-            selected_frames.append(frame)
+            sampled.append(len(in_range))
+        in_range.append(frame)
+
+    # Drop near-duplicates locally, before paying for a vision call
+    if args.dedup:
+        adaptive_step = max(1, args.sample_rate // ADAPTIVE_DIVISOR) if args.adaptive else 0
+        selected_frames = dedup_frames(in_range, sampled, args.hash_distance, args.ssim, adaptive_step)
+        print(f"Kept {len(selected_frames)} of {len(sampled)} sampled frames after deduplication")
+    else:
+        selected_frames = [in_range[position] for position in sampled]
+
+    return selected_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract tutorial content from video frames")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--frames-dir", help="Directory containing frame images")
+    source.add_argument("--video", help="Decode frames from this video (through ffmpeg) instead")
+    parser.add_argument("--output", default="tutorial_extracted.md", help="Output markdown file")
+    parser.add_argument("--sample-rate", type=int, default=12, help="Process every Nth frame (default: 12 = 1/min at 5sec intervals)")
+    parser.add_argument("--interval", type=float, default=None,
+                        help=f"With --video, seconds between frames (default: sample rate x {FRAME_INTERVAL})")
+    parser.add_argument("--scene", type=float, default=0.0,
+                        help="With --video, also keep frames whose ffmpeg scene score exceeds this (0-1, default: off)")
+    parser.add_argument("--start-frame", type=int, default=1, help="Start from this frame number (--frames-dir)")
+    parser.add_argument("--end-frame", type=int, default=None, help="End at this frame number (--frames-dir)")
+    parser.add_argument("--deployment", default=None, help="Azure OpenAI deployment name (overrides .env)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Frames processed in parallel (default: 8)")
+    parser.add_argument("--rpm", type=float, default=0, help="Max requests per minute (default: 0 = no limit, back off on 429)")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries per frame on 429, 5xx or network errors (default: 5)")
+    parser.add_argument("--dedup", action=argparse.BooleanOptionalAction, default=True,
+                        help="Drop frames that look like the last kept one before calling the model (default: on)")
+    parser.add_argument("--hash-distance", type=int, default=4, help="Max differing hash bits for a duplicate (default: 4 of 64)")
+    parser.add_argument("--ssim", type=float, default=0.95, help="Min tile SSIM for a duplicate (default: 0.95)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="On large changes, also examine the frames between samples (every sample-rate/4)")
+    parser.add_argument("--max-dimension", type=int, default=0,
+                        help="Downscale frames to this longest side (default: 0 = the size the API uses for --detail)")
+    parser.add_argument("--crop", type=parse_crop, default=None, help="Crop frames to X,Y,WIDTH,HEIGHT (e.g. the terminal)")
+    parser.add_argument("--image-format", choices=["jpeg", "webp", "original"], default="jpeg",
+                        help="Re-encode frames as (default: jpeg)")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG/WebP quality (default: 85)")
+    parser.add_argument("--detail", choices=["high", "low", "auto"], default="high", help="Vision detail level (default: high)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Consecutive frames sent per request (default: 1; falls back to 1 if an answer can't be split)")
+    parser.add_argument("--cache", default=None, help="Result cache file (default: <output>.cache.jsonl)")
+    parser.add_argument("--resume", action="store_true", help="Reuse cached results instead of extracting those frames again")
+    args = parser.parse_args()
 
-    print(f"Processing {len(selected_frames)} frames (sample rate: 1/{args.sample_rate})")
+    if args.video:
+        interval = args.interval or args.sample_rate * FRAME_INTERVAL
+        rate = f"one every {interval:g}s" + (f", scene changes above {args.scene:g}" if args.scene else "")
+        video = Path(args.video)
+        if not video.exists():
+            print(f"Error: Video {video} does not exist")
+            return
+        try:
+            selected_frames = VideoReader(video, interval, args.scene, args.dedup, args.hash_distance, args.ssim)
+        except VideoError as e:
+            print(f"Error: {e}")
+            return
+        print(f"Processing frames as they are decoded ({rate})")
+    else:
+        selected_frames = select_frame_files(args)
+        if selected_frames is None:
+            return
+        rate = f"sample rate: 1/{args.sample_rate}"
+        print(f"Processing {len(selected_frames)} frames ({rate})")
 
     # Initialize client
     client = get_client()
     deployment = args.deployment or os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4.1-mini")
 
-    # Process frames
+    # Results are cached as they arrive; --resume reuses them
+    output_path = Path(args.output)
+    preprocessor = ImagePreprocessor(args.max_dimension, args.crop, args.image_format, args.quality, args.detail)
+    cache_path = Path(args.cache) if args.cache else output_path.with_suffix(".cache.jsonl")
+    cache = ResultCache(cache_path, deployment, preprocessor.key())
+
+    # [name, timestamp, content] per frame, in order: only these are kept,
+    # so frames decoded from a video are freed once sent
+    entries = []
+    positions = []  # Entries of the frames sent for extraction, in order
+
+    def pending_frames():
+        """Yield the frames to extract, recording every frame's entry."""
+        for frame_path in selected_frames:
+            content = cache.get(frame_path, batched=args.batch_size > 1) if args.resume else None
+            if content is None:
+                positions.append(len(entries))
+            entries.append([frame_path.name, frame_timestamp(frame_path), content])
+            if content is None:
+                yield frame_path
+
+    # Process the frames concurrently, keeping results in frame order
+    limiter = TokenBucket(args.rpm / 60)
+    try:
+        extracted = extract_all(client, pending_frames(), deployment, args.concurrency, limiter, args.max_retries,
+                                on_result=cache.put, preprocessor=preprocessor, batch_size=args.batch_size)
+    except VideoError as e:
+        print(f"Error: {e} (results so far are cached, rerun with --resume)")
+        return
+    finally:
+        cache.close()
+    if args.video and args.dedup:
+        print(f"Kept {selected_frames.kept} of {selected_frames.decoded} decoded frames after deduplication")
+    if args.resume:
+        print(f"Reused {len(entries) - len(positions)} cached results from {cache.path}")
+    for position, content in zip(positions, extracted):
+        entries[position][2] = content
     results = []
-    for frame_path in tqdm(selected_frames, desc="Extracting content"):
-        timestamp = get_frame_timestamp(frame_path.name)
-        try:
-            content = extract_frame_content(client, frame_path, deployment)
-            if content and content.strip().upper() != "SKIP":
-                results.append({
-                    "frame": frame_path.name,
-                    "timestamp": timestamp,
-                    "content": content
-                })
-        except Exception as e:
-            print(f"\nError processing {frame_path.name}: {e}")
-            continue
+    for name, timestamp, content in entries:
+        if content and content.strip().upper() != "SKIP":
+            results.append({
+                "frame": name,
+                "timestamp": timestamp,
+                "content": content
+            })
 
     # Write output
-    output_path = Path(args.output)
     with open(output_path, "w", encoding="utf-8") as f:
         f.write("# Tutorial Extraction - Claude Code Multi-Agent System\n\n")
-        f.write(f"Extracted from {len(selected_frames)} frames (sample rate: 1/{args.sample_rate})\n\n")
+        f.write(f"Extracted from {len(entries)} frames ({rate})\n\n")
         f.write("---\n\n")
 
         for result in results:
@@ -160,7 +1091,8 @@ def main():
             f.write("\n\n---\n\n")
 
     print(f"\nExtraction complete! Output saved to: {output_path}")
-    print(f"Processed {len(results)} frames with content (skipped {len(selected_frames) - len(results)} similar frames)")
+    print(f"Processed {len(results)} frames with content (skipped {len(entries) - len(results)} similar frames)")
+    print(preprocessor.report())
 
 
 if __name__ == "__main__":
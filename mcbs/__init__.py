@@ -0,0 +1,6 @@
+"""Shared library layer for the Multi-Claude Bootstrap System CLIs.
+
+The claude, context and tickets CLIs are thin Click wrappers over these
+modules, so they can also be used in process (e.g. claude-cli resolving a
+role context without spawning context-cli).
+"""
@@ -0,0 +1,151 @@
+"""Thin client for prophetd.
+
+The ./claude, ./tickets and ./context wrappers run this script when the
+daemon's socket exists. It only imports the standard library, so it
+starts in milliseconds, and hands the command to the daemon. Commands the
+daemon doesn't serve (long-running, streaming or interactive ones), or a
+daemon that doesn't answer, fall back to running the CLI directly.
+
+Usage (from the CLI's directory, as the wrappers do):
+    python3 mcbs/client.py tickets list --status open
+"""
+
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SOCKET_PATH = PROJECT_ROOT / ".prophetd.sock"
+
+CONNECT_TIMEOUT = 1.0
+
+# Commands served by the daemon, per CLI
+SERVED = {
+    "claude": {"list", "capture", "kill", "kill-all", "send", "signal"},
+    "context": {"list-roles", "list-directives", "show", "bundle", "stats", "settings", "validate"},
+    "tickets": {"create", "list", "show", "update", "assign", "comment", "delete", "stats", "resolve", "batch",
+                "migrate"},
+}
+
+# Arguments that make a served command block, stream or wait
+BLOCKING_ARGS = {
+    ("claude", "list"): {"--watch", "-w"},
+    ("claude", "capture"): {"--follow", "-f"},
+    ("claude", "signal"): {"wait", "--wait", "-w"},
+}
+
+# Arguments a command needs to run without a confirmation prompt
+NO_PROMPT_ARGS = {
+    ("claude", "kill-all"): {"--force", "-f"},
+    ("tickets", "delete"): {"--force", "-f"},
+}
+
+# Group options that take a value (so the value isn't mistaken for the command)
+GROUP_VALUE_OPTIONS = {"--backend"}
+
+
+class Unavailable(Exception):
+    """Raised when the daemon can't be reached (so nothing was sent)."""
+
+
+def command_name(argv: list[str]) -> str | None:
+    """Return the subcommand in a CLI's arguments, skipping group options."""
+    args = iter(argv)
+    for arg in args:
+        if arg in GROUP_VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+def served(cli: str, argv: list[str]) -> bool:
+    """Whether the daemon can run a command (quick and non-interactive)."""
+    command = command_name(argv)
+    if command not in SERVED.get(cli, ()):
+        return False
+    args = set(argv)
+    if args & BLOCKING_ARGS.get((cli, command), set()):
+        return False
+    required = NO_PROMPT_ARGS.get((cli, command))
+    return not required or bool(args & required)
+
+
+def reads_stdin(cli: str, argv: list[str]) -> bool:
+    """Whether a command consumes stdin (which is then sent along)."""
+    command = command_name(argv)
+    return cli == "tickets" and (command == "batch" or (command == "resolve" and "--stdin" in argv))
+
+
+def send(request: dict, socket_path: Path = SOCKET_PATH) -> dict:
+    """Send one request to the daemon and return its reply.
+
+    Raises:
+        Unavailable: If the daemon can't be reached.
+        OSError: If the connection fails after the request was sent.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(socket_path))
+        except OSError as e:
+            raise Unavailable(str(e))
+        # Once connected, commands may take as long as they take
+        sock.settimeout(None)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while chunk := sock.recv(65536):
+            chunks.append(chunk)
+    if not chunks:
+        raise ConnectionError("prophetd closed the connection without replying")
+    return json.loads(b"".join(chunks))
+
+
+def run(cli: str, argv: list[str], socket_path: Path = SOCKET_PATH) -> dict:
+    """Run a CLI command in the daemon.
+
+    Returns:
+        A dict with the command's "stdout", "stderr" and "exit_code".
+    """
+    return send({
+        "op": "run",
+        "cli": cli,
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "stdin": sys.stdin.read() if reads_stdin(cli, argv) else None,
+    }, socket_path)
+
+
+def run_direct(argv: list[str]):
+    """Replace this process with the CLI itself.
+
+    The wrappers start this client with the CLI's synced venv interpreter,
+    from the CLI's directory.
+    """
+    os.execv(sys.executable, [sys.executable, "main.py", *argv])
+
+
+def main():
+    cli, argv = sys.argv[1], sys.argv[2:]
+    if served(cli, argv) and SOCKET_PATH.exists():
+        try:
+            reply = run(cli, argv)
+        except Unavailable:
+            pass  # e.g. a stale socket left by a daemon that died
+        except (OSError, ValueError) as e:
+            # The command may have run, so don't run it a second time
+            sys.stderr.write(f"Error: prophetd failed during the command: {e}\n")
+            sys.exit(1)
+        else:
+            sys.stdout.write(reply["stdout"])
+            sys.stderr.write(reply["stderr"])
+            sys.exit(reply["exit_code"])
+    run_direct(argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+"""Roles and directives for Claude workers."""
+
+import copy
+import json
+import re
+import time
+from pathlib import Path
+
+# Role and directive definitions live in context-cli
+CONTEXT_DIR = Path(__file__).resolve().parent.parent / "context-cli"
+ROLES_DIR = CONTEXT_DIR / "roles"
+DIRECTIVES_DIR = CONTEXT_DIR / "directives"
+
+
+class ContextError(Exception):
+    """Raised when a role or directive cannot be loaded."""
+
+
+CACHE_PATH = CONTEXT_DIR / ".cache" / "compiled.json"
+CACHE_VERSION = 3
+
+# Directives without a priority; lower priorities are trimmed first
+DEFAULT_PRIORITY = 50
+
+# Words and single punctuation marks, the units of the token estimate
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# A file modified this close to when it was cached could change again
+# without its mtime moving (coarse filesystem timestamps), so it is
+# re-hashed rather than trusted by stat alone
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class CompiledCache:
+    """Parsed roles and directives and rendered role contexts, on disk.
+
+    Each file is recorded with its mtime, size and SHA-256. A file whose
+    stat is unchanged is trusted; one whose stat changed is re-hashed, and
+    re-parsed only if its content did change. A rendered role is reused
+    while every file it was built from (including directives that were
+    missing) is unchanged, so `show` needs neither YAML nor a re-render.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.dirty = False
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") != CACHE_VERSION:
+            data = {"version": CACHE_VERSION, "files": {}, "rendered": {}}
+        self.files = data["files"]
+        self.rendered = data["rendered"]
+
+    def file_hash(self, path: Path) -> str | None:
+        """Return a file's content hash, or None if it doesn't exist."""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        entry = self.files.get(str(path))
+        if (entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+                and stat.st_mtime_ns < entry["checked_ns"] - RACY_WINDOW_NS):
+            return entry["sha256"]
+
+        import hashlib
+
+        content = path.read_bytes()
+        sha256 = hashlib.sha256(content).hexdigest()
+        if not entry or entry["sha256"] != sha256:
+            entry = {"sha256": sha256, "data": parse_yaml(content, path)}
+        entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size, checked_ns=time.time_ns())
+        self.files[str(path)] = entry
+        self.dirty = True
+        return sha256
+
+    def parsed(self, path: Path) -> dict:
+        """Return a file's parsed YAML (parsing only if it changed)."""
+        if self.file_hash(path) is None:
+            raise FileNotFoundError(path)
+        return self.files[str(path)]["data"]
+
+    def get_rendered(self, role_path: Path) -> dict | None:
+        """Return a role's cached bundle if none of its files changed."""
+        entry = self.rendered.get(str(role_path))
+        if entry and all(self.file_hash(Path(dep)) == sha256 for dep, sha256 in entry["deps"].items()):
+            return entry["bundle"]
+        return None
+
+    def put_rendered(self, role_path: Path, bundle: dict, deps: list[Path]):
+        """Record a role's bundle and the files it was built from."""
+        self.rendered[str(role_path)] = {
+            "bundle": bundle,
+            "deps": {str(dep): self.file_hash(dep) for dep in deps},
+        }
+        self.dirty = True
+
+    def save(self):
+        """Write the cache back if it changed (best effort)."""
+        if not self.dirty:
+            return
+        from .ticket_store import write_json_atomic
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.path, {"version": CACHE_VERSION, "files": self.files, "rendered": self.rendered})
+        except (OSError, TypeError):
+            return
+        self.dirty = False
+
+
+_compiled_cache = None
+
+
+def compiled_cache() -> CompiledCache:
+    """Return the process's compiled cache, loading it on first use.
+
+    Long-lived processes such as prophetd keep it in memory; entries are
+    re-validated against the files on every use.
+    """
+    global _compiled_cache
+    if _compiled_cache is None or _compiled_cache.path != CACHE_PATH:
+        _compiled_cache = CompiledCache(CACHE_PATH)
+    return _compiled_cache
+
+
+def parse_yaml(content: bytes, path: Path) -> dict:
+    """Parse YAML with the C loader when PyYAML was built with libyaml."""
+    # Imported on first use: yaml is the slowest import of the CLIs
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        return yaml.load(content, Loader=loader)
+    except yaml.YAMLError as e:
+        raise ContextError(f"Invalid YAML in {path}: {e}")
+
+
+def load_yaml(path: Path) -> dict:
+    """Load a YAML file (parsed once per content change)."""
+    cache = compiled_cache()
+    data = cache.parsed(path)
+    cache.save()
+    # Callers get their own copy to modify
+    return copy.deepcopy(data)
+
+
+def load_role(name: str) -> dict:
+    """Load a role by name."""
+    path = ROLES_DIR / f"{name}.yaml"
+    if not path.exists():
+        raise ContextError(f"Role not found: {name}")
+    return load_yaml(path)
+
+
+def load_directive(name: str) -> dict:
+    """Load a directive by name."""
+    path = DIRECTIVES_DIR / f"{name}.yaml"
+    if not path.exists():
+        raise ContextError(f"Directive not found: {name}")
+    return load_yaml(path)
+
+
+def get_all_roles() -> list[dict]:
+    """Get all available roles."""
+    return [load_yaml(path) for path in ROLES_DIR.glob("*.yaml")]
+
+
+def get_all_directives() -> list[dict]:
+    """Get all available directives."""
+    return [load_yaml(path) for path in DIRECTIVES_DIR.glob("*.yaml")]
+
+
+def resolve_role(name: str, deps: list[Path] | None = None) -> dict:
+    """Load a role with everything it inherits through `extends:`.
+
+    Parent roles are applied first, in the order listed, and the role's
+    own fields override theirs. Prompts are layered (ancestors first),
+    permissions and directives are merged without duplicates, and a role
+    reached through several paths is only applied once.
+
+    Args:
+        name: Role name.
+        deps: Optional list extended with every role file read.
+
+    Returns:
+        The merged role, with "extends" listing all ancestors in order.
+    """
+    merged = {"prompt": "", "directives": [], "permissions": {"allow": [], "deny": []}, "extends": []}
+    applied = set()
+
+    def apply(role_name: str, stack: tuple[str, ...]):
+        if role_name in stack:
+            raise ContextError(f"Role inheritance cycle: {' -> '.join(stack + (role_name,))}")
+        if role_name in applied:
+            return
+        if deps is not None:
+            deps.append(ROLES_DIR / f"{role_name}.yaml")
+        role = load_role(role_name)
+        parents = role.get("extends") or []
+        for parent in [parents] if isinstance(parents, str) else parents:
+            apply(parent, stack + (role_name,))
+        applied.add(role_name)
+        if role_name != name:
+            merged["extends"].append(role_name)
+
+        for key, value in role.items():
+            if key in ("extends", "prompt", "directives", "permissions"):
+                continue
+            merged[key] = value
+        prompt = role.get("prompt", "")
+        if prompt:
+            merged["prompt"] = f"{merged['prompt'].rstrip()}\n\n{prompt}" if merged["prompt"] else prompt
+        merge_unique(merged["directives"], role.get("directives", []))
+        for kind in ("allow", "deny"):
+            merge_unique(merged["permissions"][kind], role.get("permissions", {}).get(kind, []))
+
+    apply(name, ())
+    return merged
+
+
+def merge_unique(target: list, items: list):
+    """Append the items not already in target, keeping their order."""
+    for item in items:
+        if item not in target:
+            target.append(item)
+
+
+def resolve_directives(names: list[str], warn, deps: list[Path] | None = None) -> list[dict]:
+    """Expand directives with the ones they `requires:`, without duplicates.
+
+    The directives form a DAG: each one comes after everything it
+    requires, and each appears once however many times it is reached.
+
+    Args:
+        names: Directive names, in the order they were listed.
+        warn: Callable receiving a message for each directive that could
+              not be loaded (it is skipped).
+        deps: Optional list extended with every directive file looked up.
+
+    Returns:
+        The loaded directives, in order.
+    """
+    resolved = []
+    visited = set()
+
+    def visit(directive_name: str, stack: tuple[str, ...]):
+        if directive_name in stack:
+            raise ContextError(f"Directive dependency cycle: {' -> '.join(stack + (directive_name,))}")
+        if directive_name in visited:
+            return
+        visited.add(directive_name)
+        if deps is not None:
+            deps.append(DIRECTIVES_DIR / f"{directive_name}.yaml")
+        try:
+            directive = load_directive(directive_name)
+        except ContextError as e:
+            warn(str(e))
+            return
+        requires = directive.get("requires") or []
+        for required in [requires] if isinstance(requires, str) else requires:
+            visit(required, stack + (directive_name,))
+        resolved.append(directive)
+
+    for directive_name in names:
+        visit(directive_name, ())
+    return resolved
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate how many tokens a text costs in a prompt.
+
+    A rough count without a tokenizer: one token per punctuation mark and
+    per started 6 characters of each word. Good enough to compare roles
+    and directives and to keep contexts within a budget.
+    """
+    return sum((len(piece) + 5) // 6 for piece in TOKEN_PATTERN.findall(text))
+
+
+def role_bundle(name: str, warn=None, budget: int | None = None) -> dict:
+    """Return a role's compiled context bundle.
+
+    The bundle is the rendered context of the role, its ancestors and
+    their resolved directives, with a content hash that only changes when
+    the text does. It is cached, token estimates included, until one of
+    its source files changes.
+
+    Args:
+        name: Role name.
+        warn: Optional callable receiving a message for each directive
+              that could not be loaded (missing directives are skipped).
+        budget: Optional token budget the bundle is trimmed to (see
+                trim_bundle).
+
+    Returns:
+        A dict with the role name, "text", "hash", "tokens", "extends",
+        "directives", "sections" (the role part and each directive with
+        its tokens and priority), "warnings" and "dropped".
+    """
+    role_path = ROLES_DIR / f"{name}.yaml"
+    cache = compiled_cache()
+    bundle = cache.get_rendered(role_path)
+    if bundle is None:
+        deps = []
+        bundle = build_bundle(name, deps)
+        cache.put_rendered(role_path, bundle, deps)
+        cache.save()
+    if warn:
+        for message in bundle["warnings"]:
+            warn(message)
+    if budget is not None:
+        bundle = trim_bundle(bundle, budget)
+    return bundle
+
+
+def render_role(name: str, warn=None, budget: int | None = None) -> str:
+    """Render the combined context for a role.
+
+    Args:
+        name: Role name.
+        warn: Optional callable receiving a message for each directive
+              that could not be loaded (missing directives are skipped).
+        budget: Optional token budget (see trim_bundle).
+
+    Returns:
+        The role prompt followed by all of its directives.
+    """
+    return role_bundle(name, warn, budget)["text"]
+
+
+def build_bundle(name: str, deps: list[Path]) -> dict:
+    """Render a role from its YAML (see role_bundle, which caches this)."""
+    warnings = []
+    role = resolve_role(name, deps)
+    directives = resolve_directives(role["directives"], warnings.append, deps)
+
+    role_text = "\n".join([
+        f"# Role: {role['name']}",
+        f"# {role.get('description', 'No description')}",
+        "",
+        "## Role Context",
+        "",
+        role["prompt"],
+        "",
+    ])
+    sections = {
+        "role": {"text": role_text, "tokens": estimate_tokens(role_text)},
+        # The separator is there as soon as the role lists directives
+        "separator": bool(role["directives"]),
+        "directives": [],
+    }
+    sections["directives"] = [directive_section(directive) for directive in directives]
+
+    return compose_bundle({
+        "role": name,
+        "extends": role["extends"],
+        "sections": sections,
+        "warnings": warnings,
+        "dropped": [],
+    }, sections["directives"])
+
+
+def directive_section(directive: dict) -> dict:
+    """Render a directive's part of a bundle, with its token estimate."""
+    text = "\n".join([f"## Directive: {directive['name']}", "", directive.get("content", ""), ""])
+    requires = directive.get("requires") or []
+    return {
+        "name": directive["name"],
+        "text": text,
+        "tokens": estimate_tokens(text),
+        "priority": directive.get("priority", DEFAULT_PRIORITY),
+        "requires": [requires] if isinstance(requires, str) else requires,
+    }
+
+
+def context_stats(role_names: list[str] | None = None) -> dict:
+    """Estimate the tokens of roles, their bundles and all directives.
+
+    Args:
+        role_names: Roles to include (default: all of them).
+
+    Returns:
+        A dict with "roles" (name, hash, "tokens" of the bundle,
+        "role_tokens" of its own part, directive names) and "directives"
+        (name, tokens, priority), each sorted by name.
+    """
+    if role_names is None:
+        role_names = sorted(path.stem for path in ROLES_DIR.glob("*.yaml"))
+    roles = []
+    for name in role_names:
+        bundle = role_bundle(name)
+        roles.append({
+            "name": name,
+            "hash": bundle["hash"],
+            "tokens": bundle["tokens"],
+            "role_tokens": bundle["sections"]["role"]["tokens"],
+            "directives": bundle["directives"],
+        })
+    directives = []
+    for directive in sorted(get_all_directives(), key=lambda d: d.get("name", "")):
+        section = directive_section(directive)
+        directives.append({key: section[key] for key in ("name", "tokens", "priority")})
+    return {"roles": roles, "directives": directives}
+
+
+def compose_bundle(bundle: dict, directives: list[dict]) -> dict:
+    """Fill in a bundle's text, hash and tokens from the directives kept."""
+    import hashlib
+
+    sections = bundle["sections"]
+    chunks = [sections["role"]["text"]]
+    if sections["separator"]:
+        chunks += ["---", ""]
+    chunks += [directive["text"] for directive in directives]
+    text = "\n".join(chunks)
+    return {
+        **bundle,
+        "text": text,
+        "hash": hashlib.sha256(text.encode()).hexdigest()[:16],
+        "tokens": estimate_tokens(text),
+        "directives": [directive["name"] for directive in directives],
+    }
+
+
+def trim_bundle(bundle: dict, budget: int) -> dict:
+    """Drop directives from a bundle until it fits a token budget.
+
+    The lowest priority directives go first (the later listed one on a
+    tie), along with any kept directive that requires them. The role's
+    own prompt is never dropped, so the result can still be over budget.
+
+    Returns:
+        The trimmed bundle, with the dropped directive names in "dropped".
+    """
+    kept = list(bundle["sections"]["directives"])
+    dropped = []
+    while bundle["tokens"] > budget and kept:
+        victim = min(reversed(kept), key=lambda directive: directive["priority"])
+        doomed = {victim["name"]}
+        # Anything requiring a dropped directive goes with it
+        changed = True
+        while changed:
+            changed = False
+            for directive in kept:
+                if directive["name"] not in doomed and doomed & set(directive["requires"]):
+                    doomed.add(directive["name"])
+                    changed = True
+        dropped += [directive["name"] for directive in kept if directive["name"] in doomed]
+        kept = [directive for directive in kept if directive["name"] not in doomed]
+        bundle = compose_bundle({**bundle, "dropped": dropped}, kept)
+    return bundle
+
+
+def role_settings(name: str) -> dict:
+    """Build Claude Code settings.json data from a role's permissions."""
+    return {"permissions": resolve_role(name)["permissions"]}
+
+
+def validate_role(role: dict) -> list[str]:
+    """Check a role's required fields and directive references.
+
+    Returns:
+        A list of error messages (empty if the role is valid).
+    """
+    errors = []
+
+    if "name" not in role:
+        errors.append("Missing 'name' field")
+    if "prompt" not in role:
+        errors.append("Missing 'prompt' field")
+
+    parents = role.get("extends") or []
+    for parent in [parents] if isinstance(parents, str) else parents:
+        try:
+            resolve_role(parent)
+        except ContextError as e:
+            errors.append(str(e))
+
+    for directive_name in role.get("directives", []):
+        path = DIRECTIVES_DIR / f"{directive_name}.yaml"
+        if not path.exists():
+            errors.append(f"Directive not found: {directive_name}")
+
+    return errors
@@ -0,0 +1,227 @@
+"""prophetd: serve claude, tickets and context commands from one warm process.
+
+Every CLI call normally pays for `uv run`, the Python and Click imports
+and cold disk reads. The daemon loads the three CLIs once and runs their
+commands in process for the thin client (mcbs/client.py) over a Unix
+socket, keeping state hot between calls: the ticket stores (open SQLite
+connection, cached ID index), parsed roles and directives, and a tmux
+control-mode connection. Worker sessions and pending signals are not
+cached: tmux and workers outside the daemon change them, so they are read
+on each request (one list-sessions over the control-mode connection, a
+directory of small files).
+
+Commands run one at a time, each with the client's arguments, working
+directory, environment and (for commands that read it) stdin, and their
+output is sent back when they finish.
+
+Usage:
+    ./prophetd start     # in the background (logs to logs/prophetd.log)
+    ./prophetd run       # in the foreground
+    ./prophetd status
+    ./prophetd stop
+"""
+
+import importlib.util
+import io
+import json
+import os
+import signal
+import socketserver
+import subprocess
+import sys
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+import click
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Make the mcbs package importable when run as a script
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from mcbs import tickets  # noqa: E402
+from mcbs.client import SOCKET_PATH, Unavailable, send  # noqa: E402
+
+LOG_PATH = PROJECT_ROOT / "logs" / "prophetd.log"
+START_TIMEOUT = 10.0
+
+CLI_NAMES = ("claude", "context", "tickets")
+
+
+class Stop(BaseException):
+    """Raised by the SIGTERM handler to stop serving (not caught by commands)."""
+
+
+def load_cli(name: str):
+    """Import a CLI's main.py as a module named <name>_cli."""
+    path = PROJECT_ROOT / f"{name}-cli" / "main.py"
+    spec = importlib.util.spec_from_file_location(f"{name}_cli", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Daemon:
+    """The loaded CLIs and the state shared by the commands they run."""
+
+    def __init__(self, control_mode: bool = True):
+        self.modules = {name: load_cli(name) for name in CLI_NAMES}
+        if control_mode:
+            # All tmux commands go through one persistent connection
+            self.modules["claude"].enable_control_mode()
+        self.started = time.time()
+        self.served = 0
+
+    def handle(self, request: dict) -> dict:
+        """Dispatch a request by its "op"."""
+        op = request.get("op")
+        if op == "run":
+            return self.run(request)
+        if op == "ping":
+            return {"pid": os.getpid(), "started": self.started, "served": self.served}
+        raise ValueError(f"Unknown op: {op!r}")
+
+    def run(self, request: dict) -> dict:
+        """Run one CLI command as if it had been started by the client."""
+        cli = self.modules[request["cli"]].cli
+        stdout, stderr = io.StringIO(), io.StringIO()
+        saved_env, saved_cwd, saved_stdin = dict(os.environ), os.getcwd(), sys.stdin
+        os.environ.clear()
+        os.environ.update(request["env"])
+        # Read from the environment at import; a previous command's --backend mustn't stick
+        tickets.BACKEND = request["env"].get("TICKETS_BACKEND", "json")
+        exit_code = 0
+        try:
+            os.chdir(request["cwd"])
+            sys.stdin = io.StringIO(request.get("stdin") or "")
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    cli.main(args=request["argv"], prog_name=request["cli"])
+                except SystemExit as e:
+                    if isinstance(e.code, str):
+                        stderr.write(e.code + "\n")
+                        exit_code = 1
+                    else:
+                        exit_code = e.code or 0
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+        finally:
+            sys.stdin = saved_stdin
+            os.chdir(saved_cwd)
+            os.environ.clear()
+            os.environ.update(saved_env)
+            self.served += 1
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            reply = self.server.daemon.handle(json.loads(self.rfile.readline()))
+        except (ValueError, KeyError) as e:
+            reply = {"stdout": "", "stderr": f"prophetd: bad request: {e}\n", "exit_code": 2}
+        self.wfile.write(json.dumps(reply).encode())
+
+
+class Server(socketserver.UnixStreamServer):
+    """Serves one connection at a time, so commands never interleave."""
+
+    def __init__(self, daemon: Daemon, socket_path: Path):
+        self.daemon = daemon
+        super().__init__(str(socket_path), RequestHandler)
+        os.chmod(socket_path, 0o600)
+
+
+def ping(socket_path: Path = SOCKET_PATH) -> dict | None:
+    """Return the running daemon's status, or None if it isn't running."""
+    try:
+        return send({"op": "ping"}, socket_path)
+    except (Unavailable, OSError, ValueError):
+        return None
+
+
+def serve(socket_path: Path = SOCKET_PATH):
+    """Run the daemon in the foreground until SIGTERM or Ctrl-C."""
+    if ping(socket_path):
+        raise click.ClickException("prophetd is already running")
+    socket_path.unlink(missing_ok=True)  # Left by a daemon that died
+
+    def on_sigterm(signum, frame):
+        raise Stop()
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    server = Server(Daemon(), socket_path)
+    click.echo(f"prophetd {os.getpid()} listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, Stop):
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+
+
+@click.group()
+def main():
+    """prophetd - keep the claude, tickets and context CLIs warm."""
+
+
+@main.command("run")
+def run_foreground():
+    """Run the daemon in the foreground."""
+    serve()
+
+
+@main.command()
+def start():
+    """Start the daemon in the background."""
+    if ping():
+        click.echo("prophetd is already running")
+        return
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOG_PATH, "a") as log:
+        subprocess.Popen(
+            [sys.executable, __file__, "run"],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = ping()
+        if status:
+            click.echo(f"prophetd started (pid {status['pid']})")
+            return
+        time.sleep(0.05)
+    raise click.ClickException(f"prophetd did not start, see {LOG_PATH}")
+
+
+@main.command()
+def status():
+    """Show whether the daemon is running."""
+    info = ping()
+    if not info:
+        click.echo("prophetd is not running")
+        raise SystemExit(1)
+    uptime = int(time.time() - info["started"])
+    click.echo(f"prophetd running (pid {info['pid']}, up {uptime}s, {info['served']} commands served)")
+
+
+@main.command()
+def stop():
+    """Stop the daemon."""
+    info = ping()
+    if not info:
+        click.echo("prophetd is not running")
+        return
+    os.kill(info["pid"], signal.SIGTERM)
+    deadline = time.monotonic() + START_TIMEOUT
+    while ping() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    click.echo("prophetd stopped")
+
+
+if __name__ == "__main__":
+    main()
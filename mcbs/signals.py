@@ -0,0 +1,113 @@
+"""Signals between workers and Prophet: questions and their responses.
+
+A worker posts a question to signals/waiting/<session>.json and blocks in
+wait() until Prophet's respond() writes signals/responses/<session>.json.
+Signals are written atomically, so a reader never sees half a file, and
+wait() wakes on the write itself (see mcbs.watch) rather than polling.
+"""
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .ticket_store import TIMESTAMP_FORMAT, write_json_atomic
+from .watch import wait_for_file
+
+SIGNALS_DIR = Path(__file__).resolve().parent.parent / "signals"
+
+
+class SignalError(Exception):
+    """Raised when a signal is missing or unreadable."""
+
+
+def waiting_path(session: str) -> Path:
+    """Return the path of a session's waiting signal."""
+    return SIGNALS_DIR / "waiting" / f"{session}.json"
+
+
+def response_path(session: str) -> Path:
+    """Return the path of the response to a session."""
+    return SIGNALS_DIR / "responses" / f"{session}.json"
+
+
+def read_signal(path: Path) -> dict:
+    """Load a signal file."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise SignalError(f"No signal: {path.stem}")
+    except json.JSONDecodeError as e:
+        raise SignalError(f"Unreadable signal {path}: {e}")
+
+
+def write_signal(path: Path, signal: dict):
+    """Atomically write a signal file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(path, signal)
+
+
+def post(session: str, message: str, ticket_id: str | None = None, kind: str = "question") -> dict:
+    """Record that a session is waiting for Prophet.
+
+    Any earlier response to the session is removed, so wait() only
+    returns the answer to this question.
+    """
+    signal = {
+        "session": session,
+        "ticket_id": ticket_id,
+        "timestamp": datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT),
+        "message": message,
+        "type": kind,
+    }
+    response_path(session).unlink(missing_ok=True)
+    write_signal(waiting_path(session), signal)
+    return signal
+
+
+def respond(session: str, response: str, sender: str = "prophet") -> dict:
+    """Answer a waiting session and clear its waiting signal.
+
+    Returns:
+        The response signal, carrying the ticket ID of the question.
+    """
+    waiting = read_signal(waiting_path(session))
+    reply = {
+        "session": session,
+        "ticket_id": waiting.get("ticket_id"),
+        "timestamp": datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT),
+        "response": response,
+        "from": sender,
+    }
+    write_signal(response_path(session), reply)
+    waiting_path(session).unlink(missing_ok=True)
+    return reply
+
+
+def wait(session: str, timeout: float | None = None) -> dict | None:
+    """Block until the response to a session arrives, and consume it.
+
+    The response file is removed once read, so a later wait() can't
+    return the same answer again.
+
+    Returns:
+        The response signal, or None if timeout (seconds) expired first.
+    """
+    path = response_path(session)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not wait_for_file(path, timeout):
+        return None
+    reply = read_signal(path)
+    path.unlink(missing_ok=True)
+    return reply
+
+
+def list_waiting() -> list[dict]:
+    """Return the waiting signals, oldest first."""
+    signals = []
+    for path in (SIGNALS_DIR / "waiting").glob("*.json"):
+        try:
+            signals.append(read_signal(path))
+        except SignalError:
+            continue
+    return sorted(signals, key=lambda signal: signal.get("timestamp", ""))
@@ -0,0 +1,709 @@
+"""Storage backends for tickets.
+
+JsonStore keeps one small tickets/<id>.json state file per ticket, with
+its history in an append-only tickets/<id>.history.jsonl event log.
+SqliteStore keeps everything in tickets/tickets.db (a tickets table
+indexed on status, assignee and update time, plus an events table), so
+filtered listings and partial ID lookups don't have to read every ticket.
+JsonStore resolves partial IDs against a sorted ID index
+(tickets/.index/ids) instead of scanning the directory.
+
+History is never rewritten: append() adds the new events to the log and
+stores the ticket's materialized state, so adding a comment costs the same
+however long the history is.
+
+Each store also maintains a summary of the tickets (counts per status and
+worker, open tickets' ages, time to done), adjusted by every write so
+that statistics never need to read every ticket.
+
+Both are safe for concurrent writers: read-modify-write cycles run under
+locked() (a per-ticket flock, or an immediate SQLite transaction), JSON
+files are replaced atomically, and save() can check the stored version so
+a writer that skipped the lock can't silently overwrite newer data.
+"""
+
+import bisect
+import fcntl
+import itertools
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Lock name for the JSON store's summary and ID index (ticket IDs are hex,
+# so no clash)
+INDEX_LOCK = ".index"
+
+
+class TicketError(Exception):
+    """Raised when a ticket cannot be found or modified."""
+
+
+class ConflictError(TicketError):
+    """Raised when a ticket changed since it was loaded."""
+
+
+def check_version(ticket_id: str, current: int | None, expected: int):
+    """Raise ConflictError unless the stored version is the expected one.
+
+    A missing ticket counts as version 0, as do tickets written before
+    versions were recorded.
+    """
+    if (current or 0) != expected:
+        raise ConflictError(
+            f"Ticket {ticket_id} was modified concurrently (version {current}, expected {expected})"
+        )
+
+
+def write_atomic(path: Path, text: str):
+    """Write text to a temporary file, then rename it over path.
+
+    Readers see either the old or the new content, never a partial write.
+    """
+    import tempfile
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        # mkstemp creates the file 0600; keep the usual permissions
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_atomic(path: Path, data):
+    """Atomically write data as indented JSON."""
+    write_atomic(path, json.dumps(data, indent=2))
+
+
+def event_lines(events: list[dict]) -> str:
+    """Serialize events as JSONL."""
+    return "".join(json.dumps(event) + "\n" for event in events)
+
+
+def page(events, offset: int = 0, limit: int | None = None) -> list[dict]:
+    """Return a slice of an event iterator without materializing the rest."""
+    stop = None if limit is None else offset + limit
+    return list(itertools.islice(events, offset, stop))
+
+
+def ambiguous(prefix: str, ids: list[str]) -> TicketError:
+    """Build the error for a partial ID matching several tickets."""
+    return TicketError(f"Ambiguous ID '{prefix}', matches: {', '.join(ids)}")
+
+
+def prefix_matches(ids: list[str], prefix: str) -> list[str]:
+    """Return the IDs in a sorted list that start with prefix (by bisection)."""
+    start = bisect.bisect_left(ids, prefix)
+    end = bisect.bisect_left(ids, prefix + "\uffff", start)
+    return ids[start:end]
+
+
+def unique_match(prefix: str, matches: list[str]) -> str:
+    """Return the single ID a partial ID matched, or raise TicketError."""
+    if not matches:
+        raise TicketError(f"Ticket not found: {prefix}")
+    if len(matches) > 1:
+        raise ambiguous(prefix, matches)
+    return matches[0]
+
+
+def summarize(ticket: dict) -> dict:
+    """Return a ticket without its history (as returned by find)."""
+    return {k: v for k, v in ticket.items() if k != "history"}
+
+
+def parse_timestamp(timestamp: str) -> datetime:
+    """Parse a ticket timestamp (UTC, second precision)."""
+    return datetime.strptime(timestamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def empty_summary() -> dict:
+    """Return the summary of a store with no tickets."""
+    return {"by_status": {}, "by_worker": {}, "open_since": {}, "done_count": 0, "done_seconds": 0}
+
+
+def tally(summary: dict, ticket: dict | None, sign: int = 1):
+    """Add a ticket's contribution to a summary, or remove it with sign=-1.
+
+    A write removes the old state's contribution and adds the new one's,
+    so the summary stays current without looking at other tickets.
+    """
+    if ticket is None:
+        return
+
+    def bump(counts, key):
+        counts[key] = counts.get(key, 0) + sign
+        if not counts[key]:
+            del counts[key]
+
+    bump(summary["by_status"], ticket["status"])
+    if ticket.get("assigned_to"):
+        bump(summary["by_worker"], ticket["assigned_to"])
+    if ticket["status"] == "open":
+        if sign > 0:
+            summary["open_since"][ticket["id"]] = ticket["created_at"]
+        else:
+            summary["open_since"].pop(ticket["id"], None)
+    elif ticket["status"] == "done":
+        # Tickets finished before done_at was recorded fall back to updated_at
+        done_at = ticket.get("done_at") or ticket["updated_at"]
+        elapsed = parse_timestamp(done_at) - parse_timestamp(ticket["created_at"])
+        summary["done_count"] += sign
+        summary["done_seconds"] += sign * int(elapsed.total_seconds())
+
+
+class JsonStore:
+    """One JSON file per ticket."""
+
+    name = "json"
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._local = threading.local()
+        self._ids_cache = None
+        self._batch = None
+
+    def path(self, ticket_id: str) -> Path:
+        return self.directory / f"{ticket_id}.json"
+
+    def log_path(self, ticket_id: str) -> Path:
+        return self.directory / f"{ticket_id}.history.jsonl"
+
+    def summary_path(self) -> Path:
+        return self.directory / ".index" / "summary.json"
+
+    def ids_path(self) -> Path:
+        return self.directory / ".index" / "ids"
+
+    @property
+    def _held(self) -> set:
+        """Locks held by the calling thread.
+
+        A re-entrant batch() or recording() call must skip the flock its
+        thread already holds: flock on a second open of the lock file
+        would wait on that lock and deadlock. Only the holding thread may
+        skip it, so the set is per thread.
+        """
+        if not hasattr(self._local, "held"):
+            self._local.held = set()
+        return self._local.held
+
+    @contextmanager
+    def locked(self, ticket_id: str):
+        """Hold an exclusive per-ticket lock (re-entrant within a thread)."""
+        if ticket_id in self._held:
+            yield
+            return
+        lock_dir = self.directory / ".locks"
+        lock_dir.mkdir(parents=True, exist_ok=True)
+        with open(lock_dir / f"{ticket_id}.lock", "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            self._held.add(ticket_id)
+            try:
+                yield
+            finally:
+                self._held.discard(ticket_id)
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def resolve(self, prefix: str) -> str:
+        """Resolve a partial ID to a full ticket ID."""
+        return self.resolve_many([prefix])[prefix]
+
+    def resolve_many(self, prefixes) -> dict[str, str]:
+        """Resolve several partial IDs, each by bisecting the sorted ID index.
+
+        Only a prefix the index doesn't know falls back to a directory
+        scan, so tickets copied in by hand are still found.
+        """
+        ids = self._ids()
+        resolved = {}
+        for prefix in prefixes:
+            matches = prefix_matches(ids, prefix)
+            if not matches:
+                matches = sorted(p.stem for p in self.directory.glob(f"{prefix}*.json"))
+            resolved[prefix] = unique_match(prefix, matches)
+        return resolved
+
+    def load(self, ticket_id: str, history: bool = True) -> dict:
+        """Load a ticket by full ID, with or without its history."""
+        ticket = self._read_state(ticket_id)
+        if history:
+            ticket.setdefault("history", list(self._iter_history(ticket_id)))
+        else:
+            ticket.pop("history", None)
+        return ticket
+
+    def history(self, ticket_id: str, offset: int = 0, limit: int | None = None) -> list[dict]:
+        """Read a page of a ticket's history, streaming the log."""
+        state = self._read_state(ticket_id)
+        if "history" in state:
+            return page(iter(state["history"]), offset, limit)
+        return page(self._iter_history(ticket_id), offset, limit)
+
+    def append(self, ticket: dict, events: list[dict], expected_version: int | None = None):
+        """Append events to a ticket's log and store its new state.
+
+        Costs O(len(events)) regardless of the history length.
+        """
+        state = self._read_state(ticket["id"])
+        if expected_version is not None:
+            check_version(ticket["id"], state.get("version", 0), expected_version)
+        if "history" in state:
+            # Ticket from before event logs: move its history out first
+            write_atomic(self.log_path(ticket["id"]), event_lines(state["history"]))
+        with open(self.log_path(ticket["id"]), "a") as f:
+            f.write(event_lines(events))
+            f.flush()
+            os.fsync(f.fileno())
+        self._commit(ticket["id"], state, ticket)
+
+    def save(self, ticket: dict, expected_version: int | None = None):
+        """Create or replace a ticket, including its whole history.
+
+        If expected_version is given, the stored ticket must still be at
+        that version (0 for a new ticket), otherwise ConflictError is raised.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            previous = self._read_state(ticket["id"])
+        except TicketError:
+            previous = None
+        if expected_version is not None:
+            check_version(ticket["id"], previous.get("version", 0) if previous else None, expected_version)
+        write_atomic(self.log_path(ticket["id"]), event_lines(ticket.get("history", [])))
+        self._commit(ticket["id"], previous, ticket)
+
+    def save_many(self, tickets):
+        """Create or replace several tickets, then rebuild the summary once."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.locked(INDEX_LOCK):
+            for ticket in tickets:
+                write_atomic(self.log_path(ticket["id"]), event_lines(ticket.get("history", [])))
+                write_json_atomic(self.path(ticket["id"]), summarize(ticket))
+            self.rebuild_summary()
+
+    def delete(self, ticket_id: str):
+        """Delete a ticket by full ID."""
+        self._commit(ticket_id, self._read_state(ticket_id), None)
+        self.log_path(ticket_id).unlink(missing_ok=True)
+
+    def find(self, status: str | None = None, assigned: str | None = None) -> list[dict]:
+        """Return tickets (without history) sorted by ID, optionally filtered."""
+        tickets = []
+        for ticket in self._iter_states():
+            if status and ticket["status"] != status:
+                continue
+            if assigned and ticket["assigned_to"] != assigned:
+                continue
+            tickets.append(summarize(ticket))
+        return tickets
+
+    def summary(self) -> dict:
+        """Return the maintained summary (built from the tickets on first use)."""
+        return self._read_summary() or self.rebuild_summary()
+
+    def rebuild_summary(self) -> dict:
+        """Re-derive the summary (and the ID index) from every ticket and store it."""
+        with self.locked(INDEX_LOCK):
+            summary = empty_summary()
+            for ticket in self._iter_states():
+                tally(summary, ticket)
+            self.summary_path().parent.mkdir(parents=True, exist_ok=True)
+            previous = self._read_summary()
+            summary["generation"] = (previous or {}).get("generation", 0) + 1
+            write_json_atomic(self.summary_path(), summary)
+            self._rebuild_ids()
+        return summary
+
+    @contextmanager
+    def batch(self):
+        """Group many writes, updating the summary and ID index once at the end.
+
+        Tickets are still locked one write at a time, and the index lock
+        is only taken at the end, so a batch can't deadlock with other
+        writers. If the summary was rebuilt during the batch it is rebuilt
+        again rather than having the batch's changes applied twice.
+        """
+        if self._batch is not None:
+            yield
+            return
+        base = self._read_summary()
+        self._batch = []
+        try:
+            yield
+        finally:
+            changes, self._batch = self._batch, None
+            with self.locked(INDEX_LOCK):
+                summary = self._read_summary()
+                if base is None or summary is None or summary.get("generation") != base.get("generation"):
+                    self.rebuild_summary()
+                else:
+                    self._apply_changes(summary, changes)
+
+    def all(self):
+        """Iterate over all tickets (with history) sorted by ID."""
+        for ticket in self._iter_states():
+            yield self.load(ticket["id"])
+
+    def _commit(self, ticket_id: str, previous: dict | None, current: dict | None):
+        """Write a ticket's state (or delete it, if current is None).
+
+        The summary and ID index are updated under the index lock, so a
+        rebuild never counts a state change that is then applied a second
+        time. Inside batch() the change is queued instead.
+        """
+        if self._batch is not None:
+            self._write_state(ticket_id, current)
+            self._batch.append((previous, current))
+            return
+        with self.locked(INDEX_LOCK):
+            summary = self._read_summary()
+            self._write_state(ticket_id, current)
+            if summary is None:
+                self.rebuild_summary()
+            else:
+                self._apply_changes(summary, [(previous, current)])
+
+    def _apply_changes(self, summary: dict, changes: list[tuple[dict | None, dict | None]]):
+        """Apply (previous, current) state pairs to the summary and ID index and store them.
+
+        The ID index is only rewritten when a ticket was added or removed.
+        """
+        ids = list(self._ids())
+        changed = False
+        for previous, current in changes:
+            tally(summary, previous, -1)
+            tally(summary, current)
+            if previous is None and current is not None and current["id"] not in prefix_matches(ids, current["id"]):
+                bisect.insort(ids, current["id"])
+                changed = True
+            if current is None and previous is not None and previous["id"] in prefix_matches(ids, previous["id"]):
+                ids.remove(previous["id"])
+                changed = True
+        write_json_atomic(self.summary_path(), summary)
+        if changed:
+            self._write_ids(ids)
+
+    def _read_summary(self) -> dict | None:
+        try:
+            with open(self.summary_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _ids(self) -> list[str]:
+        """Return the sorted ID index, re-reading it only when it was replaced."""
+        try:
+            stat = self.ids_path().stat()
+        except FileNotFoundError:
+            return self._rebuild_ids()
+        key = (stat.st_ino, stat.st_mtime_ns)
+        if self._ids_cache is None or self._ids_cache[0] != key:
+            self._ids_cache = (key, self.ids_path().read_text().split())
+        return self._ids_cache[1]
+
+    def _rebuild_ids(self) -> list[str]:
+        with self.locked(INDEX_LOCK):
+            ids = sorted(p.stem for p in self.directory.glob("*.json"))
+            self._write_ids(ids)
+        return ids
+
+    def _write_ids(self, ids: list[str]):
+        self.ids_path().parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.ids_path(), "".join(f"{ticket_id}\n" for ticket_id in ids))
+
+    def _write_state(self, ticket_id: str, ticket: dict | None):
+        if ticket is None:
+            self.path(ticket_id).unlink()
+        else:
+            write_json_atomic(self.path(ticket_id), summarize(ticket))
+
+    def _read_state(self, ticket_id: str) -> dict:
+        try:
+            with open(self.path(ticket_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise TicketError(f"Ticket not found: {ticket_id}")
+
+    def _iter_states(self):
+        for path in sorted(self.directory.glob("*.json")):
+            with open(path) as f:
+                yield json.load(f)
+
+    def _iter_history(self, ticket_id: str):
+        try:
+            f = open(self.log_path(ticket_id))
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                # A torn final line from an interrupted append is ignored
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+class SqliteStore:
+    """All tickets in one indexed SQLite database."""
+
+    name = "sqlite"
+
+    COLUMNS = ["id", "title", "body", "status", "assigned_to", "created_at", "updated_at", "done_at"]
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tickets (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            body TEXT NOT NULL DEFAULT '',
+            status TEXT NOT NULL,
+            assigned_to TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            done_at TEXT,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS tickets_status ON tickets (status);
+        CREATE INDEX IF NOT EXISTS tickets_assigned_to ON tickets (assigned_to);
+        CREATE INDEX IF NOT EXISTS tickets_updated_at ON tickets (updated_at);
+        CREATE TABLE IF NOT EXISTS events (
+            ticket_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            event TEXT NOT NULL,
+            PRIMARY KEY (ticket_id, seq)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS summary (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            data TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, directory: Path):
+        import sqlite3
+
+        self.directory = directory
+        directory.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: transactions are managed by transaction()
+        self.conn = sqlite3.connect(directory / "tickets.db", timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self._depth = 0
+        with self.transaction():
+            for statement in self.SCHEMA.split(";"):
+                if statement.strip():
+                    self.conn.execute(statement)
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in one write transaction (nested blocks join the outer one).
+
+        BEGIN IMMEDIATE takes the database write lock up front, so
+        concurrent read-modify-write cycles are serialized.
+        """
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._depth = 1
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self.conn.execute("COMMIT")
+        finally:
+            self._depth = 0
+
+    def locked(self, ticket_id: str):
+        """Serialize a read-modify-write of a ticket (a write transaction)."""
+        return self.transaction()
+
+    def batch(self):
+        """Group many writes into one transaction."""
+        return self.transaction()
+
+    def resolve(self, prefix: str) -> str:
+        """Resolve a partial ID to a full ticket ID (a primary-key range scan)."""
+        rows = self.conn.execute(
+            "SELECT id FROM tickets WHERE id >= ? AND id < ? ORDER BY id",
+            (prefix, prefix + "\uffff"),
+        ).fetchall()
+        return unique_match(prefix, [row["id"] for row in rows])
+
+    def resolve_many(self, prefixes) -> dict[str, str]:
+        """Resolve several partial IDs."""
+        return {prefix: self.resolve(prefix) for prefix in prefixes}
+
+    def load(self, ticket_id: str, history: bool = True) -> dict:
+        """Load a ticket by full ID, with or without its history."""
+        ticket = self._read_state(ticket_id)
+        if history:
+            ticket["history"] = self.history(ticket_id)
+        return ticket
+
+    def history(self, ticket_id: str, offset: int = 0, limit: int | None = None) -> list[dict]:
+        """Read a page of a ticket's history."""
+        rows = self.conn.execute(
+            "SELECT event FROM events WHERE ticket_id = ? ORDER BY seq LIMIT ? OFFSET ?",
+            (ticket_id, -1 if limit is None else limit, offset),
+        )
+        return [json.loads(row["event"]) for row in rows]
+
+    def append(self, ticket: dict, events: list[dict], expected_version: int | None = None):
+        """Append events to a ticket's log and store its new state."""
+        with self._updating_summary() as summary:
+            previous = self._read_state(ticket["id"])
+            if expected_version is not None:
+                check_version(ticket["id"], previous["version"], expected_version)
+            last = self.conn.execute("SELECT MAX(seq) FROM events WHERE ticket_id = ?", (ticket["id"],)).fetchone()[0]
+            self._insert_events(ticket["id"], events, start=(last or 0) + 1)
+            self._write_states([ticket])
+            tally(summary, previous, -1)
+            tally(summary, ticket)
+
+    def save(self, ticket: dict, expected_version: int | None = None):
+        """Create or replace a ticket, including its whole history.
+
+        If expected_version is given, the stored ticket must still be at
+        that version (0 for a new ticket), otherwise ConflictError is raised.
+        """
+        with self._updating_summary() as summary:
+            try:
+                previous = self._read_state(ticket["id"])
+            except TicketError:
+                previous = None
+            if expected_version is not None:
+                check_version(ticket["id"], previous["version"] if previous else None, expected_version)
+            self._replace_events(ticket)
+            self._write_states([ticket])
+            tally(summary, previous, -1)
+            tally(summary, ticket)
+
+    def save_many(self, tickets):
+        """Create or replace several tickets in one transaction."""
+        tickets = list(tickets)
+        with self.transaction():
+            for ticket in tickets:
+                self._replace_events(ticket)
+            self._write_states(tickets)
+            self.rebuild_summary()
+
+    def delete(self, ticket_id: str):
+        """Delete a ticket by full ID."""
+        with self._updating_summary() as summary:
+            previous = self._read_state(ticket_id)
+            self.conn.execute("DELETE FROM tickets WHERE id = ?", (ticket_id,))
+            self.conn.execute("DELETE FROM events WHERE ticket_id = ?", (ticket_id,))
+            tally(summary, previous, -1)
+
+    def find(self, status: str | None = None, assigned: str | None = None) -> list[dict]:
+        """Return tickets (without history) sorted by ID, optionally filtered."""
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM tickets"
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if assigned:
+            clauses.append("assigned_to = ?")
+            params.append(assigned)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        rows = self.conn.execute(query + " ORDER BY id", params)
+        return [dict(row) for row in rows]
+
+    def summary(self) -> dict:
+        """Return the maintained summary (built from the tickets on first use)."""
+        return self._read_summary() or self.rebuild_summary()
+
+    def rebuild_summary(self) -> dict:
+        """Re-derive the summary from every ticket and store it."""
+        with self.transaction():
+            summary = empty_summary()
+            for row in self.conn.execute("SELECT * FROM tickets"):
+                tally(summary, dict(row))
+            self._write_summary(summary)
+        return summary
+
+    def all(self):
+        """Iterate over all tickets (with history) sorted by ID."""
+        for row in self.conn.execute("SELECT id FROM tickets ORDER BY id").fetchall():
+            yield self.load(row["id"])
+
+    @contextmanager
+    def _updating_summary(self):
+        """Yield the summary to adjust for a write made in the same transaction.
+
+        A database without a summary yet gets one rebuilt after the block.
+        """
+        with self.transaction():
+            summary = self._read_summary()
+            yield summary or empty_summary()
+            if summary is None:
+                self.rebuild_summary()
+            else:
+                self._write_summary(summary)
+
+    def _read_summary(self) -> dict | None:
+        row = self.conn.execute("SELECT data FROM summary WHERE id = 1").fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def _write_summary(self, summary: dict):
+        self.conn.execute("INSERT OR REPLACE INTO summary (id, data) VALUES (1, ?)", (json.dumps(summary),))
+
+    def _read_state(self, ticket_id: str) -> dict:
+        row = self.conn.execute("SELECT * FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
+        if row is None:
+            raise TicketError(f"Ticket not found: {ticket_id}")
+        return dict(row)
+
+    def _replace_events(self, ticket: dict):
+        self.conn.execute("DELETE FROM events WHERE ticket_id = ?", (ticket["id"],))
+        self._insert_events(ticket["id"], ticket.get("history", []), start=1)
+
+    def _insert_events(self, ticket_id: str, events: list[dict], start: int):
+        self.conn.executemany(
+            "INSERT INTO events (ticket_id, seq, event) VALUES (?, ?, ?)",
+            ((ticket_id, seq, json.dumps(event)) for seq, event in enumerate(events, start)),
+        )
+
+    def _write_states(self, tickets: list[dict]):
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO tickets ({', '.join(self.COLUMNS)}, version) "
+            f"VALUES ({', '.join('?' * (len(self.COLUMNS) + 1))})",
+            ([ticket.get(col) for col in self.COLUMNS] + [ticket.get("version", 0)] for ticket in tickets),
+        )
+
+
+BACKENDS = {store.name: store for store in (JsonStore, SqliteStore)}
+
+
+def migrate(source, target) -> int:
+    """Copy every ticket from one store into another.
+
+    Tickets already in the target with the same ID are replaced. The
+    source is left untouched.
+
+    Returns:
+        The number of tickets copied.
+    """
+    tickets = list(source.all())
+    target.save_many(tickets)
+    return len(tickets)
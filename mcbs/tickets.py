@@ -0,0 +1,330 @@
+"""Tickets for tracking tasks delegated to Claude workers."""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .ticket_store import (  # noqa: F401
+    BACKENDS,
+    TIMESTAMP_FORMAT,
+    ConflictError,
+    TicketError,
+    migrate,
+    parse_timestamp,
+    summarize,
+)
+
+TICKETS_DIR = Path(__file__).resolve().parent.parent / "tickets-cli" / "tickets"
+
+VALID_STATUSES = ["open", "in-progress", "blocked", "waiting", "done"]
+
+# Storage backend: "json" (one file per ticket) or "sqlite" (indexed database)
+BACKEND = os.environ.get("TICKETS_BACKEND", "json")
+
+# Stores per thread, dropped (closing their connections) when the thread ends
+_local = threading.local()
+
+
+def get_store(backend: str | None = None):
+    """Return the calling thread's store for a backend (default: BACKEND) in TICKETS_DIR.
+
+    Each thread gets its own store: a SQLite connection can only be used
+    by the thread that opened it.
+    """
+    backend = backend or BACKEND
+    if backend not in BACKENDS:
+        raise TicketError(f"Unknown tickets backend: {backend} (choose from {', '.join(BACKENDS)})")
+    if not hasattr(_local, "stores"):
+        _local.stores = {}
+    key = (backend, TICKETS_DIR)
+    if key not in _local.stores:
+        _local.stores[key] = BACKENDS[backend](TICKETS_DIR)
+    return _local.stores[key]
+
+
+def ensure_tickets_dir():
+    """Create tickets directory if it doesn't exist."""
+    TICKETS_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def generate_ticket_id() -> str:
+    """Generate a short unique ticket ID."""
+    import uuid
+
+    return uuid.uuid4().hex[:8]
+
+
+def now_iso() -> str:
+    """Return current UTC timestamp in ISO format."""
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def resolve_ids(prefixes) -> dict[str, str]:
+    """Map several partial IDs to full ticket IDs in one call.
+
+    Raises:
+        TicketError: If any prefix matches no ticket or several.
+    """
+    return get_store().resolve_many(prefixes)
+
+
+def load_ticket(ticket_id: str, history: bool = True) -> dict:
+    """Load a ticket by ID (partial IDs are supported)."""
+    store = get_store()
+    return store.load(store.resolve(ticket_id), history=history)
+
+
+def ticket_history(ticket_id: str, offset: int = 0, limit: int | None = None) -> list[dict]:
+    """Return a page of a ticket's history events, oldest first."""
+    store = get_store()
+    return store.history(store.resolve(ticket_id), offset, limit)
+
+
+def save_ticket(ticket: dict):
+    """Save a ticket, including its whole history, to the store."""
+    get_store().save(ticket)
+
+
+def make_event(action: str, **kwargs) -> dict:
+    """Build a history event."""
+    event = {"timestamp": now_iso(), "action": action}
+    event.update(kwargs)
+    return event
+
+
+def apply_event(ticket: dict, event: dict):
+    """Apply a history event to a ticket's materialized state.
+
+    Events carry the new values they set (title, body, worker, to), so
+    folding a ticket's history over an empty dict rebuilds its state.
+    """
+    action = event["action"]
+    if action == "created":
+        ticket.update({
+            "title": event.get("title", ticket.get("title")),
+            "body": event.get("body", ticket.get("body", "")),
+            "status": "open",
+            "assigned_to": None,
+            "created_at": event["timestamp"],
+            "done_at": None,
+        })
+    elif action == "assigned" and "worker" in event:
+        ticket["assigned_to"] = event["worker"]
+    elif action == "status_change":
+        ticket["status"] = event["to"]
+        ticket["done_at"] = event["timestamp"] if event["to"] == "done" else None
+    elif action == "updated":
+        for field in ("title", "body"):
+            if field in event:
+                ticket[field] = event[field]
+    ticket["updated_at"] = event["timestamp"]
+
+
+def record(ticket: dict, events: list[dict], action: str, **kwargs):
+    """Create an event, apply it to the ticket and queue it for saving."""
+    event = make_event(action, **kwargs)
+    apply_event(ticket, event)
+    events.append(event)
+
+
+@contextmanager
+def recording(ticket_id: str):
+    """Load a ticket under its lock and append the events recorded on it.
+
+    Yields the ticket state (without history) and a list to record()
+    events into; on exit only the new events are appended to the log.
+    The append is checked against the version that was loaded, so a
+    concurrent writer that bypassed the lock causes a ConflictError
+    instead of lost history entries.
+    """
+    store = get_store()
+    full_id = store.resolve(ticket_id)
+    with store.locked(full_id):
+        ticket = store.load(full_id, history=False)
+        version = ticket.get("version", 0)
+        events = []
+        yield ticket, events
+        if events:
+            ticket["version"] = version + 1
+            store.append(ticket, events, expected_version=version)
+
+
+def create_ticket(title: str, body: str = "", assign: str | None = None) -> dict:
+    """Create and save a new ticket, optionally assigned to a worker."""
+    ticket = {"id": generate_ticket_id(), "version": 1}
+    events = []
+    record(ticket, events, "created", details="Ticket created", title=title, body=body)
+
+    # Handle immediate assignment
+    if assign:
+        record(ticket, events, "assigned", details=f"Assigned to {assign}", worker=assign)
+        record(ticket, events, "status_change", **{"from": "open", "to": "in-progress"})
+
+    ticket["history"] = events
+    get_store().save(ticket, expected_version=0)
+    return ticket
+
+
+def list_tickets(status: str | None = None, assigned: str | None = None) -> list[dict]:
+    """Return tickets (without history) sorted by ID, optionally filtered."""
+    return get_store().find(status, assigned)
+
+
+def update_ticket(
+    ticket_id: str,
+    status: str | None = None,
+    body: str | None = None,
+    title: str | None = None,
+) -> tuple[dict, dict]:
+    """Update a ticket's status, description and/or title.
+
+    Returns:
+        A (previous, updated) pair of ticket dicts.
+    """
+    if not any([status, body, title]):
+        raise TicketError("Provide at least one update: --status, --body, or --title")
+    if status and status not in VALID_STATUSES:
+        raise TicketError(f"Invalid status: {status}")
+
+    with recording(ticket_id) as (ticket, events):
+        previous = dict(ticket)
+
+        if status:
+            record(ticket, events, "status_change", **{"from": previous["status"], "to": status})
+
+        if body is not None:
+            record(ticket, events, "updated", details="Description updated", body=body)
+
+        if title:
+            record(ticket, events, "updated", details=f"Title: '{previous['title']}' -> '{title}'", title=title)
+
+    return previous, ticket
+
+
+def assign_ticket(ticket_id: str, worker: str) -> tuple[dict, dict]:
+    """Assign a worker to a ticket.
+
+    If the ticket is 'open', it automatically transitions to 'in-progress'.
+
+    Returns:
+        A (previous, updated) pair of ticket dicts.
+    """
+    with recording(ticket_id) as (ticket, events):
+        previous = dict(ticket)
+
+        record(ticket, events, "assigned", details=f"Assigned to {worker}", worker=worker)
+
+        # Auto-transition to in-progress
+        if ticket["status"] == "open":
+            record(ticket, events, "status_change", **{"from": "open", "to": "in-progress"})
+
+    return previous, ticket
+
+
+def add_comment(ticket_id: str, comment: str) -> dict:
+    """Add a comment to a ticket's history (a single log append)."""
+    with recording(ticket_id) as (ticket, events):
+        record(ticket, events, "comment", details=comment)
+    return ticket
+
+
+def delete_ticket(ticket_id: str):
+    """Delete a ticket by its full ID."""
+    store = get_store()
+    with store.locked(ticket_id):
+        store.delete(ticket_id)
+
+
+def apply_operation(op: dict) -> dict:
+    """Apply one batch operation and return its result.
+
+    Operations are dicts with an "op" key ("create", "update", "assign",
+    "comment" or "delete") and the same fields as the matching CLI
+    command: title/body/assign, id/status/body/title, id/worker, id/text
+    and id respectively.
+    """
+    action = op.get("op")
+    try:
+        if action == "create":
+            ticket = create_ticket(op["title"], op.get("body", ""), op.get("assign"))
+        elif action == "update":
+            _, ticket = update_ticket(op["id"], op.get("status"), op.get("body"), op.get("title"))
+        elif action == "assign":
+            _, ticket = assign_ticket(op["id"], op["worker"])
+        elif action == "comment":
+            ticket = add_comment(op["id"], op["text"])
+        elif action == "delete":
+            ticket_id = get_store().resolve(op["id"])
+            delete_ticket(ticket_id)
+            return {"ok": True, "op": action, "id": ticket_id}
+        else:
+            raise TicketError(f"Unknown operation: {action!r}")
+    except KeyError as e:
+        raise TicketError(f"Missing field for {action}: {e.args[0]}")
+    return {"ok": True, "op": action, "id": ticket["id"], "ticket": summarize(ticket)}
+
+
+def run_batch(lines) -> list[dict]:
+    """Apply JSONL operations (see apply_operation) as one store batch.
+
+    A failing operation is reported in its result and doesn't stop the
+    others. Results come back only once the batch has been committed.
+
+    Returns:
+        One result per non-blank line, with its 1-based "line" number.
+    """
+    results = []
+    with get_store().batch():
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                op = json.loads(line)
+            except json.JSONDecodeError as e:
+                results.append({"line": number, "ok": False, "error": f"Invalid JSON: {e}"})
+                continue
+            try:
+                if not isinstance(op, dict):
+                    raise TicketError("Operation must be a JSON object")
+                result = apply_operation(op)
+            except TicketError as e:
+                result = {"ok": False, "op": op.get("op") if isinstance(op, dict) else None, "error": str(e)}
+            results.append({"line": number, **result})
+    return results
+
+
+def ticket_stats(rebuild: bool = False) -> dict:
+    """Summarize tickets from the store's maintained summary.
+
+    Reading the summary costs the same however many tickets there are;
+    rebuild=True re-derives it from every ticket first.
+
+    Returns:
+        A dict with "total", "by_status" (every status, including zeros),
+        "by_worker", "oldest_open" (id, created_at and age in seconds of
+        the oldest open ticket, or None) and "avg_time_to_done" (seconds
+        from creation to done, or None).
+    """
+    store = get_store()
+    summary = store.rebuild_summary() if rebuild else store.summary()
+
+    by_status = {status: 0 for status in VALID_STATUSES}
+    by_status.update(summary["by_status"])
+
+    oldest_open = None
+    if summary["open_since"]:
+        ticket_id, created_at = min(summary["open_since"].items(), key=lambda item: (item[1], item[0]))
+        age = datetime.now(timezone.utc) - parse_timestamp(created_at)
+        oldest_open = {"id": ticket_id, "created_at": created_at, "age": int(age.total_seconds())}
+
+    done = summary["done_count"]
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_worker": dict(sorted(summary["by_worker"].items())),
+        "oldest_open": oldest_open,
+        "avg_time_to_done": summary["done_seconds"] / done if done else None,
+    }
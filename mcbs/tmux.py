@@ -0,0 +1,150 @@
+"""Persistent tmux control-mode (tmux -C) client.
+
+Running `tmux <command>` forks a new client per call. A control-mode client
+keeps one connection open: commands are written to its stdin one per line
+and each reply comes back wrapped in %begin/%end (or %error) lines, so many
+commands can be pipelined through a single process.
+"""
+
+import subprocess
+import threading
+
+# Dedicated session the control client attaches to. It is destroyed as soon
+# as the client detaches, and doesn't match the claude- worker prefix.
+CONTROL_SESSION = "_mcbs-control"
+
+SYNC_MARKER = "mcbs-control-ready"
+
+
+class ControlModeError(Exception):
+    """Raised when the control-mode connection fails or is closed."""
+
+
+def quote_arg(arg: str) -> str:
+    """Quote an argument for the tmux command parser.
+
+    Uses a double-quoted string, escaping backslashes, quotes, '$' and
+    control characters (newlines become \\n so a command stays on one line).
+    """
+    out = ['"']
+    for ch in arg:
+        if ch in '\\"$':
+            out.append("\\" + ch)
+        elif ch == "\n":
+            out.append("\\n")
+        elif ch == "\t":
+            out.append("\\t")
+        elif ch == "\r":
+            out.append("\\r")
+        elif ord(ch) < 0x20 or ord(ch) == 0x7F:
+            out.append(f"\\{ord(ch):03o}")
+        else:
+            out.append(ch)
+    out.append('"')
+    return "".join(out)
+
+
+class ControlClient:
+    """A long-lived tmux control-mode connection.
+
+    Thread-safe: concurrent callers are serialized, and each call's
+    commands are pipelined (all written, then all replies read).
+    """
+
+    def __init__(self, session: str = CONTROL_SESSION):
+        try:
+            self._proc = subprocess.Popen(
+                [
+                    "tmux", "-C", "new-session", "-A", "-s", session,
+                    ";", "set-option", "-t", session, "destroy-unattached", "on",
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except OSError as e:
+            raise ControlModeError(f"Could not start tmux control client: {e}")
+        self._lock = threading.Lock()
+
+        # Replies to the startup commands come first; skip everything up to
+        # the reply to a marker command so later replies line up with requests
+        with self._lock:
+            self._write([("display-message", "-p", SYNC_MARKER)])
+            while True:
+                _, lines = self._read_reply()
+                if lines == [SYNC_MARKER]:
+                    break
+
+    def run(self, *args: str) -> subprocess.CompletedProcess:
+        """Run one tmux command, mirroring subprocess.run's result."""
+        return self.run_many([args])[0]
+
+    def run_many(self, commands: list[tuple[str, ...]]) -> list[subprocess.CompletedProcess]:
+        """Pipeline several tmux commands and return their results in order."""
+        if not commands:
+            return []
+        with self._lock:
+            self._write(commands)
+            results = []
+            for args in commands:
+                ok, lines = self._read_reply()
+                output = "".join(f"{line}\n" for line in lines)
+                results.append(subprocess.CompletedProcess(
+                    ["tmux", *args],
+                    0 if ok else 1,
+                    stdout=output if ok else "",
+                    stderr="" if ok else output,
+                ))
+            return results
+
+    def close(self):
+        """Close the connection (the control session goes with it)."""
+        if self._proc.poll() is None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self._proc.kill()
+
+    def _write(self, commands):
+        lines = "".join(" ".join(quote_arg(a) for a in args) + "\n" for args in commands)
+        try:
+            self._proc.stdin.write(lines)
+            self._proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise ControlModeError(f"tmux control client closed: {e}")
+
+    def _read_reply(self) -> tuple[bool, list[str]]:
+        """Read the reply to the next command sent by this client.
+
+        Notifications between blocks (%output, %session-changed, ...) and
+        blocks for commands tmux ran itself (flags 0, e.g. the startup
+        commands) are skipped. The closing line must carry the same command
+        number as %begin, so output that happens to start with %end isn't
+        misread.
+        """
+        while True:
+            ok, flags, lines = self._read_block()
+            if flags != "0":
+                return ok, lines
+
+    def _read_block(self) -> tuple[bool, str, list[str]]:
+        number = flags = None
+        lines = []
+        while True:
+            line = self._proc.stdout.readline()
+            if not line:
+                raise ControlModeError("tmux control client exited")
+            line = line.rstrip("\n")
+            if number is None:
+                if line.startswith("%begin "):
+                    _, _, number, *rest = line.split(" ")
+                    flags = rest[0] if rest else ""
+                continue
+            parts = line.split(" ")
+            if parts[0] in ("%end", "%error") and len(parts) >= 3 and parts[2] == number:
+                return parts[0] == "%end", flags, lines
+            lines.append(line)
@@ -0,0 +1,95 @@
+"""Wait for a file to appear without busy polling.
+
+On Linux the wait blocks on inotify (through ctypes, so no extra
+dependency) and wakes as soon as the file is written. Where inotify is
+unavailable it falls back to polling with exponential backoff. Even with
+inotify the file is re-checked every RECHECK_INTERVAL seconds, in case an
+event is missed (e.g. on a network filesystem).
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from pathlib import Path
+
+POLL_INITIAL_DELAY = 0.1
+POLL_MAX_DELAY = 1.0
+RECHECK_INTERVAL = 5.0
+
+# Event masks from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+
+
+class DirectoryWatch:
+    """An inotify watch for files written or renamed into a directory."""
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+        self.fd = fd
+
+    def wait(self, timeout: float):
+        """Block until something changes in the directory or timeout expires."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            # The events themselves don't matter: the caller re-checks
+            try:
+                os.read(self.fd, 65536)
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watch(directory: Path) -> DirectoryWatch | None:
+    """Watch a directory with inotify, or return None if unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return DirectoryWatch(directory)
+    except (OSError, AttributeError):
+        return None
+
+
+def wait_for_file(path: Path, timeout: float | None = None) -> bool:
+    """Block until path exists.
+
+    Returns:
+        True once the file exists, False if timeout (seconds) expired first.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    watch = open_watch(path.parent)
+    delay = POLL_INITIAL_DELAY
+    try:
+        while True:
+            # Checked after the watch is set up, so a file written in
+            # between can't be missed
+            if path.exists():
+                return True
+            step = RECHECK_INTERVAL if watch else delay
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                step = min(step, remaining)
+            if watch:
+                watch.wait(step)
+            else:
+                time.sleep(step)
+                delay = min(delay * 2, POLL_MAX_DELAY)
+    finally:
+        if watch:
+            watch.close()
@@ -0,0 +1,120 @@
+"""A local mock of the Azure OpenAI chat completions endpoint.
+
+Used by the extract_frames.py tests and by benchmarks/batching.py, so
+neither needs an API key or network access.
+"""
+
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockServer(ThreadingHTTPServer):
+    """Chat completions endpoint answering with the decoded image bytes.
+
+    The first `rate_limited` requests get a 429 with Retry-After, and the
+    next `failing` requests a 500. Several images are answered under
+    "=== FRAME n ===" lines (or without them if `garbled`). Requests are
+    recorded with their time and the number in flight.
+
+    Subclasses change what an image is answered with (answer()) and what
+    answering a request costs (complete()).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, rate_limited: int = 0, failing: int = 0, retry_after: str = "0.2", delay: float = 0.02,
+                 garbled: bool = False):
+        super().__init__(("127.0.0.1", 0), MockHandler)
+        self.rate_limited = rate_limited
+        self.failing = failing
+        self.retry_after = retry_after
+        self.delay = delay
+        self.garbled = garbled
+        self.lock = threading.Lock()
+        self.requests = []  # (time, status)
+        self.images = []  # Images per request
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "MockServer":
+        """Serve requests from a background thread."""
+        threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+    def answer(self, image: bytes) -> str:
+        """What the model says about one image."""
+        return image.decode()
+
+    def complete(self, body: dict, content: str) -> dict | None:
+        """Take the time to generate `content` and return its usage, if billed."""
+        time.sleep(self.delay)
+        return None
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            n = len(server.requests)
+            status = 429 if n < server.rate_limited else 500 if n < server.rate_limited + server.failing else 200
+            server.requests.append((time.monotonic(), status))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if status == 429:
+                self.reply(429, {"error": {"message": "Rate limited"}}, {"Retry-After": server.retry_after})
+                return
+            if status == 500:
+                self.reply(500, {"error": {"message": "Server error"}})
+                return
+            urls = [part["image_url"]["url"] for message in body["messages"] if isinstance(message["content"], list)
+                    for part in message["content"] if part["type"] == "image_url"]
+            answers = [server.answer(base64.b64decode(url.split(",", 1)[1])) for url in urls]
+            with server.lock:
+                server.images.append(len(answers))
+            if len(answers) == 1:
+                content = answers[0]
+            elif server.garbled:
+                content = "\n\n".join(answers)
+            else:
+                content = "\n".join(f"=== FRAME {n} ===\n{answer}" for n, answer in enumerate(answers, 1))
+            response = {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            }
+            usage = server.complete(body, content)
+            if usage:
+                response["usage"] = usage
+            self.reply(200, response)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status: int, data: dict, headers: dict | None = None):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
@@ -0,0 +1,195 @@
+"""Unit tests for mcbs/context.py."""
+
+import os
+
+import pytest
+
+pytest.importorskip("yaml")
+
+from mcbs import context  # noqa: E402
+from mcbs.context import ContextError  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def context_dirs(tmp_path, monkeypatch):
+    """Point roles and directives at a temporary directory."""
+    roles = tmp_path / "roles"
+    directives = tmp_path / "directives"
+    roles.mkdir()
+    directives.mkdir()
+    (roles / "dev.yaml").write_text(
+        "name: dev\ndescription: Developer\nprompt: Build things.\ndirectives:\n  - base\n  - missing\n"
+    )
+    (directives / "base.yaml").write_text("name: base\ndescription: Base\ncontent: Be concise.\n")
+    monkeypatch.setattr(context, "ROLES_DIR", roles)
+    monkeypatch.setattr(context, "DIRECTIVES_DIR", directives)
+    monkeypatch.setattr(context, "CACHE_PATH", tmp_path / "cache" / "compiled.json")
+
+
+class TestRenderRole:
+    """Tests for render_role."""
+
+    def test_includes_prompt_and_directives(self):
+        """The rendered role contains its prompt and directive content."""
+        text = context.render_role("dev")
+        assert text.startswith("# Role: dev\n# Developer")
+        assert "Build things." in text
+        assert "## Directive: base\n\nBe concise." in text
+
+    def test_missing_directive_warns(self):
+        """Missing directives are skipped and reported through warn."""
+        warnings = []
+        context.render_role("dev", warn=warnings.append)
+        assert warnings == ["Directive not found: missing"]
+
+    def test_missing_role_raises(self):
+        """Unknown roles raise ContextError."""
+        with pytest.raises(ContextError, match="Role not found"):
+            context.render_role("nope")
+
+
+class TestValidateRole:
+    """Tests for validate_role."""
+
+    def test_reports_missing_directive(self):
+        """Validation lists directives that don't exist."""
+        assert context.validate_role(context.load_role("dev")) == ["Directive not found: missing"]
+
+    def test_reports_missing_fields(self):
+        """Validation lists missing required fields."""
+        assert context.validate_role({}) == ["Missing 'name' field", "Missing 'prompt' field"]
+
+
+class TestCompiledCache:
+    """Tests for the compiled role/directive cache."""
+
+    def test_show_served_from_cache(self, monkeypatch):
+        """A second render (even from a new process) parses no YAML."""
+        text = context.render_role("dev")
+        monkeypatch.setattr(context, "_compiled_cache", None)
+        with monkeypatch.context() as m:
+            m.setattr(context, "parse_yaml", lambda content, path: pytest.fail(f"parsed {path}"))
+            warnings = []
+            assert context.render_role("dev", warn=warnings.append) == text
+            assert warnings == ["Directive not found: missing"]
+            assert [r["name"] for r in context.get_all_roles()] == ["dev"]
+
+    def test_directive_change_invalidates(self):
+        """Editing a directive re-renders the roles that use it."""
+        context.render_role("dev")
+        (context.DIRECTIVES_DIR / "base.yaml").write_text("name: base\ncontent: Be thorough.\n")
+        assert "Be thorough." in context.render_role("dev")
+
+    def test_new_directive_invalidates(self):
+        """A directive that was missing is picked up once it exists."""
+        context.render_role("dev")
+        (context.DIRECTIVES_DIR / "missing.yaml").write_text("name: missing\ncontent: Found.\n")
+        warnings = []
+        assert "## Directive: missing\n\nFound." in context.render_role("dev", warn=warnings.append)
+        assert warnings == []
+
+    def test_touched_file_keeps_cached_parse(self, monkeypatch):
+        """Touching a file keeps its parsed data when the content is the same."""
+        path = context.DIRECTIVES_DIR / "base.yaml"
+        context.load_directive("base")
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        with monkeypatch.context() as m:
+            m.setattr(context, "parse_yaml", lambda content, path: pytest.fail(f"parsed {path}"))
+            assert context.load_directive("base")["content"] == "Be concise."
+
+
+class TestInheritance:
+    """Tests for role extends, directive requires and bundles."""
+
+    @pytest.fixture(autouse=True)
+    def hierarchy(self):
+        """A reviewer role extending dev, with a directive requiring base."""
+        (context.ROLES_DIR / "reviewer.yaml").write_text(
+            "name: reviewer\nextends: dev\nprompt: Review things.\n"
+            "directives:\n  - review\n  - base\npermissions:\n  allow: [Read]\n"
+        )
+        (context.DIRECTIVES_DIR / "review.yaml").write_text("name: review\nrequires: [base]\ncontent: Check.\n")
+
+    def test_extends_merges_parent(self):
+        """Prompts are layered and directives kept once, requirements first."""
+        role = context.resolve_role("reviewer")
+        assert role["name"] == "reviewer"
+        assert role["description"] == "Developer"
+        assert role["prompt"] == "Build things.\n\nReview things."
+        assert role["directives"] == ["base", "missing", "review"]
+        assert role["extends"] == ["dev"]
+        assert context.role_settings("reviewer")["permissions"]["allow"] == ["Read"]
+
+    def test_bundle_deduplicates_directives(self):
+        """Each directive appears once in the bundle, after its requirements."""
+        bundle = context.role_bundle("reviewer")
+        assert bundle["directives"] == ["base", "review"]
+        assert bundle["text"].count("## Directive: base") == 1
+        assert bundle["warnings"] == ["Directive not found: missing"]
+
+    def test_bundle_hash_tracks_content(self, monkeypatch):
+        """The hash is stable across rebuilds and changes with the text."""
+        first = context.role_bundle("reviewer")["hash"]
+        monkeypatch.setattr(context, "_compiled_cache", None)
+        context.CACHE_PATH.unlink()
+        assert context.role_bundle("reviewer")["hash"] == first
+        (context.DIRECTIVES_DIR / "review.yaml").write_text("name: review\ncontent: Check twice.\n")
+        assert context.role_bundle("reviewer")["hash"] != first
+
+    def test_cycle_raises(self):
+        """An inheritance cycle is reported rather than recursing forever."""
+        (context.ROLES_DIR / "dev.yaml").write_text("name: dev\nextends: reviewer\nprompt: Build.\n")
+        with pytest.raises(ContextError, match="cycle: reviewer -> dev -> reviewer"):
+            context.render_role("reviewer")
+        assert context.validate_role(context.load_role("dev")) == [
+            "Role inheritance cycle: reviewer -> dev -> reviewer"
+        ]
+
+
+class TestBudget:
+    """Tests for token estimates and budget trimming."""
+
+    @pytest.fixture(autouse=True)
+    def directives(self):
+        """A role with a low priority directive and one that requires it."""
+        (context.ROLES_DIR / "big.yaml").write_text(
+            "name: big\nprompt: Work.\ndirectives: [base, extra, style]\n"
+        )
+        (context.DIRECTIVES_DIR / "extra.yaml").write_text(
+            "name: extra\npriority: 10\ncontent: " + "word " * 200 + "\n"
+        )
+        (context.DIRECTIVES_DIR / "style.yaml").write_text("name: style\nrequires: extra\ncontent: Style.\n")
+
+    def test_estimate_tokens(self):
+        """Punctuation counts once, words once per started 6 characters."""
+        assert context.estimate_tokens("") == 0
+        assert context.estimate_tokens("Be concise.") == 4
+        assert context.estimate_tokens("implementation") == 3
+
+    def test_within_budget_unchanged(self):
+        """A bundle that fits is returned as is."""
+        bundle = context.role_bundle("big")
+        assert context.role_bundle("big", budget=bundle["tokens"]) == bundle
+
+    def test_trims_lowest_priority_with_dependents(self):
+        """The lowest priority directive goes, with what requires it."""
+        full = context.role_bundle("big")
+        trimmed = context.role_bundle("big", budget=full["tokens"] - 1)
+        assert trimmed["dropped"] == ["extra", "style"]
+        assert trimmed["directives"] == ["base"]
+        assert trimmed["tokens"] == context.estimate_tokens(trimmed["text"])
+        assert trimmed["hash"] != full["hash"]
+
+    def test_role_prompt_never_dropped(self):
+        """A budget below the role's own size keeps the role prompt."""
+        bundle = context.role_bundle("big", budget=1)
+        assert bundle["directives"] == []
+        assert "Work." in bundle["text"]
+
+    def test_stats(self):
+        """Stats cover each role's bundle and every directive."""
+        stats = context.context_stats(["big"])
+        assert stats["roles"][0]["tokens"] == context.role_bundle("big")["tokens"]
+        assert [(d["name"], d["priority"]) for d in stats["directives"]] == [
+            ("base", 50), ("extra", 10), ("style", 50)
+        ]
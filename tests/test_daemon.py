@@ -0,0 +1,93 @@
+"""Unit tests for mcbs/client.py and mcbs/daemon.py."""
+
+import io
+import threading
+
+import pytest
+
+from mcbs import client, tickets
+
+
+class TestServed:
+    """Tests for deciding which commands the daemon runs."""
+
+    @pytest.mark.parametrize("cli, argv", [
+        ("tickets", ["list", "--status", "open"]),
+        ("tickets", ["--backend", "sqlite", "stats"]),
+        ("tickets", ["delete", "abc", "--force"]),
+        ("claude", ["capture", "w1", "--lines", "50"]),
+        ("claude", ["signal", "respond", "w1", "ok"]),
+        ("context", ["show", "worker"]),
+    ])
+    def test_served(self, cli, argv):
+        """Quick, non-interactive commands are served."""
+        assert client.served(cli, argv)
+
+    @pytest.mark.parametrize("cli, argv", [
+        ("claude", ["spawn", "do it"]),
+        ("claude", ["list", "--watch"]),
+        ("claude", ["capture", "w1", "-f"]),
+        ("claude", ["signal", "wait"]),
+        ("claude", ["signal", "post", "why?", "--wait"]),
+        ("claude", ["kill-all"]),
+        ("tickets", ["delete", "abc"]),
+        ("tickets", ["--help"]),
+    ])
+    def test_run_directly(self, cli, argv):
+        """Blocking, streaming and prompting commands run directly."""
+        assert not client.served(cli, argv)
+
+    def test_stdin_commands(self):
+        """Only commands that read stdin get it sent along."""
+        assert client.reads_stdin("tickets", ["batch"])
+        assert client.reads_stdin("tickets", ["resolve", "--stdin"])
+        assert not client.reads_stdin("tickets", ["resolve", "abc"])
+
+
+class TestDaemon:
+    """Tests for running commands through a daemon."""
+
+    @pytest.fixture
+    def socket_path(self, tmp_path, monkeypatch):
+        """Serve a daemon (without tmux control mode) on a temporary socket."""
+        pytest.importorskip("yaml")
+        from mcbs import daemon
+
+        monkeypatch.setattr(tickets, "TICKETS_DIR", tmp_path / "tickets")
+        monkeypatch.setattr(tickets, "BACKEND", "json")
+        path = tmp_path / "d.sock"
+        server = daemon.Server(daemon.Daemon(control_mode=False), path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield path
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+    def test_run_command(self, socket_path, monkeypatch):
+        """Commands run in the daemon with the client's stdin and exit status."""
+        monkeypatch.setattr(client.sys, "stdin", io.StringIO('{"op": "create", "title": "Hi"}\n'))
+        reply = client.run("tickets", ["batch"], socket_path)
+        assert reply["exit_code"] == 0
+        assert '"ok": true' in reply["stdout"]
+
+        reply = client.run("tickets", ["list"], socket_path)
+        assert "Hi" in reply["stdout"]
+
+        reply = client.run("tickets", ["show", "zzzz"], socket_path)
+        assert reply["exit_code"] == 1
+        assert "not found" in reply["stderr"]
+
+    def test_backend_from_each_request(self, socket_path, monkeypatch):
+        """The tickets backend follows each client's TICKETS_BACKEND, not the last command's."""
+        monkeypatch.setenv("TICKETS_BACKEND", "sqlite")
+        assert client.run("tickets", ["list"], socket_path)["exit_code"] == 0
+        assert tickets.BACKEND == "sqlite"
+        monkeypatch.delenv("TICKETS_BACKEND")
+        client.run("context", ["list-roles"], socket_path)
+        assert tickets.BACKEND == "json"
+
+    def test_unavailable(self, tmp_path):
+        """A missing daemon raises Unavailable, so the client can run directly."""
+        with pytest.raises(client.Unavailable):
+            client.run("tickets", ["list"], tmp_path / "none.sock")
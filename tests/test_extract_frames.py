@@ -0,0 +1,353 @@
+"""Tests for extract_frames.py against a local mock of the Azure OpenAI API."""
+
+import io
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+pytest.importorskip("tqdm")
+pytest.importorskip("PIL")
+
+import extract_frames  # noqa: E402
+from openai import AzureOpenAI  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+
+from tests.mock_openai import MockServer  # noqa: E402
+
+
+@pytest.fixture
+def serve():
+    """Start a mock server; returns (server, client)."""
+    servers = []
+
+    def start(**kwargs):
+        server = MockServer(**kwargs).start()
+        servers.append(server)
+        client = AzureOpenAI(api_key="test", api_version="2024-12-01-preview", azure_endpoint=server.url,
+                             max_retries=0)
+        return server, client
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def frames(tmp_path):
+    """Twelve fake frames whose "image" is their own name."""
+    paths = []
+    for i in range(1, 13):
+        path = tmp_path / f"frame_{i:05d}.jpg"
+        path.write_bytes(f"frame {i}".encode())
+        paths.append(path)
+    return paths
+
+
+class TestExtractAll:
+    """Tests for concurrent extraction."""
+
+    def test_results_in_frame_order(self, serve, frames):
+        """Results come back in frame order, with requests in parallel."""
+        server, client = serve(delay=0.05)
+        results = extract_frames.extract_all(client, frames, "test", concurrency=4, progress=False)
+        assert results == [f"frame {i}" for i in range(1, 13)]
+        assert 1 < server.max_in_flight <= 4
+
+    def test_frames_consumed_as_workers_free_up(self, serve, frames):
+        """A generator of frames is read while extraction runs, a bounded window at a time."""
+        server, client = serve()
+        pulled = []
+        pulled_at_first_result = []
+
+        def generate():
+            for frame in frames:
+                pulled.append(frame)
+                yield frame
+
+        def on_result(frame, content, batched):
+            pulled_at_first_result.append(len(pulled))
+
+        results = extract_frames.extract_all(client, generate(), "test", concurrency=2, progress=False,
+                                             on_result=on_result)
+        assert results == [f"frame {i}" for i in range(1, 13)]
+        assert pulled_at_first_result[0] == 2 * extract_frames.BATCHES_PER_WORKER
+
+    def test_rate_limit_pauses_all_requests(self, serve, frames):
+        """A 429 holds every request for Retry-After, then all frames succeed."""
+        server, client = serve(rate_limited=2, retry_after="0.3")
+        results = extract_frames.extract_all(client, frames, "test", concurrency=4, progress=False)
+        assert results == [f"frame {i}" for i in range(1, 13)]
+        # Requests already in flight aside, nothing is sent during the pause
+        first_429 = server.requests[0][0]
+        assert not [t for t, _ in server.requests if 0.05 < t - first_429 < 0.25]
+
+    def test_server_errors_retried(self, serve, frames, monkeypatch):
+        """5xx responses are retried with backoff."""
+        monkeypatch.setattr(extract_frames, "BACKOFF_BASE", 0.01)
+        server, client = serve(failing=3)
+        results = extract_frames.extract_all(client, frames[:3], "test", concurrency=3, progress=False)
+        assert results == ["frame 1", "frame 2", "frame 3"]
+        assert len(server.requests) == 6
+
+    def test_gives_up_after_max_retries(self, serve, frames, monkeypatch):
+        """A frame that keeps failing is reported as None."""
+        monkeypatch.setattr(extract_frames, "BACKOFF_BASE", 0.01)
+        server, client = serve(failing=100)
+        results = extract_frames.extract_all(client, frames[:1], "test", max_retries=2, progress=False)
+        assert results == [None]
+        assert len(server.requests) == 3
+
+
+class TestBatching:
+    """Tests for several frames per request."""
+
+    def test_answers_split_to_frames(self, serve, frames):
+        """Runs of frames share a request, and each frame gets its own answer."""
+        server, client = serve()
+        results = extract_frames.extract_all(client, frames[:10], "test", batch_size=4, progress=False)
+        assert results == [f"frame {i}" for i in range(1, 11)]
+        assert sorted(server.images) == [2, 4, 4]
+
+    def test_falls_back_to_single_frames(self, serve, frames):
+        """A batched answer without delimiters is redone one frame at a time."""
+        server, client = serve(garbled=True)
+        results = extract_frames.extract_all(client, frames[:3], "test", batch_size=3, progress=False)
+        assert results == ["frame 1", "frame 2", "frame 3"]
+        assert server.images == [3, 1, 1, 1]
+
+    def test_cached_under_the_prompt_used(self, serve, frames, tmp_path):
+        """Split answers are cached as batched, fallback answers as single-frame ones."""
+        cache = extract_frames.ResultCache(tmp_path / "out.cache.jsonl", "test")
+        for garbled, batch in [(False, frames[:2]), (True, frames[2:4])]:
+            server, client = serve(garbled=garbled)
+            extract_frames.extract_all(client, batch, "test", batch_size=2, progress=False, on_result=cache.put)
+        assert [cache.get(frame) for frame in frames[:4]] == [None, None, "frame 3", "frame 4"]
+        assert [cache.get(frame, batched=True) for frame in frames[:4]] == ["frame 1", "frame 2", "frame 3", "frame 4"]
+        cache.close()
+
+    def test_split_batch(self):
+        """Delimiters must number every frame once, in order."""
+        answer = "=== FRAME 1 ===\n$ ls\n\n=== Frame 2 ===\nSKIP"
+        assert extract_frames.split_batch(answer, 2) == ["$ ls", "SKIP"]
+        with pytest.raises(extract_frames.BatchParseError):
+            extract_frames.split_batch(answer, 3)
+        with pytest.raises(extract_frames.BatchParseError):
+            extract_frames.split_batch("=== FRAME 2 ===\na\n=== FRAME 1 ===\nb", 2)
+
+
+class TestResultCache:
+    """Tests for the resumable result cache."""
+
+    def test_results_flushed_as_they_arrive(self, serve, frames, tmp_path):
+        """Each result is on disk as soon as on_result stores it."""
+        server, client = serve()
+        cache = extract_frames.ResultCache(tmp_path / "out.cache.jsonl", "test")
+        seen = []
+
+        def on_result(frame, content, batched):
+            cache.put(frame, content, batched)
+            # Readable by another process right away
+            reader = extract_frames.ResultCache(cache.path, "test")
+            seen.append(reader.get(frame))
+            reader.close()
+
+        extract_frames.extract_all(client, frames[:4], "test", progress=False, on_result=on_result)
+        cache.close()
+        assert sorted(seen) == ["frame 1", "frame 2", "frame 3", "frame 4"]
+
+    def test_keyed_by_content_deployment_and_prompt(self, frames, tmp_path, monkeypatch):
+        """Same bytes under another name hit; another deployment or prompt misses."""
+        path = tmp_path / "out.cache.jsonl"
+        cache = extract_frames.ResultCache(path, "test")
+        cache.put(frames[0], "content")
+        cache.close()
+        with open(path, "a") as f:
+            f.write('{"image": "truncat')  # A line cut short by a crash
+
+        copy = tmp_path / "frame_00099.jpg"
+        copy.write_bytes(frames[0].read_bytes())
+        assert extract_frames.ResultCache(path, "test").get(copy) == "content"
+        assert extract_frames.ResultCache(path, "other").get(frames[0]) is None
+        monkeypatch.setattr(extract_frames, "PROMPT_VERSION", "changed")
+        assert extract_frames.ResultCache(path, "test").get(frames[0]) is None
+
+
+class TestTokenBucket:
+    """Tests for the rate limiter."""
+
+    def test_rate(self):
+        """Beyond the burst capacity, acquires are spaced by the rate."""
+        bucket = extract_frames.TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        assert time.monotonic() - start >= 0.09
+
+    def test_pause(self):
+        """pause() blocks acquires even without a rate limit."""
+        bucket = extract_frames.TokenBucket(rate=0)
+        bucket.pause(0.1)
+        start = time.monotonic()
+        bucket.acquire()
+        assert time.monotonic() - start >= 0.09
+
+
+def terminal_frame(path, lines: int, quality: int = 85):
+    """Save a terminal-like screenshot showing `lines` lines of text."""
+    image = Image.new("RGB", (640, 360), "black")
+    draw = ImageDraw.Draw(image)
+    for line in range(lines):
+        draw.text((10, 10 + line * 14), f"$ command number {line} --with some arguments", fill="white")
+    image.save(path, quality=quality)
+    return path
+
+
+class TestDedup:
+    """Tests for the local near-duplicate filter."""
+
+    def test_static_screens_dropped(self, tmp_path):
+        """Re-encoded copies of a screen are dropped, a new line is kept."""
+        frames = [
+            terminal_frame(tmp_path / "frame_00001.jpg", 3),
+            terminal_frame(tmp_path / "frame_00002.jpg", 3, quality=70),
+            terminal_frame(tmp_path / "frame_00003.jpg", 4),
+            terminal_frame(tmp_path / "frame_00004.jpg", 4, quality=75),
+        ]
+        kept = extract_frames.dedup_frames(frames, [0, 1, 2, 3], progress=False)
+        assert kept == [frames[0], frames[2]]
+
+    def test_adaptive_examines_frames_between_samples(self, tmp_path):
+        """A big change between samples pulls in the distinct frames between them."""
+        frames = [terminal_frame(tmp_path / f"frame_{i:05d}.jpg", lines)
+                  for i, lines in enumerate([1, 1, 8, 8, 16, 16, 24, 24, 24], 1)]
+        assert extract_frames.dedup_frames(frames, [0, 8], progress=False) == [frames[0], frames[8]]
+        kept = extract_frames.dedup_frames(frames, [0, 8], adaptive_step=2, adaptive_distance=4,
+                                             progress=False)
+        assert kept == [frames[0], frames[2], frames[4], frames[6]]
+
+    def test_ssim_identical(self, tmp_path):
+        """Identical thumbnails score 1."""
+        _, thumbnail = extract_frames.frame_signature(terminal_frame(tmp_path / "frame_00001.jpg", 5))
+        assert extract_frames.ssim(thumbnail, thumbnail) == pytest.approx(1.0)
+
+
+class TestImagePreprocessor:
+    """Tests for preparing frames for upload."""
+
+    def test_downscaled_to_api_size(self, tmp_path):
+        """By default a frame is scaled to what the API would use, saving tokens."""
+        path = tmp_path / "frame_00001.png"
+        Image.new("RGB", (3840, 2160), "black").save(path)
+        preprocessor = extract_frames.ImagePreprocessor()
+        data, mime = preprocessor.prepare(path)
+        assert mime == "image/jpeg"
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == "JPEG"
+            assert image.size == (1365, 768)
+        assert preprocessor.bytes_after < preprocessor.bytes_before
+        # The API would have scaled it too: only the upload shrinks
+        assert preprocessor.tokens_before == preprocessor.tokens_after == 85 + 170 * 3 * 2
+
+    def test_crop_and_format(self, tmp_path):
+        """A crop and a max dimension cut the tokens; WebP gets its MIME type."""
+        path = terminal_frame(tmp_path / "frame_00001.jpg", 5)
+        preprocessor = extract_frames.ImagePreprocessor(max_dimension=256, crop=(0, 0, 600, 100),
+                                                        image_format="webp")
+        data, mime = preprocessor.prepare(path)
+        assert mime == "image/webp"
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.size == (256, 43)
+        assert preprocessor.tokens_after == 85 + 170 < preprocessor.tokens_before
+
+    def test_original_kept_as_is(self, tmp_path):
+        """With --image-format original, a frame that needs no change is sent untouched."""
+        path = tmp_path / "frame_00001.png"
+        Image.new("RGB", (640, 360), "black").save(path)
+        data, mime = extract_frames.ImagePreprocessor(image_format="original").prepare(path)
+        assert (data, mime) == (path.read_bytes(), "image/png")
+
+
+def video_frame(seconds: float, lines: int) -> "extract_frames.VideoFrame":
+    """A decoded video frame showing `lines` lines of terminal text."""
+    image = Image.new("RGB", (640, 360), "black")
+    draw = ImageDraw.Draw(image)
+    for line in range(lines):
+        draw.text((10, 10 + line * 14), f"$ command number {line}", fill="white")
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return extract_frames.VideoFrame(extract_frames.Path("talk.mp4"), seconds, buffer.getvalue())
+
+
+class TestVideo:
+    """Tests for frames decoded from a video."""
+
+    def test_select_filter(self):
+        """Frames are picked by interval, and optionally scene changes, with their PTS logged."""
+        assert extract_frames.select_filter(60) == "select='isnan(prev_selected_t)+gte(t-prev_selected_t,60)',showinfo"
+        assert "+gt(scene,0.3)'" in extract_frames.select_filter(7.5, scene=0.3)
+
+    def test_frames_in_memory(self, tmp_path):
+        """Video frames go through dedup, preprocessing and the cache like files, timed by PTS."""
+        frame = video_frame(3725.4, 3)
+        assert frame.name == "talk.mp4@01:02:05"
+        assert extract_frames.frame_timestamp(frame) == "01:02:05"
+        assert extract_frames.frame_signature(frame)[0] == extract_frames.frame_signature(video_frame(0, 3))[0]
+        assert extract_frames.ImagePreprocessor(image_format="original").prepare(frame)[1] == "image/png"
+        cache = extract_frames.ResultCache(tmp_path / "out.cache.jsonl", "test")
+        cache.put(frame, "content")
+        # The same pixels decoded by another run
+        assert cache.get(video_frame(3725.4, 3)) == "content"
+        cache.close()
+
+    def test_ffmpeg_started_lazily(self, tmp_path, monkeypatch):
+        """ffmpeg only runs while the frames are iterated, and is stopped when that ends early."""
+        # Stands in for ffmpeg: endless 2x2 frames, each with its showinfo line
+        fake_ffmpeg = ("import sys, time\n"
+                       "for n in range(10**6):\n"
+                       "    sys.stderr.write(f'[Parsed_showinfo_1] n:{n} pts_time:{n * 5}\\n'); sys.stderr.flush()\n"
+                       "    sys.stdout.buffer.write(bytes(12)); sys.stdout.flush(); time.sleep(0.01)\n")
+        started = []
+        popen = subprocess.Popen
+
+        def start(args, **kwargs):
+            started.append(popen([sys.executable, "-c", fake_ffmpeg], **kwargs))
+            return started[-1]
+
+        monkeypatch.setattr(extract_frames, "probe_video", lambda video: (2, 2, 0.0))
+        monkeypatch.setattr(extract_frames, "vfr_options", lambda: ("-fps_mode", "vfr"))
+        monkeypatch.setattr(subprocess, "Popen", start)
+        reader = extract_frames.VideoReader(tmp_path / "talk.mp4", interval=5, dedup=False)
+        assert started == []
+        frames = iter(reader)
+        assert [next(frames).seconds for _ in range(3)] == [0, 5, 10]
+        assert started[0].poll() is None
+        frames.close()
+        assert started[0].poll() is not None
+
+    def test_vfr_options(self, monkeypatch):
+        """-fps_mode replaces the deprecated -vsync from ffmpeg 5.1 on."""
+        for version, options in [("4.4.2-0ubuntu0.22.04.1", ("-vsync", "vfr")), ("6.1.1", ("-fps_mode", "vfr")),
+                                 ("n5.1", ("-fps_mode", "vfr")), ("N-113045-g8ed6f9d", ("-fps_mode", "vfr"))]:
+            extract_frames.vfr_options.cache_clear()
+            monkeypatch.setattr(subprocess, "run", lambda *args, **kwargs: subprocess.CompletedProcess(
+                args, 0, stdout=f"ffmpeg version {version} Copyright (c) 2000-2023\n"))
+            assert extract_frames.vfr_options() == options
+        extract_frames.vfr_options.cache_clear()
+
+    @pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg not installed")
+    def test_decode(self, tmp_path):
+        """Frames are decoded through the pipe at the interval, with their PTS."""
+        video = tmp_path / "test.mp4"
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=10:size=320x240:rate=10",
+                        "-pix_fmt", "yuv420p", str(video)], check=True)
+        frames = list(extract_frames.decode_video(video, interval=2.5))
+        assert [seconds for seconds, _ in frames] == pytest.approx([0, 2.5, 5, 7.5])
+        assert frames[0][1].size == (320, 240)
+        reader = extract_frames.VideoReader(video, interval=2.5)
+        assert [frame.seconds for frame in reader] == pytest.approx([0, 2.5, 5, 7.5])
+        assert reader.decoded == reader.kept == 4
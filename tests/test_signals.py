@@ -0,0 +1,76 @@
+"""Unit tests for mcbs/signals.py and mcbs/watch.py."""
+
+import threading
+import time
+
+import pytest
+
+from mcbs import signals, watch
+
+
+@pytest.fixture(autouse=True)
+def signals_dir(tmp_path, monkeypatch):
+    """Point the signals directory at a temporary directory."""
+    monkeypatch.setattr(signals, "SIGNALS_DIR", tmp_path / "signals")
+    return tmp_path / "signals"
+
+
+class TestSignals:
+    """Tests for post, respond, wait and list_waiting."""
+
+    def test_round_trip(self):
+        """A response carries the question's ticket and clears the waiting signal."""
+        signals.post("claude-auth", "OAuth or JWT?", ticket_id="abc123")
+        assert [s["message"] for s in signals.list_waiting()] == ["OAuth or JWT?"]
+
+        reply = signals.respond("claude-auth", "OAuth2")
+        assert reply["ticket_id"] == "abc123"
+        assert signals.list_waiting() == []
+        assert signals.wait("claude-auth", timeout=0)["response"] == "OAuth2"
+
+    def test_wait_consumes_response(self):
+        """A response is returned by one wait() only."""
+        signals.post("claude-a", "first?")
+        signals.respond("claude-a", "yes")
+        assert signals.wait("claude-a", timeout=0)["response"] == "yes"
+        assert not signals.response_path("claude-a").exists()
+        assert signals.wait("claude-a", timeout=0.2) is None
+
+    def test_respond_requires_waiting_worker(self):
+        """Responding to a session that isn't waiting raises SignalError."""
+        with pytest.raises(signals.SignalError):
+            signals.respond("claude-nobody", "hello")
+
+    def test_post_clears_old_response(self):
+        """A new question doesn't see the answer to the previous one."""
+        signals.post("claude-a", "first?")
+        signals.respond("claude-a", "yes")
+        signals.post("claude-a", "second?")
+        assert signals.wait("claude-a", timeout=0.2) is None
+
+    def test_wait_wakes_on_response(self):
+        """wait() returns as soon as the response is written."""
+        signals.post("claude-a", "ready?")
+        timer = threading.Timer(0.3, signals.respond, ("claude-a", "go"))
+        timer.start()
+        start = time.monotonic()
+        reply = signals.wait("claude-a", timeout=10)
+        elapsed = time.monotonic() - start
+        timer.join()
+        assert reply["response"] == "go"
+        assert elapsed < 2
+
+
+class TestWatch:
+    """Tests for wait_for_file."""
+
+    def test_polling_fallback(self, tmp_path, monkeypatch):
+        """Without inotify, the file is still found by polling."""
+        monkeypatch.setattr(watch, "open_watch", lambda directory: None)
+        path = tmp_path / "later.json"
+        threading.Timer(0.2, path.write_text, ("{}",)).start()
+        assert watch.wait_for_file(path, timeout=5)
+
+    def test_timeout(self, tmp_path):
+        """A file that never appears times out."""
+        assert not watch.wait_for_file(tmp_path / "never.json", timeout=0.2)
@@ -0,0 +1,344 @@
+"""Unit tests for mcbs/tickets.py."""
+
+import gc
+import json
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mcbs import tickets
+from mcbs.tickets import ConflictError, TicketError
+
+
+@pytest.fixture(autouse=True, params=["json", "sqlite"])
+def tickets_dir(request, tmp_path, monkeypatch):
+    """Point the ticket store (each backend in turn) at a temporary directory."""
+    monkeypatch.setattr(tickets, "TICKETS_DIR", tmp_path / "tickets")
+    monkeypatch.setattr(tickets, "BACKEND", request.param)
+    tickets.ensure_tickets_dir()
+    return tmp_path / "tickets"
+
+
+class TestCreate:
+    """Tests for create_ticket."""
+
+    def test_create_open_ticket(self):
+        """A new ticket is open, unassigned and has a creation entry."""
+        ticket = tickets.create_ticket("Write docs")
+        assert ticket["status"] == "open"
+        assert ticket["assigned_to"] is None
+        assert [h["action"] for h in ticket["history"]] == ["created"]
+        assert tickets.load_ticket(ticket["id"]) == ticket
+
+    def test_create_with_assign(self):
+        """Assigning at creation moves the ticket to in-progress."""
+        ticket = tickets.create_ticket("Write docs", assign="doc-worker")
+        assert ticket["status"] == "in-progress"
+        assert ticket["assigned_to"] == "doc-worker"
+
+
+class TestLoad:
+    """Tests for partial ID resolution."""
+
+    def test_partial_id(self):
+        """A unique prefix resolves to the full ticket."""
+        ticket = tickets.create_ticket("Task")
+        assert tickets.load_ticket(ticket["id"][:3])["id"] == ticket["id"]
+
+    def test_missing_raises(self):
+        """Unknown IDs raise TicketError."""
+        with pytest.raises(TicketError, match="not found"):
+            tickets.load_ticket("zzzz")
+
+    def test_ambiguous_raises(self):
+        """A prefix matching several tickets raises TicketError."""
+        for ticket_id in ("abc00001", "abc00002"):
+            tickets.save_ticket({"id": ticket_id, "title": "t", "body": "", "status": "open",
+                                 "assigned_to": None, "created_at": "", "updated_at": "", "history": []})
+        with pytest.raises(TicketError, match="Ambiguous"):
+            tickets.load_ticket("abc")
+
+    def test_resolve_ids(self):
+        """Several partial IDs resolve in one call, in input order."""
+        a = tickets.create_ticket("A")
+        b = tickets.create_ticket("B")
+        assert tickets.resolve_ids([b["id"][:4], a["id"][:5]]) == {b["id"][:4]: b["id"], a["id"][:5]: a["id"]}
+
+    def test_deleted_ticket_leaves_index(self):
+        """A deleted ticket no longer resolves."""
+        ticket = tickets.create_ticket("Task")
+        tickets.delete_ticket(ticket["id"])
+        with pytest.raises(TicketError, match="not found"):
+            tickets.resolve_ids([ticket["id"][:4]])
+
+    def test_index_untouched_by_updates(self, tickets_dir):
+        """Only adding or removing a ticket rewrites the ID index."""
+        if tickets.BACKEND != "json":
+            pytest.skip("JSON backend only")
+        ticket = tickets.create_ticket("Task")
+        ids_path = tickets_dir / ".index" / "ids"
+        before = ids_path.stat()
+        tickets.add_comment(ticket["id"], "note")
+        tickets.update_ticket(ticket["id"], status="done")
+        after = ids_path.stat()
+        assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+
+    def test_unindexed_file_found(self, tickets_dir):
+        """A ticket file added behind the index's back still resolves."""
+        if tickets.BACKEND != "json":
+            pytest.skip("JSON backend only")
+        ticket = tickets.create_ticket("Task")
+        state = json.loads((tickets_dir / f"{ticket['id']}.json").read_text())
+        state["id"] = "fedcba98"
+        (tickets_dir / "fedcba98.json").write_text(json.dumps(state))
+        assert tickets.load_ticket("fedc")["title"] == "Task"
+
+
+class TestChanges:
+    """Tests for update, assign, comment and delete."""
+
+    def test_update_status(self):
+        """Updating the status records a status_change entry."""
+        ticket = tickets.create_ticket("Task")
+        previous, updated = tickets.update_ticket(ticket["id"], status="done")
+        assert previous["status"] == "open"
+        assert updated["status"] == "done"
+        entry = tickets.ticket_history(ticket["id"])[-1]
+        assert (entry["action"], entry["from"], entry["to"]) == ("status_change", "open", "done")
+
+    def test_update_requires_change(self):
+        """An update without any field raises TicketError."""
+        ticket = tickets.create_ticket("Task")
+        with pytest.raises(TicketError, match="at least one"):
+            tickets.update_ticket(ticket["id"])
+
+    def test_assign_auto_transitions(self):
+        """Assigning an open ticket moves it to in-progress."""
+        ticket = tickets.create_ticket("Task")
+        previous, updated = tickets.assign_ticket(ticket["id"], "worker-1")
+        assert previous["assigned_to"] is None
+        assert updated["status"] == "in-progress"
+
+    def test_comment_and_delete(self):
+        """Comments are appended to history and deleted tickets are gone."""
+        ticket = tickets.create_ticket("Task")
+        tickets.add_comment(ticket["id"], "halfway")
+        assert tickets.ticket_history(ticket["id"])[-1]["details"] == "halfway"
+        tickets.delete_ticket(ticket["id"])
+        assert tickets.list_tickets() == []
+
+    def test_stats(self):
+        """Stats count tickets per status."""
+        tickets.create_ticket("A")
+        tickets.create_ticket("B", assign="w")
+        stats = tickets.ticket_stats()
+        assert stats["by_status"]["open"] == 1
+        assert stats["by_status"]["in-progress"] == 1
+        assert stats["total"] == 2
+
+
+class TestStats:
+    """Tests for the maintained ticket summary."""
+
+    def test_summary_tracks_changes(self):
+        """Creates, assignments, status changes and deletes adjust the summary."""
+        a = tickets.create_ticket("A")
+        b = tickets.create_ticket("B", assign="w1")
+        c = tickets.create_ticket("C")
+        tickets.assign_ticket(c["id"], "w1")
+        tickets.assign_ticket(c["id"], "w2")
+        tickets.update_ticket(b["id"], status="done")
+        tickets.delete_ticket(a["id"])
+
+        stats = tickets.ticket_stats()
+        assert stats["total"] == 2
+        assert stats["by_status"]["done"] == 1
+        assert stats["by_status"]["in-progress"] == 1
+        assert stats["by_status"]["open"] == 0
+        assert stats["by_worker"] == {"w1": 1, "w2": 1}
+        assert stats["oldest_open"] is None
+        assert stats["avg_time_to_done"] >= 0
+
+    def test_oldest_open(self, monkeypatch):
+        """The oldest open ticket is reported with its age."""
+        with monkeypatch.context() as m:
+            m.setattr(tickets, "now_iso", lambda: "2020-01-01T00:00:00Z")
+            first = tickets.create_ticket("First")
+        tickets.create_ticket("Second")
+        oldest = tickets.ticket_stats()["oldest_open"]
+        assert oldest["id"] == first["id"]
+        assert oldest["age"] > 86400
+
+    def test_rebuild_matches_incremental(self):
+        """A rebuilt summary equals the incrementally maintained one."""
+        for i in range(5):
+            ticket = tickets.create_ticket(f"T{i}", assign=f"w{i % 2}")
+            if i % 2:
+                tickets.update_ticket(ticket["id"], status="done")
+        incremental = tickets.get_store().summary()
+        rebuilt = tickets.get_store().rebuild_summary()
+        incremental.pop("generation", None)
+        rebuilt.pop("generation", None)
+        assert rebuilt == incremental
+
+    def test_rebuild_repairs_drift(self):
+        """A missing summary is rebuilt from the tickets on first use."""
+        tickets.create_ticket("A")
+        store = tickets.get_store()
+        if store.name == "json":
+            store.summary_path().unlink()
+        else:
+            store.conn.execute("DELETE FROM summary")
+        tickets.create_ticket("B")
+        assert tickets.ticket_stats()["by_status"]["open"] == 2
+
+
+class TestBatch:
+    """Tests for run_batch."""
+
+    def test_operations_applied_in_order(self):
+        """Each line is applied and reported, and later lines see earlier ones."""
+        existing = tickets.create_ticket("Existing")
+        lines = [
+            json.dumps({"op": "create", "title": "New", "assign": "w1"}),
+            "",
+            json.dumps({"op": "update", "id": existing["id"][:4], "status": "blocked"}),
+            json.dumps({"op": "comment", "id": existing["id"], "text": "why"}),
+            json.dumps({"op": "delete", "id": existing["id"]}),
+        ]
+        results = tickets.run_batch(lines)
+        assert [r["line"] for r in results] == [1, 3, 4, 5]
+        assert all(r["ok"] for r in results)
+        assert results[0]["ticket"]["assigned_to"] == "w1"
+        assert [t["title"] for t in tickets.list_tickets()] == ["New"]
+        stats = tickets.ticket_stats()
+        assert stats["total"] == 1
+        assert stats["by_worker"] == {"w1": 1}
+
+    def test_failures_are_reported(self):
+        """Bad lines get an error result without stopping the batch."""
+        results = tickets.run_batch([
+            "not json",
+            json.dumps({"op": "explode"}),
+            json.dumps({"op": "create"}),
+            json.dumps({"op": "create", "title": "Fine"}),
+        ])
+        assert [r["ok"] for r in results] == [False, False, False, True]
+        assert "Invalid JSON" in results[0]["error"]
+        assert "Unknown operation" in results[1]["error"]
+        assert "title" in results[2]["error"]
+        assert len(tickets.list_tickets()) == 1
+
+
+class TestHistory:
+    """Tests for the append-only history log."""
+
+    def test_paging(self):
+        """History can be read a page at a time."""
+        ticket = tickets.create_ticket("Task")
+        for i in range(5):
+            tickets.add_comment(ticket["id"], f"c{i}")
+        page = tickets.ticket_history(ticket["id"], offset=2, limit=2)
+        assert [e["details"] for e in page] == ["c1", "c2"]
+
+    def test_load_without_history(self):
+        """Loading without history skips the event log."""
+        ticket = tickets.create_ticket("Task")
+        assert "history" not in tickets.load_ticket(ticket["id"], history=False)
+
+    def test_legacy_json_ticket_upgraded(self, tickets_dir):
+        """Tickets with embedded history keep it when new events are appended."""
+        if tickets.get_store().name != "json":
+            pytest.skip("JSON layout only")
+        legacy = {"id": "abcd1234", "title": "Old", "body": "", "status": "open", "assigned_to": None,
+                  "created_at": "2025-01-01T00:00:00Z", "updated_at": "2025-01-01T00:00:00Z",
+                  "history": [{"timestamp": "2025-01-01T00:00:00Z", "action": "created", "details": "Ticket created"}]}
+        (tickets_dir / "abcd1234.json").write_text(json.dumps(legacy))
+
+        tickets.add_comment("abcd", "still here")
+        actions = [e["action"] for e in tickets.ticket_history("abcd")]
+        assert actions == ["created", "comment"]
+        assert "history" not in json.loads((tickets_dir / "abcd1234.json").read_text())
+
+
+class TestMigrate:
+    """Tests for copying tickets between backends."""
+
+    def test_json_to_sqlite(self):
+        """Every ticket, with its history, is copied to the target."""
+        created = tickets.create_ticket("Task", assign="w")
+        tickets.add_comment(created["id"], "note")
+        source = tickets.get_store()
+        target = tickets.get_store("sqlite" if source.name == "json" else "json")
+
+        assert tickets.migrate(source, target) == 1
+        assert target.load(created["id"]) == source.load(created["id"])
+        assert target.resolve(created["id"][:4]) == created["id"]
+
+
+def _comment_many(ticket_id: str, count: int):
+    """Add several comments from a separate process."""
+    tickets._local.__dict__.clear()
+    for i in range(count):
+        tickets.add_comment(ticket_id, f"comment {i}")
+
+
+class TestConcurrency:
+    """Tests for concurrent writers."""
+
+    def test_parallel_comments_are_not_lost(self):
+        """Comments from several processes all end up in the history."""
+        ticket = tickets.create_ticket("Task")
+        ctx = multiprocessing.get_context("fork")
+        procs = [ctx.Process(target=_comment_many, args=(ticket["id"], 10)) for _ in range(4)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+
+        loaded = tickets.load_ticket(ticket["id"])
+        assert len(loaded["history"]) == 41
+        assert loaded["version"] == 41
+
+    def test_parallel_threads(self):
+        """Threads sharing the module's stores (as spawn-batch does) write safely."""
+        ids = [tickets.create_ticket(f"Task {i}")["id"] for i in range(20)]
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            list(pool.map(lambda ticket_id: tickets.assign_ticket(ticket_id, "worker"), ids))
+
+        assert all(tickets.load_ticket(ticket_id)["status"] == "in-progress" for ticket_id in ids)
+        store = tickets.get_store()
+        assert store.summary()["by_status"] == store.rebuild_summary()["by_status"] == {"in-progress": 20}
+
+    def test_thread_stores_released(self):
+        """A thread's stores (and their connections) go away with the thread."""
+        refs = []
+        thread = threading.Thread(target=lambda: refs.append(weakref.ref(tickets.get_store())))
+        thread.start()
+        thread.join()
+        gc.collect()
+        assert refs[0]() is None
+        assert tickets.get_store() is tickets.get_store()
+
+    def test_threads_sharing_a_store(self, tickets_dir, monkeypatch):
+        """A lock held by one thread doesn't let another skip it."""
+        if tickets.BACKEND != "json":
+            pytest.skip("JSON backend only")
+        store = tickets.get_store()
+        monkeypatch.setattr(tickets, "get_store", lambda backend=None: store)
+        ids = [tickets.create_ticket(f"Task {i}")["id"] for i in range(20)]
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            list(pool.map(lambda ticket_id: tickets.assign_ticket(ticket_id, "worker"), ids))
+
+        assert store.summary()["by_status"] == store.rebuild_summary()["by_status"] == {"in-progress": 20}
+        assert (tickets_dir / f"{ids[0]}.json").stat().st_mode & 0o777 == 0o644
+
+    def test_stale_version_conflicts(self):
+        """Saving over a newer version raises ConflictError."""
+        ticket = tickets.create_ticket("Task")
+        tickets.add_comment(ticket["id"], "newer")
+        with pytest.raises(ConflictError):
+            tickets.get_store().save(ticket, expected_version=ticket["version"])
@@ -0,0 +1,27 @@
+"""Unit tests for mcbs/tmux.py."""
+
+from mcbs.tmux import quote_arg
+
+
+class TestQuoteArg:
+    """Tests for quoting arguments sent over a control-mode connection."""
+
+    def test_plain(self):
+        """Plain words are wrapped in double quotes."""
+        assert quote_arg("send-keys") == '"send-keys"'
+
+    def test_empty(self):
+        """Empty arguments stay as an empty quoted string."""
+        assert quote_arg("") == '""'
+
+    def test_special_characters_escaped(self):
+        """Backslashes, quotes and dollars are escaped."""
+        assert quote_arg('a\\b"c$d') == '"a\\\\b\\"c\\$d"'
+
+    def test_newlines_stay_on_one_line(self):
+        """Newlines and tabs become escape sequences."""
+        assert quote_arg("a\nb\tc") == '"a\\nb\\tc"'
+
+    def test_control_characters_octal(self):
+        """Other control characters use octal escapes."""
+        assert quote_arg("\x1b[A") == '"\\033[A"'
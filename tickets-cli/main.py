@@ -2,60 +2,44 @@
 """Tickets CLI - Track delegated tasks for Multi-Claude orchestration."""
 
 import json
-import uuid
-from datetime import datetime, timezone
+import sys
 from pathlib import Path
 
 import click
 
-TICKETS_DIR = Path(__file__).parent / "tickets"
-
-VALID_STATUSES = ["open", "in-progress", "blocked", "waiting", "done"]
-
-
-def ensure_tickets_dir():
-    """Create tickets directory if it doesn't exist."""
-    TICKETS_DIR.mkdir(exist_ok=True)
-
-
-def generate_ticket_id() -> str:
-    """Generate a short unique ticket ID."""
-    return uuid.uuid4().hex[:8]
-
-
-def now_iso() -> str:
-    """Return current UTC timestamp in ISO format."""
-    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-
-def load_ticket(ticket_id: str) -> dict:
-    """Load a ticket by ID."""
-    # Support partial ID matching
-    matches = list(TICKETS_DIR.glob(f"{ticket_id}*.json"))
-    if not matches:
-        raise click.ClickException(f"Ticket not found: {ticket_id}")
-    if len(matches) > 1:
-        ids = [m.stem for m in matches]
-        raise click.ClickException(f"Ambiguous ID '{ticket_id}', matches: {', '.join(ids)}")
-
-    with open(matches[0]) as f:
-        return json.load(f)
-
-
-def save_ticket(ticket: dict):
-    """Save a ticket to disk."""
-    ensure_tickets_dir()
-    path = TICKETS_DIR / f"{ticket['id']}.json"
-    with open(path, "w") as f:
-        json.dump(ticket, f, indent=2)
-
-
-def add_history(ticket: dict, action: str, **kwargs):
-    """Add an entry to ticket history."""
-    entry = {"timestamp": now_iso(), "action": action}
-    entry.update(kwargs)
-    ticket["history"].append(entry)
-    ticket["updated_at"] = now_iso()
+# Make the shared mcbs package importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcbs import tickets as store  # noqa: E402
+from mcbs.tickets import (  # noqa: E402
+    BACKENDS,
+    VALID_STATUSES,
+    TicketError,
+    add_comment,
+    assign_ticket,
+    create_ticket,
+    delete_ticket,
+    ensure_tickets_dir,
+    get_store,
+    list_tickets as find_tickets,
+    load_ticket,
+    migrate as migrate_store,
+    resolve_ids,
+    run_batch,
+    ticket_history,
+    ticket_stats,
+    update_ticket,
+)
+
+
+class TicketsGroup(click.Group):
+    """Click group that reports ticket store errors as CLI errors."""
+
+    def invoke(self, ctx):
+        try:
+            return super().invoke(ctx)
+        except TicketError as e:
+            raise click.ClickException(str(e))
 
 
 def format_status_icon(status: str) -> str:
@@ -70,13 +54,31 @@ def format_status_icon(status: str) -> str:
     return icons.get(status, "?")
 
 
-@click.group()
-def cli():
+def format_duration(seconds: float) -> str:
+    """Format a duration compactly, e.g. '3d 4h', '2h 5m' or '45s'."""
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, secs = divmod(rest, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    if minutes:
+        return f"{minutes}m {secs}s"
+    return f"{secs}s"
+
+
+@click.group(cls=TicketsGroup)
+@click.option("--backend", type=click.Choice(list(BACKENDS)), envvar="TICKETS_BACKEND", default="json",
+              show_default=True, help="Ticket storage backend")
+def cli(backend: str):
     """Tickets CLI - Track delegated tasks for Multi-Claude orchestration.
 
     This CLI helps Prophet Claude track tasks delegated to worker Claudes.
     Each task becomes a ticket that can be assigned, updated, and tracked.
     """
+    store.BACKEND = backend
     ensure_tickets_dir()
 
 
@@ -95,28 +97,8 @@ def create(title: str, body: str, assign: str | None):
 
         tickets create "Add tests" --assign test-worker
     """
-    ticket_id = generate_ticket_id()
-    now = now_iso()
-
-    ticket = {
-        "id": ticket_id,
-        "title": title,
-        "body": body,
-        "status": "open",
-        "assigned_to": None,
-        "created_at": now,
-        "updated_at": now,
-        "history": [{"timestamp": now, "action": "created", "details": "Ticket created"}],
-    }
-
-    # Handle immediate assignment
-    if assign:
-        ticket["assigned_to"] = assign
-        ticket["status"] = "in-progress"
-        add_history(ticket, "assigned", details=f"Assigned to {assign}")
-        add_history(ticket, "status_change", **{"from": "open", "to": "in-progress"})
-
-    save_ticket(ticket)
+    ticket = create_ticket(title, body, assign)
+    ticket_id = ticket["id"]
 
     click.echo(f"Created ticket: {ticket_id}")
     click.echo(f"  Title: {title}")
@@ -141,19 +123,7 @@ def list_tickets(status: str | None, assigned: str | None):
 
         tickets list --status in-progress --assigned auth-worker
     """
-    tickets = []
-
-    for path in sorted(TICKETS_DIR.glob("*.json")):
-        with open(path) as f:
-            ticket = json.load(f)
-
-            # Apply filters
-            if status and ticket["status"] != status:
-                continue
-            if assigned and ticket["assigned_to"] != assigned:
-                continue
-
-            tickets.append(ticket)
+    tickets = find_tickets(status, assigned)
 
     if not tickets:
         click.echo("No tickets")
@@ -168,16 +138,21 @@ def list_tickets(status: str | None, assigned: str | None):
 
 @cli.command()
 @click.argument("ticket_id")
-def show(ticket_id: str):
+@click.option("--offset", default=0, help="Skip this many history entries")
+@click.option("--limit", "-n", default=None, type=int, help="Show at most this many history entries")
+def show(ticket_id: str, offset: int, limit: int | None):
     """Show detailed ticket information.
 
     Supports partial ID matching (e.g., 'abc' matches 'abc12345').
+    History is read lazily, so long histories can be paged through.
 
     Example:
 
         tickets show abc123
+
+        tickets show abc123 --offset 20 --limit 10
     """
-    ticket = load_ticket(ticket_id)
+    ticket = load_ticket(ticket_id, history=False)
 
     icon = format_status_icon(ticket["status"])
     click.echo(f"{icon} {ticket['title']}")
@@ -196,7 +171,8 @@ def show(ticket_id: str):
 
     click.echo(f"")
     click.echo("History:")
-    for entry in ticket["history"]:
+    entries = ticket_history(ticket["id"], offset, limit)
+    for entry in entries:
         ts = entry["timestamp"]
         action = entry["action"]
 
@@ -209,6 +185,9 @@ def show(ticket_id: str):
 
         click.echo(f"  {ts}: {action} {detail}")
 
+    if limit is not None and len(entries) == limit:
+        click.echo(f"  ... more with --offset {offset + limit}")
+
 
 @cli.command()
 @click.argument("ticket_id")
@@ -228,29 +207,15 @@ def update(ticket_id: str, status: str | None, body: str | None, title: str | No
 
         tickets update abc123 --title "New title"
     """
-    ticket = load_ticket(ticket_id)
-
-    if not any([status, body, title]):
-        raise click.ClickException("Provide at least one update: --status, --body, or --title")
+    previous, ticket = update_ticket(ticket_id, status, body, title)
 
     if status:
-        old_status = ticket["status"]
-        ticket["status"] = status
-        add_history(ticket, "status_change", **{"from": old_status, "to": status})
-        click.echo(f"Status: {old_status} -> {status}")
-
+        click.echo(f"Status: {previous['status']} -> {status}")
     if body is not None:
-        ticket["body"] = body
-        add_history(ticket, "updated", details="Description updated")
         click.echo("Description updated")
-
     if title:
-        old_title = ticket["title"]
-        ticket["title"] = title
-        add_history(ticket, "updated", details=f"Title: '{old_title}' -> '{title}'")
         click.echo(f"Title updated")
 
-    save_ticket(ticket)
     click.echo(f"Ticket {ticket['id']} updated")
 
 
@@ -268,20 +233,12 @@ def assign(ticket_id: str, worker: str):
 
         tickets assign abc123 test-worker
     """
-    ticket = load_ticket(ticket_id)
+    previous, ticket = assign_ticket(ticket_id, worker)
+    old_assigned = previous["assigned_to"]
 
-    old_assigned = ticket["assigned_to"]
-    ticket["assigned_to"] = worker
-    add_history(ticket, "assigned", details=f"Assigned to {worker}")
-
-    # Auto-transition to in-progress
-    if ticket["status"] == "open":
-        ticket["status"] = "in-progress"
-        add_history(ticket, "status_change", **{"from": "open", "to": "in-progress"})
+    if previous["status"] != ticket["status"]:
         click.echo(f"Status: open -> in-progress (auto)")
 
-    save_ticket(ticket)
-
     if old_assigned:
         click.echo(f"Reassigned {ticket['id']}: {old_assigned} -> {worker}")
     else:
@@ -300,9 +257,7 @@ def comment(ticket_id: str, comment: str):
 
         tickets comment abc123 "Started implementation, 50% done"
     """
-    ticket = load_ticket(ticket_id)
-    add_history(ticket, "comment", details=comment)
-    save_ticket(ticket)
+    ticket = add_comment(ticket_id, comment)
     click.echo(f"Comment added to {ticket['id']}")
 
 
@@ -318,32 +273,75 @@ def delete(ticket_id: str, force: bool):
 
         tickets delete abc123 --force
     """
-    ticket = load_ticket(ticket_id)
+    ticket = load_ticket(ticket_id, history=False)
 
     if not force:
         click.confirm(f"Delete ticket '{ticket['title']}'?", abort=True)
 
-    path = TICKETS_DIR / f"{ticket['id']}.json"
-    path.unlink()
+    delete_ticket(ticket["id"])
     click.echo(f"Deleted ticket: {ticket['id']}")
 
 
 @cli.command()
-def stats():
+@click.argument("ticket_ids", nargs=-1)
+@click.option("--stdin", "from_stdin", is_flag=True, help="Also read IDs from stdin, one per line")
+def resolve(ticket_ids: tuple[str, ...], from_stdin: bool):
+    """Print the full ID for each partial ID.
+
+    Output is one "<partial> <full>" line per ID, in input order.
+
+    Examples:
+
+        tickets resolve abc def
+
+        cut -d' ' -f1 ids.txt | tickets resolve --stdin
+    """
+    prefixes = list(ticket_ids)
+    if from_stdin:
+        prefixes += [line.strip() for line in sys.stdin if line.strip()]
+    for prefix, full_id in resolve_ids(prefixes).items():
+        click.echo(f"{prefix} {full_id}")
+
+
+@cli.command()
+def batch():
+    """Apply ticket operations read as JSONL from stdin.
+
+    Each line is an object with an "op" (create, update, assign, comment,
+    delete) and the fields of the matching command. All operations run in
+    one process and one store batch; one JSON result is printed per line.
+    Exits with status 1 if any operation failed.
+
+    Example:
+
+        tickets batch <<'EOF'
+        {"op": "create", "title": "Login form", "assign": "ui-worker"}
+        {"op": "update", "id": "abc123", "status": "done"}
+        {"op": "comment", "id": "def456", "text": "Waiting on API"}
+        EOF
+    """
+    results = run_batch(sys.stdin)
+    for result in results:
+        click.echo(json.dumps(result))
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+@cli.command()
+@click.option("--rebuild", is_flag=True, help="Re-derive the summary from every ticket first")
+def stats(rebuild: bool):
     """Show ticket statistics.
 
+    Reads the summary the store keeps up to date on every change, so it
+    is fast however many tickets exist. Use --rebuild if the summary
+    looks wrong (e.g. after editing ticket files by hand).
+
     Example:
 
         tickets stats
     """
-    stats_data = {"open": 0, "in-progress": 0, "blocked": 0, "waiting": 0, "done": 0}
-    total = 0
-
-    for path in TICKETS_DIR.glob("*.json"):
-        with open(path) as f:
-            ticket = json.load(f)
-            stats_data[ticket["status"]] = stats_data.get(ticket["status"], 0) + 1
-            total += 1
+    stats_data = ticket_stats(rebuild=rebuild)
+    total = stats_data["total"]
 
     if total == 0:
         click.echo("No tickets")
@@ -351,12 +349,48 @@ def stats():
 
     click.echo(f"Total: {total} tickets")
     click.echo("")
-    for status, count in stats_data.items():
+    for status, count in stats_data["by_status"].items():
         if count > 0:
             icon = format_status_icon(status)
             pct = (count / total) * 100
             click.echo(f"  {icon} {status}: {count} ({pct:.0f}%)")
 
+    if stats_data["by_worker"]:
+        click.echo("")
+        click.echo("By worker:")
+        for worker, count in stats_data["by_worker"].items():
+            click.echo(f"  {worker}: {count}")
+
+    oldest = stats_data["oldest_open"]
+    avg_done = stats_data["avg_time_to_done"]
+    if oldest or avg_done is not None:
+        click.echo("")
+    if oldest:
+        click.echo(f"Oldest open:          {oldest['id']} ({format_duration(oldest['age'])})")
+    if avg_done is not None:
+        click.echo(f"Average time to done: {format_duration(avg_done)}")
+
+
+@cli.command()
+@click.option("--to", "target", required=True, type=click.Choice(list(BACKENDS)), help="Backend to copy tickets into")
+def migrate(target: str):
+    """Copy all tickets from the current backend into another.
+
+    The source is left untouched. Switch over afterwards with
+    --backend or the TICKETS_BACKEND environment variable.
+
+    Example:
+
+        tickets migrate --to sqlite
+
+        TICKETS_BACKEND=sqlite tickets list
+    """
+    source = get_store()
+    if source.name == target:
+        raise click.ClickException(f"Tickets are already stored in '{target}'")
+    count = migrate_store(source, get_store(target))
+    click.echo(f"Migrated {count} ticket(s): {source.name} -> {target}")
+
 
 if __name__ == "__main__":
     cli()